@@ -7,6 +7,8 @@ from typing import Any, Mapping
 import hexdoc
 from hexdoc import HEXDOC_MODID, VERSION
 from hexdoc.core import IsVersion, ModResourceLoader, ResourceLocation
+from hexdoc.minecraft import I18n
+from hexdoc.minecraft.i18n import relocalize
 from hexdoc.minecraft.recipe import (
     ingredients as minecraft_ingredients,
     recipes as minecraft_recipes,
@@ -22,7 +24,7 @@ from hexdoc.plugin import (
     ModPluginImpl,
     hookimpl,
 )
-from hexdoc.utils import ContextSource, JSONDict, cast_context
+from hexdoc.utils import ContextSource, JSONDict, cast_context, sorted_dict
 
 
 class HexdocPlugin(LoadTaggedUnionsImpl, ModPluginImpl, BookPluginImpl):
@@ -59,6 +61,10 @@ class HexdocModPlugin(ModPlugin):
     def plugin_version(self):
         return VERSION
 
+    @property
+    def supports_localize_book(self):
+        return True
+
     def resource_dirs(self) -> HookReturn[Package]:
         from hexdoc._export import generated, resources
 
@@ -111,3 +117,20 @@ class PatchouliBookPlugin(BookPlugin[Book]):
         book._load_entries(context, book_ctx, loader)
 
         return book
+
+    def localize_book(self, book: Book, *, context: ContextSource):
+        localized = relocalize(book, I18n.of(context))
+        if localized is book:
+            localized = book.model_copy()
+
+        # entries are sorted by name, which depends on the language
+        # relocalize shares unchanged models with the original book, so replace the
+        # categories with copies instead of modifying them
+        localized._categories = {
+            category_id: category.model_copy(
+                update={"entries": sorted_dict(category.entries)}
+            )
+            for category_id, category in localized.categories.items()
+        }
+
+        return localized
@@ -28,9 +28,17 @@ from hexdoc.minecraft.assets import (
     PNGTexture,
     TextureContext,
 )
+from hexdoc.minecraft.i18n import report_missing_translations
 from hexdoc.patchouli import BookContext, FormattingContext
+from hexdoc.patchouli.text import FormatTree
 from hexdoc.plugin import ModPluginWithBook
-from hexdoc.utils import ContextSource, git_root, setup_logging, write_to_path
+from hexdoc.utils import (
+    ContextSource,
+    cast_context,
+    git_root,
+    setup_logging,
+    write_to_path,
+)
 from hexdoc.utils.logging import repl_readfunc
 
 from . import ci, render_block
@@ -38,12 +46,14 @@ from .utils.args import (
     DEFAULT_MERGE_DST,
     DEFAULT_MERGE_SRC,
     BranchOption,
+    MaxWorkersOption,
     PathArgument,
     PropsOption,
     ReleaseOption,
     VerbosityOption,
 )
 from .utils.load import (
+    copy_context,
     init_context,
     load_common_data,
     render_textures_and_export_metadata,
@@ -71,8 +81,13 @@ def callback(
 
 
 @app.command()
-def repl(*, props_file: PropsOption):
-    """Start a Python shell with some helpful extra locals added from hexdoc."""
+def repl(*, props_file: PropsOption, eager_format: bool = False):
+    """Start a Python shell with some helpful extra locals added from hexdoc.
+
+    Styled text in the book is only parsed when it's first accessed. If
+    `--eager-format` is set, it's parsed while loading the book instead, so any errors
+    in formatting codes are shown immediately.
+    """
 
     repl_locals = dict[str, Any](
         props_path=props_file,
@@ -115,6 +130,7 @@ def repl(*, props_file: PropsOption):
                 loader=loader,
                 i18n=i18n,
                 all_metadata=all_metadata,
+                eager_format=eager_format,
             )
             book = book_plugin.validate_book(book_data, context=context)
             repl_locals |= dict(
@@ -152,17 +168,29 @@ def build(
     branch: BranchOption,
     release: ReleaseOption = False,
     clean: bool = False,
+    cache: bool = True,
+    max_workers: MaxWorkersOption = 1,
+    missing_translations: Optional[Path] = None,
     props_file: PropsOption,
 ) -> Path:
     """Export resources and render the web book.
 
+    If `--missing-translations` is set, also writes every missing translation key to
+    that JSON file.
+
     For developers: returns the site path (eg. `/v/latest/main`).
     """
 
     props, pm, book_plugin, plugin = load_common_data(props_file, branch)
 
     logger.info("Exporting resources.")
-    with ModResourceLoader.clean_and_load_all(props, pm, export=True) as loader:
+    with ModResourceLoader.clean_and_load_all(
+        props,
+        pm,
+        export=True,
+        cache=cache,
+        max_workers=max_workers,
+    ) as loader:
         site_path = plugin.site_path(versioned=release)
         site_dir = output_dir / site_path
 
@@ -188,17 +216,31 @@ def build(
 
         logger.info("Loading books for all languages.")
         books = list[LoadedBookInfo]()
+        # the default language is loaded first, then reused for the other languages
+        # so we only need to localize their text instead of validating everything
+        default_book: LoadedBookInfo | None = None
+        can_localize_book = pm.can_localize_book()
         for language, i18n in all_i18n.items():
             try:
-                context = init_context(
-                    book_id=book_id,
-                    book_data=book_data,
-                    pm=pm,
-                    loader=loader,
-                    i18n=i18n,
-                    all_metadata=all_metadata,
-                )
-                book = book_plugin.validate_book(book_data, context=context)
+                context, book = None, None
+                if default_book and can_localize_book:
+                    context = copy_context(default_book.context, i18n)
+                    book = book_plugin.localize_book(
+                        default_book.book,
+                        context=context,
+                    )
+
+                if context is None or book is None:
+                    context = init_context(
+                        book_id=book_id,
+                        book_data=book_data,
+                        pm=pm,
+                        loader=loader,
+                        i18n=i18n,
+                        all_metadata=all_metadata,
+                    )
+                    book = book_plugin.validate_book(book_data, context=context)
+
                 books.append(
                     LoadedBookInfo(
                         language=language,
@@ -208,6 +250,8 @@ def build(
                         book=book,
                     )
                 )
+                if language == props.default_lang:
+                    default_book = books[-1]
             except Exception:
                 if release or language == props.default_lang:
                     raise
@@ -215,6 +259,7 @@ def build(
 
         if not props.template:
             logger.info("Skipping book render because props.template is not set.")
+            report_missing_translations(all_i18n.values(), missing_translations)
             return site_dir
 
         if not isinstance(plugin, ModPluginWithBook):
@@ -287,6 +332,9 @@ def build(
                     raise
                 logger.exception(f"Failed to render book for {book_info.language}")
 
+        report_missing_translations(all_i18n.values(), missing_translations)
+
+    logger.debug(f"FormatTree cache: {FormatTree.cache_info()}")
     logger.info("Done.")
     return site_dir
 
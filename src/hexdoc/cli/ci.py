@@ -15,7 +15,7 @@ from github import Auth, Github
 from github.Repository import Repository
 from typer import Typer
 
-from hexdoc.cli.utils.args import PropsOption, ReleaseOption
+from hexdoc.cli.utils.args import MaxWorkersOption, PropsOption, ReleaseOption
 from hexdoc.model import HexdocModel, HexdocSettings, HexdocTypeAdapter
 from hexdoc.utils import setup_logging
 
@@ -27,6 +27,7 @@ def build(
     *,
     props_file: PropsOption,
     release: ReleaseOption,
+    max_workers: MaxWorkersOption = 1,
 ):
     from . import app as hexdoc_app
 
@@ -43,6 +44,7 @@ def build(
         branch=env.branch,
         props_file=props_file,
         release=release,
+        max_workers=max_workers,
     )
 
     site_dist = site_path / "dist"
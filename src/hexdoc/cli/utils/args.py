@@ -45,6 +45,15 @@ ReleaseOption = Annotated[bool, Option(envvar="HEXDOC_RELEASE")]
 
 VerbosityOption = Annotated[int, Option("--verbose", "-v", count=True)]
 
+MaxWorkersOption = Annotated[
+    int,
+    Option(
+        envvar="HEXDOC_MAX_WORKERS",
+        min=1,
+        help="Number of threads to use for reading and decoding resource files.",
+    ),
+]
+
 PropsOption = Annotated[
     Path,
     Option(
@@ -1,4 +1,5 @@
 import logging
+from copy import copy
 from pathlib import Path
 from typing import Any, Literal, overload
 
@@ -18,9 +19,11 @@ from hexdoc.minecraft.assets import (
     TextureContext,
     TextureLookups,
 )
+from hexdoc.model import ValidationContextModel
 from hexdoc.patchouli import BookContext
 from hexdoc.patchouli.text import DEFAULT_MACROS, FormattingContext
 from hexdoc.plugin import BookPlugin, ModPlugin, ModPluginWithBook, PluginManager
+from hexdoc.utils import ContextSource, cast_context
 
 logger = logging.getLogger(__name__)
 
@@ -122,7 +125,14 @@ def init_context(
     loader: ModResourceLoader,
     i18n: I18n,
     all_metadata: dict[str, HexdocMetadata],
+    eager_format: bool = True,
 ):
+    """Returns a new validation context for loading a book.
+
+    If `eager_format` is False, styled text is only parsed when it's first accessed.
+    Leave it enabled when rendering the book, so formatting errors are raised while
+    loading it.
+    """
     props = loader.props
 
     context = dict[str, Any]()
@@ -139,6 +149,7 @@ def init_context(
         FormattingContext(
             book_id=book_id,
             macros=DEFAULT_MACROS | book_data.get("macros", {}) | props.macros,
+            eager=eager_format,
         ),
         BookContext(
             modid=props.modid,
@@ -156,3 +167,39 @@ def init_context(
         item.add_to_context(context)
 
     return context
+
+
+def copy_context(context: ContextSource, i18n: I18n) -> dict[str, Any]:
+    """Returns a copy of a context from `init_context` for another language.
+
+    Context models (eg. `BookContext`, `TextureContext`, `FormattingContext`) are
+    copied along with any dicts, lists, and sets in their fields, so changes made while
+    loading or rendering one language don't affect the others. Other values (eg. the
+    props, loader, and plugin manager) are shared.
+    """
+    context = dict(cast_context(context))
+
+    for key, value in context.items():
+        if isinstance(value, ValidationContextModel) and not isinstance(value, I18n):
+            context[key] = value.model_copy(
+                update={
+                    name: _copy_containers(getattr(value, name))
+                    for name in type(value).model_fields
+                },
+            )
+
+    i18n.add_to_context(context, overwrite=True)
+    return context
+
+
+def _copy_containers(value: Any) -> Any:
+    match value:
+        case dict():
+            new = copy(value)  # keep the type, eg. defaultdict
+            for k, v in value.items():
+                new[k] = _copy_containers(v)
+            return new
+        case list() | set():
+            return type(value)(_copy_containers(v) for v in value)
+        case _:
+            return value
@@ -1,4 +1,5 @@
 __all__ = [
+    "ArchiveResourceDir",
     "AssumeTag",
     "BaseProperties",
     "BaseResourceDir",
@@ -8,6 +9,7 @@ __all__ = [
     "IsVersion",
     "ItemStack",
     "METADATA_SUFFIX",
+    "MergeExport",
     "MinecraftVersion",
     "ModResourceLoader",
     "PathResourceDir",
@@ -16,6 +18,7 @@ __all__ = [
     "ResLoc",
     "ResourceDir",
     "ResourceLocation",
+    "ResourceLocationPatternSet",
     "ResourceType",
     "ValueIfVersion",
     "VersionSource",
@@ -35,6 +38,7 @@ from .loader import (
     METADATA_SUFFIX,
     BookFolder,
     ExportFn,
+    MergeExport,
     ModResourceLoader,
 )
 from .properties import BaseProperties, Properties
@@ -44,9 +48,11 @@ from .resource import (
     ItemStack,
     ResLoc,
     ResourceLocation,
+    ResourceLocationPatternSet,
     ResourceType,
 )
 from .resource_dir import (
+    ArchiveResourceDir,
     BaseResourceDir,
     PathResourceDir,
     PluginResourceDir,
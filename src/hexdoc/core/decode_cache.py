@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Self, TypeVar
+
+from hexdoc.utils import TRACE, decode_and_flatten_json_dict, decode_json_dict
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+SCHEMA_VERSION = 1
+"""Increment this if the format of the cache file or any cached value changes."""
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+_CACHEABLE_DECODERS: dict[Callable[[str], Any], str] = {
+    decode_json_dict: "json",
+    decode_and_flatten_json_dict: "flatten",
+}
+"""Decoders which always return plain JSON values, mapped to a stable name.
+
+Other decoders may return arbitrary objects, so their results are never persisted.
+"""
+
+
+class DecodedResourceCache:
+    """Persistent cache of decoded JSON files, keyed by the hash of their contents.
+
+    The whole cache is stored in a single [marshal](https://docs.python.org/3/library/marshal.html)
+    file, which is read once when loading and written once when saving. Entries are
+    kept in least- to most-recently-used order, and the oldest entries are evicted on
+    save if the total size exceeds `max_size` bytes.
+
+    `decode` may be called from multiple threads at once.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        entries: dict[bytes, bytes],
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = entries
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, max_size: int = DEFAULT_MAX_SIZE) -> Self:
+        entries = dict[bytes, bytes]()
+
+        try:
+            header, raw_entries = marshal.loads(path.read_bytes())
+            if header == _header():
+                entries = raw_entries
+            else:
+                logger.debug(f"Ignoring outdated decode cache: {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to read decode cache, ignoring it: {e}")
+
+        logger.debug(f"Loaded {len(entries)} entries from decode cache: {path}")
+        return cls(path, entries, max_size)
+
+    def decode(self, data: str, decode: Callable[[str], _T]) -> _T:
+        """Returns `decode(data)`, or the cached result if it's already been decoded."""
+        if (decoder_name := _CACHEABLE_DECODERS.get(decode)) is None:
+            return decode(data)
+
+        key = hashlib.sha256(f"{decoder_name}\0{data}".encode()).digest()
+
+        with self._lock:
+            if (blob := self._entries.pop(key, None)) is not None:
+                # move to the end to mark it as recently used
+                self._entries[key] = blob
+                self._dirty = True
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if blob is not None:
+            return marshal.loads(blob)
+
+        value = decode(data)
+        blob = marshal.dumps(value)
+
+        with self._lock:
+            self._entries[key] = blob
+            self._dirty = True
+
+        return value
+
+    def save(self):
+        logger.debug(
+            f"Decode cache: {self.hits} hits, {self.misses} misses ({self.path})"
+        )
+        if not self._dirty:
+            return
+
+        # evict least-recently-used entries until we're under the size limit
+        size = sum(len(blob) for blob in self._entries.values())
+        for key in list(self._entries):
+            if size <= self.max_size:
+                break
+            size -= len(self._entries.pop(key))
+
+        logger.log(TRACE, f"Writing {len(self._entries)} entries to {self.path}")
+
+        # write to a temporary file first so an interrupted build can't corrupt it
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_bytes(marshal.dumps((_header(), self._entries)))
+        os.replace(tmp_path, self.path)
+
+        self._dirty = False
+
+
+def _header():
+    # marshal's format may change between Python versions
+    return (SCHEMA_VERSION, sys.version_info[:2], marshal.version)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Self
+
+from pydantic import Field, ValidationError
+
+from hexdoc.model import HexdocModel
+from hexdoc.utils import TRACE, write_to_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class ExportedFile(HexdocModel, frozen=True):
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+class ExportManifestData(HexdocModel):
+    version: int
+    files: dict[str, ExportedFile] = Field(default_factory=dict)
+    """Paths relative to the export dir."""
+
+
+class ExportManifest:
+    """Tracks the files written to an export dir, so each build only needs to write
+    files which changed and delete files which are no longer exported.
+
+    Files are considered unchanged if the new contents have the same hash as the
+    previous build, and the size and mtime on disk match what we wrote last time.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        export_dir: Path,
+        previous: dict[str, ExportedFile],
+    ):
+        self.path = path
+        self.export_dir = export_dir
+        self.previous = previous
+        self.current = dict[str, ExportedFile]()
+        self.written = 0
+
+    @classmethod
+    def load(cls, path: Path, export_dir: Path) -> Self | None:
+        """Returns None if there's no usable manifest from a previous build."""
+        try:
+            data = ExportManifestData.model_validate_json(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except ValidationError as e:
+            logger.warning(f"Failed to read export manifest, ignoring it: {e}")
+            return None
+
+        if data.version != MANIFEST_VERSION:
+            logger.debug(f"Ignoring outdated export manifest: {path}")
+            return None
+
+        return cls(path, export_dir, data.files)
+
+    @classmethod
+    def empty(cls, path: Path, export_dir: Path) -> Self:
+        return cls(path, export_dir, {})
+
+    def is_tracked(self, out_path: Path) -> bool:
+        return out_path.is_relative_to(self.export_dir)
+
+    def write(self, out_path: Path, data: str | bytes) -> bool:
+        """Writes `data` to `out_path` if it changed since the last build.
+
+        Returns True if the file was written.
+        """
+        key = out_path.relative_to(self.export_dir).as_posix()
+        raw_data = data.encode("utf-8") if isinstance(data, str) else data
+        sha256 = hashlib.sha256(raw_data).hexdigest()
+
+        previous = self.previous.get(key)
+        if previous and previous.sha256 == sha256 and _matches_disk(out_path, previous):
+            logger.log(TRACE, f"Skipping unchanged export {out_path}")
+            self.current[key] = previous
+            return False
+
+        write_to_path(out_path, data)
+        stat = out_path.stat()
+
+        self.current[key] = ExportedFile(
+            sha256=sha256,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+        self.written += 1
+        return True
+
+    def save(self):
+        """Deletes files which were exported by the previous build but not this one,
+        then writes the manifest for this build."""
+        stale = self.previous.keys() - self.current.keys()
+        for key in sorted(stale):
+            stale_path = self.export_dir / key
+            logger.log(TRACE, f"Deleting stale export {stale_path}")
+            stale_path.unlink(missing_ok=True)
+            _remove_empty_parents(stale_path, self.export_dir)
+
+        logger.info(
+            f"Exported {len(self.current)} files: {self.written} written,"
+            f" {len(self.current) - self.written} unchanged, {len(stale)} deleted."
+        )
+
+        data = ExportManifestData(version=MANIFEST_VERSION, files=self.current)
+        write_to_path(self.path, data.model_dump_json())
+
+        self.previous = self.current
+        self.current = {}
+        self.written = 0
+
+
+def _matches_disk(path: Path, exported: ExportedFile):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    return stat.st_size == exported.size and stat.st_mtime_ns == exported.mtime_ns
+
+
+def _remove_empty_parents(path: Path, root: Path):
+    for parent in path.parents:
+        if parent == root or not parent.is_relative_to(root):
+            return
+        try:
+            parent.rmdir()
+        except OSError:  # not empty
+            return
@@ -2,13 +2,27 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 import subprocess
+import weakref
+from collections import deque
 from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import ExitStack
 from pathlib import Path
 from textwrap import dedent
-from typing import Any, Callable, Literal, Self, Sequence, TypeVar, overload
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Literal,
+    NamedTuple,
+    Self,
+    Sequence,
+    TypeVar,
+    overload,
+)
 
 from pydantic import SkipValidation
 from pydantic.dataclasses import dataclass
@@ -26,6 +40,8 @@ from hexdoc.utils import (
 )
 from hexdoc.utils.types import PydanticOrderedSet
 
+from .decode_cache import DecodedResourceCache
+from .export_manifest import ExportManifest
 from .properties import Properties
 from .resource import ResourceLocation, ResourceType
 from .resource_dir import PathResourceDir
@@ -34,21 +50,88 @@ logger = logging.getLogger(__name__)
 
 METADATA_SUFFIX = ".hexdoc.json"
 
+DECODE_CACHE_FILENAME = "decoded_resources.marshal"
+
+EXPORT_MANIFEST_SUFFIX = ".export-manifest.json"
+
 
 _T = TypeVar("_T")
 _T_Model = TypeVar("_T_Model", bound=HexdocModel)
 
 ExportFn = Callable[[_T, _T | None], str]
 
+
+class MergeExport(Generic[_T]):
+    """An `ExportFn` which merges decoded values, and only serializes the result once,
+    when it's written.
+
+    Exports to the same path which use this are merged without decoding the previous
+    export again.
+    """
+
+    def __init__(
+        self,
+        merge: Callable[[_T, _T | None], _T],
+        dump: Callable[[_T], str],
+    ):
+        self.merge = merge
+        self.dump = dump
+
+    def __call__(self, new: _T, current: _T | None) -> str:
+        return self.dump(self.merge(new, current))
+
+
+class _PendingValue(NamedTuple):
+    value: Any
+    dump: Callable[[Any], str]
+
+
+_PendingExport = str | bytes | _PendingValue
+
+ResourcePredicate = Callable[[PathResourceDir, ResourceLocation], bool]
+
 BookFolder = Literal["categories", "entries", "templates"]
 
 
-@dataclass(config=DEFAULT_CONFIG | {"arbitrary_types_allowed": True}, kw_only=True)
+# eq=False: loaders are compared by identity, so they can be used as (weak) dict keys
+@dataclass(
+    config=DEFAULT_CONFIG | {"arbitrary_types_allowed": True},
+    kw_only=True,
+    eq=False,
+)
 class ModResourceLoader(ValidationContext):
     props: Properties
     export_dir: Path | None
     resource_dirs: Sequence[PathResourceDir]
     _stack: SkipValidation[ExitStack]
+    decode_cache_size: int = 8192
+    """Maximum number of decoded files to keep in memory. Set to 0 to disable."""
+    persistent_cache: SkipValidation[DecodedResourceCache | None] = None
+    """If set, decoded JSON files are also cached on disk between builds."""
+    max_workers: int = 1
+    """Number of threads to use for reading and decoding files in `load_resources`.
+
+    If 1 (the default), files are loaded sequentially.
+    """
+    export_manifest: SkipValidation[ExportManifest | None] = None
+    """If set, only changed files are written to `export_dir`, and files exported by
+    the previous build but not this one are deleted when the loader is closed."""
+
+    def __post_init__(self):
+        self._executor: ThreadPoolExecutor | None = None
+        self._resource_dirs_by_root = {
+            resource_dir.path: resource_dir for resource_dir in self.resource_dirs
+        }
+        self._read_and_decode_cached = functools.lru_cache(self.decode_cache_size)(
+            self._read_and_decode
+        )
+
+        # output path -> data, written when the loader is closed
+        self._pending_exports: dict[Path, _PendingExport] = {}
+        # paths which were already written by flush_exports
+        self._flushed_exports = set[Path]()
+        self._stack.callback(self._finish_exports)
+        weakref.finalize(self, _warn_discarded_exports, self._pending_exports)
 
     @classmethod
     def clean_and_load_all(
@@ -57,30 +140,48 @@ class ModResourceLoader(ValidationContext):
         pm: PluginManager,
         *,
         export: bool = False,
+        cache: bool = False,
+        max_workers: int = 1,
     ):
-        # clear the export dir so we start with a clean slate
-        if props.export_dir and export:
-            subprocess.run(
-                ["git", "clean", "-fdX", props.export_dir],
-                cwd=props.props_dir,
-            )
+        """Like `load_all`, but also removes stale files from the export dir.
 
-            write_to_path(
-                props.export_dir / "__init__.py",
-                dedent(
-                    """\
-                    # This directory is auto-generated by hexdoc.
-                    # Do not edit or commit these files.
-                    """
-                ),
-            )
+        Unchanged files from the previous build are left alone. If there's no manifest
+        from a previous build, the export dir is cleared with `git clean` instead.
+        """
+        export_manifest = None
+        if props.export_dir and export:
+            manifest_path = props.cache_dir / (props.modid + EXPORT_MANIFEST_SUFFIX)
+            export_manifest = ExportManifest.load(manifest_path, props.export_dir)
+
+            if export_manifest is None:
+                # we don't know what we exported last time, so start with a clean slate
+                subprocess.run(
+                    ["git", "clean", "-fdX", props.export_dir],
+                    cwd=props.props_dir,
+                )
+                export_manifest = ExportManifest.empty(manifest_path, props.export_dir)
 
-        return cls.load_all(
+        loader = cls.load_all(
             props,
             pm,
             export=export,
+            cache=cache,
+            max_workers=max_workers,
+            export_manifest=export_manifest,
+        )
+
+        loader.export(
+            Path("__init__.py"),
+            dedent(
+                """\
+                # This directory is auto-generated by hexdoc.
+                # Do not edit or commit these files.
+                """
+            ),
         )
 
+        return loader
+
     @classmethod
     def load_all(
         cls,
@@ -88,30 +189,67 @@ class ModResourceLoader(ValidationContext):
         pm: PluginManager,
         *,
         export: bool = False,
+        cache: bool = False,
+        max_workers: int = 1,
+        export_manifest: ExportManifest | None = None,
     ) -> Self:
+        """If `cache` is True, decoded JSON files are cached in `props.cache_dir` and
+        reused in later builds if the file contents haven't changed.
+
+        If `max_workers` is greater than 1, `load_resources` reads and decodes files in
+        a thread pool of that size.
+
+        Exported files are only written when the loader is closed (eg. by using it as a
+        context manager), or when `flush_exports` is called.
+        """
         export_dir = props.export_dir if export else None
         stack = ExitStack()
 
+        persistent_cache = None
+        if cache:
+            persistent_cache = DecodedResourceCache.load(
+                props.cache_dir / DECODE_CACHE_FILENAME
+            )
+            stack.callback(persistent_cache.save)
+
+        resource_dirs = [
+            path_resource_dir
+            for resource_dir in props.resource_dirs
+            for path_resource_dir in stack.enter_context(resource_dir.load(pm))
+        ]
+
+        # walk each resource dir once up front, instead of statting on every lookup
+        for resource_dir in resource_dirs:
+            resource_dir.build_index()
+
         return cls(
             props=props,
             export_dir=export_dir,
-            resource_dirs=[
-                path_resource_dir
-                for resource_dir in props.resource_dirs
-                for path_resource_dir in stack.enter_context(resource_dir.load(pm))
-            ],
+            resource_dirs=resource_dirs,
             _stack=stack,
+            persistent_cache=persistent_cache,
+            max_workers=max_workers,
+            export_manifest=export_manifest,
         )
 
     def __enter__(self):
         return self
 
     def __exit__(self, *exc_details: Any):
+        self._log_cache_info()
         return self._stack.__exit__(*exc_details)
 
     def close(self):
+        self._log_cache_info()
         self._stack.close()
 
+    def decode_cache_info(self):
+        """Returns hits, misses, and size for the cache of decoded files."""
+        return self._read_and_decode_cached.cache_info()
+
+    def _log_cache_info(self):
+        logger.debug(f"Decode cache: {self.decode_cache_info()}")
+
     def _map_own_assets(self, folder: str, *, root: str | Path):
         return {
             id: path.resolve().relative_to(root)
@@ -279,8 +417,7 @@ class ModResourceLoader(ValidationContext):
 
         # check by descending priority, return the first that exists
         for resource_dir in self.resource_dirs:
-            path = resource_dir.path / path_stub
-            if path.is_file():
+            if path := resource_dir.find_file(path_stub):
                 return resource_dir, path
 
         raise FileNotFoundError(f"Path {path_stub} not found in any resource dir")
@@ -295,6 +432,7 @@ class ModResourceLoader(ValidationContext):
         glob: str | list[str] = "**/*",
         allow_missing: bool = False,
         internal_only: bool = False,
+        include: ResourcePredicate | None = None,
         decode: Callable[[str], _T] = decode_json_dict,
         export: ExportFn[_T] | Literal[False] | None = None,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, _T]]:
@@ -309,6 +447,7 @@ class ModResourceLoader(ValidationContext):
         id: ResourceLocation,
         allow_missing: bool = False,
         internal_only: bool = False,
+        include: ResourcePredicate | None = None,
         decode: Callable[[str], _T] = decode_json_dict,
         export: ExportFn[_T] | Literal[False] | None = None,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, _T]]:
@@ -322,15 +461,61 @@ class ModResourceLoader(ValidationContext):
         export: ExportFn[_T] | Literal[False] | None = None,
         **kwargs: Any,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, _T]]:
-        """Like `find_resources`, but also loads the file contents and reexports it."""
-        for resource_dir, value_id, path in self.find_resources(type, **kwargs):
-            value = self._load_path(
-                resource_dir,
-                path,
-                decode=decode,
-                export=export,
+        """Like `find_resources`, but also loads the file contents and reexports it.
+
+        If `max_workers` is greater than 1, files are read and decoded in a thread pool.
+        Results are still yielded (and exported) in the same order as `find_resources`.
+        """
+        if self.max_workers <= 1:
+            for resource_dir, value_id, path in self.find_resources(type, **kwargs):
+                value = self._load_path(
+                    resource_dir,
+                    path,
+                    decode=decode,
+                    export=export,
+                )
+                yield resource_dir, value_id, value
+            return
+
+        # limit the number of pending results, since our caller might stop early
+        executor = self._get_executor()
+        pending = deque[tuple[PathResourceDir, ResourceLocation, Path, Future[Any]]]()
+        try:
+            for resource_dir, value_id, path in self.find_resources(type, **kwargs):
+                future = executor.submit(self._decode_path, resource_dir, path, decode)
+                pending.append((resource_dir, value_id, path, future))
+                if len(pending) >= 2 * self.max_workers:
+                    yield self._finish_load(*pending.popleft(), decode, export)
+
+            while pending:
+                yield self._finish_load(*pending.popleft(), decode, export)
+        finally:
+            for *_, future in pending:
+                future.cancel()
+
+    def _finish_load(
+        self,
+        resource_dir: PathResourceDir,
+        value_id: ResourceLocation,
+        path: Path,
+        future: Future[tuple[str, _T]],
+        decode: Callable[[str], _T],
+        export: ExportFn[_T] | Literal[False] | None,
+    ) -> tuple[PathResourceDir, ResourceLocation, _T]:
+        data, value = future.result()
+        self._export_loaded(
+            resource_dir, path, data, value, decode=decode, export=export
+        )
+        return resource_dir, value_id, value
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers,
+                thread_name_prefix="hexdoc-loader",
             )
-            yield resource_dir, value_id, value
+            self._stack.callback(self._executor.shutdown, cancel_futures=True)
+        return self._executor
 
     @overload
     def find_resources(
@@ -342,6 +527,7 @@ class ModResourceLoader(ValidationContext):
         glob: str | list[str] = "**/*",
         allow_missing: bool = False,
         internal_only: bool = False,
+        include: ResourcePredicate | None = None,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, Path]]:
         ...
 
@@ -354,6 +540,7 @@ class ModResourceLoader(ValidationContext):
         id: ResourceLocation,
         allow_missing: bool = False,
         internal_only: bool = False,
+        include: ResourcePredicate | None = None,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, Path]]:
         ...
 
@@ -367,6 +554,7 @@ class ModResourceLoader(ValidationContext):
         glob: str | list[str] = "**/*",
         allow_missing: bool = False,
         internal_only: bool = False,
+        include: ResourcePredicate | None = None,
     ) -> Iterator[tuple[PathResourceDir, ResourceLocation, Path]]:
         """Search for a glob under a given resource location in all of `resource_dirs`.
 
@@ -375,6 +563,8 @@ class ModResourceLoader(ValidationContext):
 
         If no file extension is provided for glob, `.json` is assumed.
 
+        If `include` is provided, files for which it returns False are skipped.
+
         Raises FileNotFoundError if no files were found in any resource dir.
 
         For example:
@@ -415,10 +605,10 @@ class ModResourceLoader(ValidationContext):
                 continue
 
             # eg. .../resources/assets/*/lang/subdir
-            for base_path in resource_dir.path.glob(base_path_stub.as_posix()):
+            for base_path in resource_dir.glob_dirs(base_path_stub.as_posix()):
                 for glob_ in globs:
                     # eg. .../resources/assets/hexcasting/lang/subdir/*.flatten.json5
-                    for path in base_path.glob(glob_):
+                    for path in resource_dir.glob_files(base_path, glob_):
                         # only strip json/json5, not eg. png
                         id_path = path.relative_to(base_path)
                         if "json" in path.name:
@@ -430,9 +620,11 @@ class ModResourceLoader(ValidationContext):
                             path=id_path.as_posix(),
                         )
 
-                        if path.is_file():
-                            found_any = True
-                            yield resource_dir, id, path
+                        if include and not include(resource_dir, id):
+                            continue
+
+                        found_any = True
+                        yield resource_dir, id, path
 
         # if we never yielded any files, raise an error
         if not allow_missing and not found_any:
@@ -448,14 +640,43 @@ class ModResourceLoader(ValidationContext):
         decode: Callable[[str], _T] = decode_json_dict,
         export: ExportFn[_T] | Literal[False] | None = None,
     ) -> _T:
-        if not path.is_file():
-            raise FileNotFoundError(path)
+        data, value = self._decode_path(resource_dir, path, decode)
+        self._export_loaded(
+            resource_dir, path, data, value, decode=decode, export=export
+        )
+        return value
+
+    def _decode_path(
+        self,
+        resource_dir: PathResourceDir,
+        path: Path,
+        decode: Callable[[str], _T],
+    ) -> tuple[str, _T]:
+        """Reads and decodes a file. Safe to call from multiple threads."""
+        stamp = resource_dir.stamp(path)
 
         logger.debug(f"Loading {path}")
 
-        data = path.read_text("utf-8")
-        value = decode(data)
+        # the stamp is part of the key, so edits invalidate the cache
+        # resource dirs aren't hashable, so we pass the root path instead
+        data, value = self._read_and_decode_cached(
+            resource_dir.path,
+            path,
+            decode,
+            stamp,
+        )
+        return data, _copy_decoded(value)
 
+    def _export_loaded(
+        self,
+        resource_dir: PathResourceDir,
+        path: Path,
+        data: str,
+        value: _T,
+        *,
+        decode: Callable[[str], _T] = decode_json_dict,
+        export: ExportFn[_T] | Literal[False] | None,
+    ):
         if resource_dir.reexport and export is not False:
             self.export(
                 path.relative_to(resource_dir.path),
@@ -465,7 +686,17 @@ class ModResourceLoader(ValidationContext):
                 export=export,
             )
 
-        return value
+    def _read_and_decode(
+        self,
+        root: Path,
+        path: Path,
+        decode: Callable[[str], _T],
+        stamp: tuple[int, ...],
+    ) -> tuple[str, _T]:
+        data = self._resource_dirs_by_root[root].read_text(path)
+        if self.persistent_cache:
+            return data, self.persistent_cache.decode(data, decode)
+        return data, decode(data)
 
     @overload
     def export(self, /, path: Path, data: str, *, cache: bool = False) -> None:
@@ -495,33 +726,131 @@ class ModResourceLoader(ValidationContext):
         export: ExportFn[_T] | None = None,
         cache: bool = False,
     ) -> None:
+        """Queues a file to be written to `export_dir` when the loader is closed.
+
+        If `export` is provided, it's called with the new value and the previous value
+        exported to the same path by this loader (if any) to merge them. If it's a
+        `MergeExport`, the merged value is kept until the file is written, so it doesn't
+        need to be decoded again for the next merge.
+        """
         if not self.export_dir:
             return
         out_path = self.export_dir / path
 
         logger.log(TRACE, f"Exporting {path} to {out_path}")
+        out_data: _PendingExport
         if export is None:
             out_data = data
         else:
             try:
-                old_value = decode(out_path.read_text("utf-8"))
+                old_value = self._read_export(out_path, decode)
             except FileNotFoundError:
                 old_value = None
 
-            out_data = export(value, old_value)
+            if isinstance(export, MergeExport):
+                out_data = _PendingValue(export.merge(value, old_value), export.dump)
+            else:
+                out_data = export(value, old_value)
 
-        write_to_path(out_path, out_data)
+        self._pending_exports[out_path] = out_data
 
         if cache:
-            write_to_path(self.props.cache_dir / path, out_data)
+            self._pending_exports[self.props.cache_dir / path] = out_data
+
+    def flush_exports(self):
+        """Writes all queued exports to disk, skipping files which haven't changed.
+
+        This is called automatically when the loader is closed.
+        """
+        written = 0
+        for out_path, data in self._pending_exports.items():
+            if isinstance(data, _PendingValue):
+                data = data.dump(data.value)
+            if self._write_export(out_path, data):
+                written += 1
+            self._flushed_exports.add(out_path)
+
+        if self._pending_exports:
+            logger.debug(
+                f"Wrote {written} of {len(self._pending_exports)} exported files."
+            )
+        self._pending_exports.clear()
+
+    def _finish_exports(self):
+        self.flush_exports()
+        if self.export_manifest:
+            self.export_manifest.save()
 
-    def export_raw(self, path: Path, data: bytes):
+    def _write_export(self, out_path: Path, data: str | bytes) -> bool:
+        if self.export_manifest and self.export_manifest.is_tracked(out_path):
+            return self.export_manifest.write(out_path, data)
+
+        if _is_unchanged(out_path, data):
+            logger.log(TRACE, f"Skipping unchanged export {out_path}")
+            return False
+
+        write_to_path(out_path, data)
+        return True
+
+    def _read_export(self, out_path: Path, decode: Callable[[str], _T]) -> _T:
+        # only merge with files exported by this build, since the file on disk may be
+        # left over from a previous build and contain values which were removed since
+        match self._pending_exports.get(out_path):
+            case _PendingValue(value=value):
+                return value
+            case str(data):
+                return decode(data)
+            case bytes(data):
+                return decode(data.decode("utf-8"))
+            case None if out_path in self._flushed_exports:
+                return decode(out_path.read_text("utf-8"))
+            case None:
+                raise FileNotFoundError(f"No pending export for {out_path}")
+
+    def export_raw(self, path: Path, data: bytes, *, cache: bool = False):
+        """Queues a binary file to be written to `export_dir` when the loader is
+        closed."""
         if not self.export_dir:
             return
         out_path = self.export_dir / path
 
         logger.log(TRACE, f"Exporting {path} to {out_path}")
-        write_to_path(out_path, data)
+        self._pending_exports[out_path] = data
+
+        if cache:
+            self._pending_exports[self.props.cache_dir / path] = data
 
     def __repr__(self):
         return f"{self.__class__.__name__}(...)"
+
+
+def _warn_discarded_exports(pending_exports: dict[Path, _PendingExport]):
+    if pending_exports:
+        logger.warning(
+            f"Discarding {len(pending_exports)} exported files because the loader was"
+            + " never closed. Use the loader as a context manager or call"
+            + " flush_exports() to write them."
+        )
+
+
+def _is_unchanged(path: Path, data: str | bytes) -> bool:
+    try:
+        match data:
+            case str():
+                return path.read_text("utf-8") == data
+            case bytes():
+                return path.read_bytes() == data
+    except (FileNotFoundError, UnicodeDecodeError):
+        return False
+
+
+def _copy_decoded(value: _T) -> _T:
+    """Copies JSON containers so cached values can't be modified by callers.
+
+    Other decoded objects (eg. models) are returned as-is, and must not be mutated.
+    """
+    if isinstance(value, dict):
+        return {k: _copy_decoded(v) for k, v in value.items()}  # type: ignore
+    if isinstance(value, list):
+        return [_copy_decoded(v) for v in value]  # type: ignore
+    return value
@@ -4,11 +4,14 @@
 
 from __future__ import annotations
 
+import dataclasses
 import logging
 import re
-from fnmatch import fnmatch
+from fnmatch import fnmatch, translate
+from functools import cache
 from pathlib import Path
-from typing import Annotated, Any, ClassVar, Literal, Self, TypeVar
+from typing import Annotated, Any, ClassVar, Iterable, Literal, Self, TypeVar
+from weakref import WeakValueDictionary
 
 from pydantic import (
     BeforeValidator,
@@ -22,7 +25,6 @@ from pydantic.functional_validators import ModelWrapValidatorHandler
 from typing_extensions import override
 
 from hexdoc.model import DEFAULT_CONFIG
-from hexdoc.utils import TRACE
 
 logger = logging.getLogger(__name__)
 
@@ -58,13 +60,27 @@ class BaseResourceLocation:
     path: str
 
     _from_str_regex: ClassVar[re.Pattern[str]]
+    _interned: ClassVar[WeakValueDictionary[str, Any]]
 
     def __init_subclass__(cls, regex: re.Pattern[str] | None) -> None:
         if regex:
             cls._from_str_regex = regex
+        cls._interned = WeakValueDictionary()
 
     @classmethod
     def from_str(cls, raw: str) -> Self:
+        """Parses a string like `namespace:path`.
+
+        Instances are interned, so parsing the same string twice returns the same
+        object (as long as the first one is still alive).
+        """
+        if (id := cls._interned.get(raw)) is None:
+            id = cls._parse_str(raw)
+            cls._interned[raw] = id
+        return id
+
+    @classmethod
+    def _parse_str(cls, raw: str) -> Self:
         match = cls._from_str_regex.fullmatch(raw)
         if match is None:
             raise ValueError(f"Invalid {cls.__name__} string: {raw}")
@@ -72,15 +88,31 @@ class BaseResourceLocation:
         return cls(**match.groupdict())
 
     @classmethod
-    def model_validate(cls, value: Any, *, context: Any = None):
-        ta = TypeAdapter(cls)
-        return ta.validate_python(value, context=context)
+    def model_validate(cls, value: Any, *, context: Any = None) -> Self:
+        return _type_adapter(cls).validate_python(value, context=context)
+
+    @classmethod
+    def _construct(cls, namespace: str, path: str) -> Self:
+        """Creates an instance without running the Pydantic validators.
+
+        Only use this for ids built from an existing instance, where we know the
+        namespace is already valid. Other fields are set to their default values.
+        """
+        if (defaults := _field_defaults(cls)) is None:
+            return cls(namespace, path)  # pyright: ignore[reportCallIssue]
+
+        id = object.__new__(cls)
+        id.__dict__.update(
+            defaults,
+            namespace=namespace,
+            path=path.lower().rstrip("/"),
+        )
+        return id
 
     @model_validator(mode="wrap")
     @classmethod
     def _pre_root(cls, values: Any, handler: ModelWrapValidatorHandler[Self]):
         # before validating the fields, if it's a string instead of a dict, convert it
-        logger.log(TRACE, f"Convert {values} to {cls.__name__}")
         if isinstance(values, str):
             return cls.from_str(values)
         return handler(values)
@@ -122,8 +154,8 @@ class ResourceLocation(BaseResourceLocation, regex=_make_regex()):
     is_tag: bool = False
 
     @classmethod
-    def from_str(cls, raw: str) -> Self:
-        id = super().from_str(raw.removeprefix("#"))
+    def _parse_str(cls, raw: str) -> Self:
+        id = super()._parse_str(raw.removeprefix("#"))
         if raw.startswith("#"):
             object.__setattr__(id, "is_tag", True)
         return id
@@ -157,7 +189,7 @@ class ResourceLocation(BaseResourceLocation, regex=_make_regex()):
         """Returns a copy of this ResourceLocation with the given path."""
         if isinstance(path, Path):
             path = path.as_posix()
-        return self.__class__(self.namespace, path)
+        return self._construct(self.namespace, path)
 
     def match(self, pattern: Self) -> bool:
         return fnmatch(str(self), str(pattern))
@@ -207,6 +239,65 @@ class ResourceLocation(BaseResourceLocation, regex=_make_regex()):
 ResLoc = ResourceLocation
 
 
+@cache
+def _type_adapter(cls: type[_T]) -> TypeAdapter[_T]:
+    return TypeAdapter(cls)
+
+
+@cache
+def _field_defaults(cls: type[BaseResourceLocation]) -> dict[str, Any] | None:
+    """Returns the default values of every field except `namespace` and `path`, or
+    None if any of those fields are required."""
+    defaults = dict[str, Any]()
+    for field in dataclasses.fields(cls):
+        if field.name in {"namespace", "path"}:
+            continue
+        if field.default is dataclasses.MISSING:
+            return None
+        defaults[field.name] = field.default
+    return defaults
+
+
+_MAGIC_CHARS = re.compile(r"[*?[]")
+
+
+class ResourceLocationPatternSet:
+    """A set of glob patterns (eg. `hexcasting:*`), compiled into a single matcher.
+
+    `id in patterns` is equivalent to `any(id.match(p) for p in patterns)`, but exact
+    ids are checked with a hash lookup, and all wildcard patterns are combined into
+    one regex. Results are memoized, since the same ids tend to be checked repeatedly.
+    """
+
+    def __init__(self, patterns: Iterable[ResourceLocation] = ()):
+        self.patterns = frozenset(patterns)
+
+        self._exact = set[str]()
+        wildcards = list[str]()
+        for pattern in self.patterns:
+            raw = str(pattern)
+            if _MAGIC_CHARS.search(raw):
+                wildcards.append(translate(raw))
+            else:
+                self._exact.add(raw)
+
+        self._regex = re.compile("|".join(sorted(wildcards))) if wildcards else None
+        self._cache = dict[str, bool]()
+
+    def __contains__(self, id: ResourceLocation) -> bool:
+        raw = str(id)
+        if (result := self._cache.get(raw)) is None:
+            result = raw in self._exact or bool(self._regex and self._regex.match(raw))
+            self._cache[raw] = result
+        return result
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({set(self.patterns)})"
+
+
 @dataclass(config=DEFAULT_CONFIG, frozen=True, repr=False)
 class ItemStack(BaseResourceLocation, regex=_make_regex(count=True, nbt=True)):
     """Represents an item with optional count and NBT.
@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-import shutil
+import stat
+import zipfile
 from abc import ABC, abstractmethod
 from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Any, ContextManager, Iterable, Literal, Self
+from typing import Any, ClassVar, ContextManager, Iterable, Iterator, Literal, Self
 
 import importlib_resources as resources
+from importlib_resources.abc import Traversable
 from pydantic import model_validator
 from typing_extensions import override
 
@@ -17,6 +18,8 @@ from hexdoc.model import HexdocModel
 from hexdoc.plugin import PluginManager
 from hexdoc.utils import JSONDict, RelativePath, relative_path_root
 
+from .resource_index import ResourceIndex
+
 
 class BaseResourceDir(HexdocModel, ABC):
     external: bool
@@ -95,8 +98,19 @@ class PathResourceDir(BasePathResourceDir):
     # input is relative to the props file
     path: RelativePath
 
-    # not a props field
+    index: bool = True
+    """If true, list the contents of this directory once when the loader is created,
+    then answer all lookups from memory.
+
+    Set this to false for directories which may be modified during a build.
+    """
+
+    # not props fields
     _modid: str | None = None
+    _index: ResourceIndex | None = None
+
+    _always_index: ClassVar[bool] = False
+    """If true, this class needs an index to work, so `index` is ignored."""
 
     @property
     def modid(self):
@@ -111,6 +125,56 @@ class PathResourceDir(BasePathResourceDir):
         self._modid = modid
         return self
 
+    def build_index(self):
+        """Walks this directory and caches its contents, if indexing is enabled."""
+        if self.index:
+            self._index = ResourceIndex.build(self.path)
+
+    def find_file(self, path_stub: Path) -> Path | None:
+        """Returns `self.path / path_stub` if it's a file, otherwise None."""
+        if index := self._get_index():
+            if not index.is_file(path_stub):
+                return None
+            return self.path / path_stub
+
+        path = self.path / path_stub
+        return path if path.is_file() else None
+
+    def read_bytes(self, path: Path) -> bytes:
+        """Reads a file returned by `find_file` or `glob_files`."""
+        return path.read_bytes()
+
+    def read_text(self, path: Path) -> str:
+        return self.read_bytes(path).decode("utf-8")
+
+    def stamp(self, path: Path) -> tuple[int, ...]:
+        """Returns a value which changes whenever the file at `path` is modified.
+
+        Raises FileNotFoundError if `path` is not a file.
+        """
+        file_stat = path.stat()
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(path)
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def glob_dirs(self, pattern: str) -> Iterator[Path]:
+        """Yields all directories in this resource dir matching a glob pattern."""
+        if index := self._get_index():
+            return index.glob_dirs(pattern)
+        return (path for path in self.path.glob(pattern) if path.is_dir())
+
+    def glob_files(self, base_path: Path, pattern: str) -> Iterator[Path]:
+        """Yields all files matching a glob pattern relative to `base_path`, which
+        must be a directory returned by `glob_dirs`."""
+        if index := self._get_index():
+            return index.glob_files(base_path.relative_to(self.path), pattern)
+        return (path for path in base_path.glob(pattern) if path.is_file())
+
+    def _get_index(self) -> ResourceIndex | None:
+        if self._index is None and (self.index or self._always_index):
+            self.build_index()
+        return self._index
+
     @contextmanager
     def load(self, pm: PluginManager):
         yield [self]
@@ -123,6 +187,97 @@ class PathResourceDir(BasePathResourceDir):
         return value
 
 
+class ArchiveResourceDir(BasePathResourceDir):
+    """For mod jars and other zip files, eg. `.minecraft/mods/hexcasting.jar`.
+
+    Files are read directly from the archive without extracting it. The archive's
+    central directory is only read once, when the loader is created.
+    """
+
+    # input is relative to the props file
+    archive: RelativePath
+
+    modid: str | None = None
+    """If set, metadata for this mod is loaded from the archive."""
+
+    # a jar is probably from some other mod
+    external: bool = True
+    reexport: bool = False
+
+    @property
+    @override
+    def _paths(self):
+        return [self.archive]
+
+    @contextmanager
+    def load(self, pm: PluginManager):
+        with ExitStack() as stack, relative_path_root(Path()):
+            if not self.required and not self.archive.is_file():
+                yield []
+                return
+
+            archive = stack.enter_context(zipfile.ZipFile(self.archive))
+            resource_dir = ArchivePathResourceDir(
+                path=self.archive,
+                external=self.external,
+                reexport=self.reexport,
+            ).set_archive(archive)
+
+            if self.modid is not None:
+                resource_dir.set_modid(self.modid)
+
+            yield [resource_dir]
+
+
+class ArchivePathResourceDir(PathResourceDir):
+    """A `PathResourceDir` backed by an open zip file instead of a directory.
+
+    Paths returned by this class look like `path/to/mod.jar/assets/...`. They can be
+    used with `relative_to` and `read_bytes`, but don't exist on the filesystem.
+    """
+
+    _always_index: ClassVar[bool] = True
+
+    # not props fields
+    _archive: zipfile.ZipFile | None = None
+    _archive_mtime_ns: int = 0
+
+    def set_archive(self, archive: zipfile.ZipFile) -> Self:
+        self._archive = archive
+        self._archive_mtime_ns = self.path.stat().st_mtime_ns
+        return self
+
+    @property
+    def archive(self) -> zipfile.ZipFile:
+        if self._archive is None:
+            raise RuntimeError(f"Archive is not open: {self.path}")
+        return self._archive
+
+    @override
+    def build_index(self):
+        # archives can't be walked, so we always index them
+        self._index = ResourceIndex.from_names(self.path, self.archive.namelist())
+
+    @override
+    def read_bytes(self, path: Path) -> bytes:
+        return self.archive.read(self._get_info(path))
+
+    @override
+    def stamp(self, path: Path) -> tuple[int, ...]:
+        info = self._get_info(path)
+        return (self._archive_mtime_ns, info.CRC, info.file_size)
+
+    def _get_info(self, path: Path) -> zipfile.ZipInfo:
+        name = path.relative_to(self.path).as_posix()
+        try:
+            info = self.archive.getinfo(name)
+        except KeyError:
+            raise FileNotFoundError(path)
+        if info.is_dir():
+            raise FileNotFoundError(path)
+        return info
+
+
 class PatchouliBooksResourceDir(BasePathResourceDir):
     """For modpack books, eg. `.minecraft/patchouli_books`.
 
@@ -145,27 +300,60 @@ class PatchouliBooksResourceDir(BasePathResourceDir):
 
     @contextmanager
     def load(self, pm: PluginManager):
-        with relative_path_root(Path()), TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-
-            # TODO: hack
-            # at this point, we don't know if it's a resource pack book or not
-            # we would need to load book.json to figure that out
-            # so just put it in both possible locations to cover all the bases
-            for folder in ["assets", "data"]:
-                dst = tmpdir / folder / self.modid / "patchouli_books"
-                dst.parent.mkdir(parents=True)
-                shutil.copytree(self.patchouli_books, dst)
-
+        with relative_path_root(Path()):
             yield [
-                PathResourceDir(
-                    path=tmpdir,
+                PatchouliBooksPathResourceDir(
+                    path=self.patchouli_books,
                     external=self.external,
                     reexport=self.reexport,
                 ).set_modid(self.modid)
             ]
 
 
+class PatchouliBooksPathResourceDir(PathResourceDir):
+    """Makes a `patchouli_books` directory look like a resources directory.
+
+    At this point, we don't know if it's a resource pack book or not (we would need to
+    load book.json to figure that out), so both `assets/patchouli/patchouli_books` and
+    `data/patchouli/patchouli_books` are mapped to `path`, without copying anything.
+
+    Paths returned by this class look like `path/assets/patchouli/patchouli_books/...`.
+    They can be used with `relative_to` and `read_bytes`, but don't exist on the
+    filesystem.
+    """
+
+    _always_index: ClassVar[bool] = True
+
+    _MOUNT_POINTS: ClassVar = [
+        Path(folder) / "patchouli" / "patchouli_books" for folder in ["assets", "data"]
+    ]
+
+    @override
+    def build_index(self):
+        books_index = ResourceIndex.build(self.path)
+        self._index = books_index.with_prefixes(*self._MOUNT_POINTS)
+
+    @override
+    def read_bytes(self, path: Path) -> bytes:
+        return self._real_path(path).read_bytes()
+
+    @override
+    def stamp(self, path: Path) -> tuple[int, ...]:
+        return super().stamp(self._real_path(path))
+
+    def _real_path(self, path: Path) -> Path:
+        relative_path = path.relative_to(self.path)
+        for mount_point in self._MOUNT_POINTS:
+            if relative_path.is_relative_to(mount_point):
+                return self.path / relative_path.relative_to(mount_point)
+        raise FileNotFoundError(path)
+
+
+_PLUGIN_ROOT = Path("/__hexdoc_plugin_resources__")
+"""Root of the virtual paths used for plugin resources which aren't on the
+filesystem."""
+
+
 class PluginResourceDir(BaseResourceDir):
     modid: str
 
@@ -175,19 +363,84 @@ class PluginResourceDir(BaseResourceDir):
 
     @contextmanager
     def load(self, pm: PluginManager):
-        with ExitStack() as stack, relative_path_root(Path()):
-            yield list(self._load_all(pm, stack))  # NOT "yield from"
+        with relative_path_root(Path()):
+            yield list(self._load_all(pm))  # NOT "yield from"
 
-    def _load_all(self, pm: PluginManager, stack: ExitStack):
+    def _load_all(self, pm: PluginManager):
         for module in pm.load_resources(self.modid):
             traversable = resources.files(module)
-            path = stack.enter_context(resources.as_file(traversable))
 
-            yield PathResourceDir(
-                path=path,
-                external=self.external,
-                reexport=self.reexport,
-            ).set_modid(self.modid)  # setting _modid directly causes a validation error
+            # setting _modid directly causes a validation error
+            if isinstance(traversable, Path):
+                yield PathResourceDir(
+                    path=traversable,
+                    external=self.external,
+                    reexport=self.reexport,
+                ).set_modid(self.modid)
+            else:
+                # eg. zipped or namespace packages, which we read from directly instead
+                # of extracting
+                # str(traversable) isn't necessarily a path (eg. MultiplexedPath), so
+                # use a synthetic root which is unique to this package
+                yield (
+                    TraversableResourceDir(
+                        path=_PLUGIN_ROOT / self.modid / module.__name__,
+                        external=self.external,
+                        reexport=self.reexport,
+                        required=False,
+                    )
+                    .set_traversable(traversable)
+                    .set_modid(self.modid)
+                )
+
+
+class TraversableResourceDir(PathResourceDir):
+    """A `PathResourceDir` backed by an `importlib.resources` Traversable, eg. a
+    package installed as a zip file.
+
+    The Traversable is walked once to build the index, and files are only read when
+    they're loaded. Paths returned by this class don't necessarily exist on the
+    filesystem, but can be used with `relative_to` and `read_bytes`.
+    """
 
+    _always_index: ClassVar[bool] = True
 
-ResourceDir = PathResourceDir | PatchouliBooksResourceDir | PluginResourceDir
+    # not props fields
+    _traversable: Traversable | None = None
+
+    def set_traversable(self, traversable: Traversable) -> Self:
+        self._traversable = traversable
+        return self
+
+    @property
+    def traversable(self) -> Traversable:
+        if self._traversable is None:
+            raise RuntimeError(f"Traversable is not set: {self.path}")
+        return self._traversable
+
+    @override
+    def build_index(self):
+        self._index = ResourceIndex.from_traversable(self.path, self.traversable)
+
+    @override
+    def read_bytes(self, path: Path) -> bytes:
+        return self._get_file(path).read_bytes()
+
+    @override
+    def stamp(self, path: Path) -> tuple[int, ...]:
+        # installed packages can't change during a build
+        self._get_file(path)
+        return ()
+
+    def _get_file(self, path: Path) -> Traversable:
+        node = self.traversable
+        for part in path.relative_to(self.path).parts:
+            node = node / part
+        if not node.is_file():
+            raise FileNotFoundError(path)
+        return node
+
+
+ResourceDir = (
+    PathResourceDir | PatchouliBooksResourceDir | PluginResourceDir | ArchiveResourceDir
+)
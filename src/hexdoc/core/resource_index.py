@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from fnmatch import translate
+from functools import cache
+from pathlib import Path, PurePosixPath
+from typing import Iterable, Iterator, Self
+
+from importlib_resources.abc import Traversable
+
+from hexdoc.utils import TRACE
+
+logger = logging.getLogger(__name__)
+
+_MAGIC_CHARS = re.compile(r"[*?[]")
+
+IndexNode = dict[str, "IndexNode | None"]
+"""A directory in the index. Maps child names to subdirectories, or to `None` for
+files."""
+
+
+class ResourceIndex:
+    """In-memory trie of every file and directory under a root path.
+
+    This is built once by walking the filesystem, then used to answer existence checks
+    and glob queries without making any more syscalls. Children are stored in sorted
+    order, so glob results are deterministic.
+    """
+
+    def __init__(self, root: Path, tree: IndexNode):
+        self.root = root
+        self._tree = tree
+
+    @classmethod
+    def build(cls, root: Path) -> Self:
+        tree: IndexNode = {}
+        nodes: dict[str, IndexNode] = {str(root): tree}
+        visited = set[str]()
+        file_count = 0
+
+        for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+            # avoid infinite loops from symlinks pointing at a parent directory
+            real_dirpath = os.path.realpath(dirpath)
+            if real_dirpath in visited:
+                dirnames.clear()
+                continue
+            visited.add(real_dirpath)
+
+            node = nodes[dirpath]
+            dirnames.sort()
+            dirnames_set = set(dirnames)
+            for name in sorted(dirnames + filenames):
+                if name in dirnames_set:
+                    child: IndexNode = {}
+                    node[name] = child
+                    nodes[os.path.join(dirpath, name)] = child
+                else:
+                    node[name] = None
+                    file_count += 1
+
+        logger.log(TRACE, f"Indexed {file_count} files in {root}")
+        return cls(root, tree)
+
+    @classmethod
+    def from_names(cls, root: Path, names: Iterable[str]) -> Self:
+        """Builds an index from a list of relative POSIX paths, like the names in a zip
+        file. Names ending with `/` are directories; any missing parent directories are
+        added automatically."""
+        tree: IndexNode = {}
+
+        for name in names:
+            path = PurePosixPath(name)
+            if path.is_absolute() or ".." in path.parts or not path.parts:
+                logger.debug(f"Ignoring invalid path in {root}: {name}")
+                continue
+
+            *dir_parts, last = path.parts
+            node = tree
+            for part in dir_parts:
+                child = node.setdefault(part, {})
+                if child is None:  # conflicts with a file
+                    break
+                node = child
+            else:
+                if name.endswith("/"):
+                    node.setdefault(last, {})
+                else:
+                    node.setdefault(last, None)
+
+        _sort_tree(tree)
+        return cls(root, tree)
+
+    @classmethod
+    def from_traversable(cls, root: Path, traversable: Traversable) -> Self:
+        """Builds an index by walking an `importlib.resources` Traversable, eg. a
+        package inside a zip file."""
+        names = list[str]()
+        stack = [(traversable, "")]
+        while stack:
+            node, prefix = stack.pop()
+            for child in node.iterdir():
+                name = prefix + child.name
+                if child.is_dir():
+                    names.append(name + "/")
+                    stack.append((child, name + "/"))
+                else:
+                    names.append(name)
+
+        index = cls.from_names(root, names)
+        logger.log(TRACE, f"Indexed {len(names)} entries in {root}")
+        return index
+
+    def with_prefixes(self, *prefixes: str | Path) -> ResourceIndex:
+        """Returns a new index with the same root, where the contents of this index
+        appear under each of the given relative paths.
+
+        The new index shares its subtrees with this one, so nothing is copied.
+        """
+        tree: IndexNode = {}
+        for prefix in prefixes:
+            node = tree
+            *parts, last = _split(prefix)
+            for part in parts:
+                child = node.setdefault(part, {})
+                assert child is not None
+                node = child
+            node[last] = self._tree
+
+        _sort_tree(tree, skip=self._tree)
+        return ResourceIndex(self.root, tree)
+
+    def is_file(self, path_stub: str | Path) -> bool:
+        parts = PurePosixPath(Path(path_stub).as_posix()).parts
+        if not parts:
+            return False
+
+        node = self._get_dir(parts[:-1])
+        return node is not None and parts[-1] in node and node[parts[-1]] is None
+
+    def is_dir(self, path_stub: str | Path) -> bool:
+        parts = PurePosixPath(Path(path_stub).as_posix()).parts
+        return self._get_dir(parts) is not None
+
+    def glob_dirs(self, pattern: str | Path) -> Iterator[Path]:
+        """Like `Path.glob`, but only yields directories."""
+        for parts, node in self._glob(self._tree, _split(pattern), ()):
+            if node is not None:
+                yield self.root.joinpath(*parts)
+
+    def glob_files(self, base: str | Path, pattern: str | Path) -> Iterator[Path]:
+        """Like `(root / base).glob(pattern)`, but only yields files."""
+        base_parts = PurePosixPath(Path(base).as_posix()).parts
+        if (node := self._get_dir(base_parts)) is None:
+            return
+
+        for parts, child in self._glob(node, _split(pattern), base_parts):
+            if child is None:
+                yield self.root.joinpath(*parts)
+
+    def _get_dir(self, parts: tuple[str, ...]) -> IndexNode | None:
+        node = self._tree
+        for part in parts:
+            child = node.get(part)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def _glob(
+        self,
+        node: IndexNode,
+        parts: tuple[str, ...],
+        prefix: tuple[str, ...],
+    ) -> Iterator[tuple[tuple[str, ...], IndexNode | None]]:
+        if not parts:
+            yield prefix, node
+            return
+
+        part, rest = parts[0], parts[1:]
+
+        if part == "**":
+            # zero or more directories
+            yield from self._glob(node, rest, prefix)
+            for name, child in node.items():
+                if child is not None:
+                    yield from self._glob(child, parts, prefix + (name,))
+            return
+
+        if not _MAGIC_CHARS.search(part):
+            if part not in node:
+                return
+            children = [(part, node[part])]
+        else:
+            regex = _compile_segment(part)
+            children = [(name, c) for name, c in node.items() if regex.match(name)]
+
+        for name, child in children:
+            if not rest:
+                yield prefix + (name,), child
+            elif child is not None:
+                yield from self._glob(child, rest, prefix + (name,))
+
+
+def _sort_tree(node: IndexNode, *, skip: IndexNode | None = None):
+    """Recursively sorts the children of each node, except for `skip` (which must
+    already be sorted)."""
+    items = sorted(node.items())
+    node.clear()
+    for name, child in items:
+        node[name] = child
+        if child is not None and child is not skip:
+            _sort_tree(child, skip=skip)
+
+
+def _split(pattern: str | Path) -> tuple[str, ...]:
+    return tuple(part for part in Path(pattern).as_posix().split("/") if part != ".")
+
+
+@cache
+def _compile_segment(segment: str) -> re.Pattern[str]:
+    return re.compile(translate(segment))
@@ -1,4 +1,5 @@
 __all__ = [
+    "FormatTreeRenderer",
     "IncludeRawExtension",
     "hexdoc_item",
     "hexdoc_localize",
@@ -8,3 +9,4 @@ __all__ = [
 
 from .extensions import IncludeRawExtension
 from .filters import hexdoc_item, hexdoc_localize, hexdoc_texture, hexdoc_wrap
+from .format_tree import FormatTreeRenderer
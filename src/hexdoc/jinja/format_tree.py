@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from importlib import resources
+from typing import Any, Callable, Mapping
+from weakref import WeakKeyDictionary
+
+from jinja2 import Environment, TemplateNotFound
+from jinja2.environment import TemplateModule
+from jinja2.runtime import Context
+from jinja2.utils import _PassArg  # pyright: ignore[reportPrivateUsage]
+from markupsafe import Markup, escape
+
+from hexdoc.patchouli import FormatTree
+from hexdoc.patchouli.text import FunctionStyle, LinkStyle, Style
+
+STYLES_TEMPLATE = "macros/styles.html.jinja"
+
+StyleRenderer = Callable[[Context, Any, Markup], Markup]
+"""Renders a single style to HTML.
+
+Called with the template context, the style, and the already-rendered children of the
+node being rendered.
+"""
+
+_BR = Markup("<br />")
+
+
+def _wrap(start: str, end: str) -> StyleRenderer:
+    def render(context: Context, style: Style, content: Markup) -> Markup:
+        return Markup(start) + content + Markup(end)
+
+    return render
+
+
+def _function_tooltip(context: Context, style: FunctionStyle, content: Markup):
+    return Markup('<span class="has-tooltip" title="{}">{}</span>').format(
+        style.value,
+        content,
+    )
+
+
+def _function_cmd_click(context: Context, style: FunctionStyle, content: Markup):
+    title = context.resolve("_")("hexdoc.when_clicked").format(style.value)
+    return Markup('<span class="has-cmd-click" title="{}">{}</span>').format(
+        title,
+        content,
+    )
+
+
+def _special_color(context: Context, style: FunctionStyle, content: Markup):
+    return Markup('<span style="color: #{}">{}</span>').format(style.value, content)
+
+
+def _special_link(context: Context, style: LinkStyle, content: Markup):
+    return Markup('<a href="{}"{}>{}</a>').format(
+        style.href(context),
+        Markup(' target="_blank"') if style.external else "",
+        content,
+    )
+
+
+DEFAULT_STYLE_RENDERERS: Mapping[str, StyleRenderer] = {
+    "command_obfuscated": _wrap('<span class="obfuscated">', "</span>"),
+    "command_bold": _wrap("<strong>", "</strong>"),
+    "command_strikethrough": _wrap("<s>", "</s>"),
+    "command_underline": _wrap('<span style="text-decoration: underline">', "</span>"),
+    "command_italic": _wrap("<i>", "</i>"),
+    "special_base": lambda context, style, content: content,
+    "function_tooltip": _function_tooltip,
+    "function_cmd_click": _function_cmd_click,
+    "special_color": _special_color,
+    "special_link": _special_link,
+    "paragraph_paragraph": _wrap("<p>", "</p>"),
+    "paragraph_list_item": _wrap('<p class="fake-li">', "</p>"),
+}
+"""Python equivalents of the macros in hexdoc's `macros/styles.html.jinja`.
+
+These are only used if that template hasn't been overridden.
+"""
+
+
+class FormatTreeRenderer:
+    """Renders a FormatTree directly to HTML, without calling a Jinja macro for every
+    node. Use the `hexdoc_styled` filter in templates.
+
+    Styles are rendered by looking up their `Style.macro` name in `renderers`, then in
+    `DEFAULT_STYLE_RENDERERS`. If neither has a renderer for a style, the macro of the
+    same name in `macros/styles.html.jinja` is called instead, so plugins which add new
+    styles to that template don't need to do anything else.
+
+    Plugins can add or override renderers in `ModPlugin.update_jinja_env`:
+
+    ```py
+    FormatTreeRenderer.of(env).renderers["command_bold"] = render_bold
+    ```
+
+    The output is identical to the `styled` macro in `macros/formatting.html.jinja`.
+    """
+
+    jinja_pass_arg = _PassArg.context
+    """Tells Jinja to pass the context to `__call__` (like `@pass_context`)."""
+
+    def __init__(self, renderers: Mapping[str, StyleRenderer] | None = None):
+        self.renderers = dict(renderers or {})
+        self._uses_default_styles = WeakKeyDictionary[Environment, bool]()
+        self._style_modules = WeakKeyDictionary[Context, TemplateModule]()
+
+    @classmethod
+    def of(cls, env: Environment) -> FormatTreeRenderer:
+        renderer = env.filters["hexdoc_styled"]
+        if not isinstance(renderer, FormatTreeRenderer):
+            raise TypeError(
+                f"Expected filter hexdoc_styled to be {cls}, got {type(renderer)}"
+            )
+        return renderer
+
+    def __call__(self, context: Context, value: FormatTree | str | None) -> Markup:
+        return self.render(context, value)
+
+    def render(self, context: Context, value: FormatTree | str | None) -> Markup:
+        renderers = self.renderers
+        if self._default_styles(context.environment):
+            renderers = DEFAULT_STYLE_RENDERERS | renderers
+
+        def visit(node: FormatTree | str | None) -> Markup:
+            match node:
+                case str():
+                    return _BR.join(escape(line) for line in node.splitlines())
+                case None:
+                    return Markup()
+                case FormatTree(style=style, children=children):
+                    content = Markup().join(visit(child) for child in children)
+                    if renderer := renderers.get(style.macro):
+                        return renderer(context, style, content)
+                    return self._render_macro(context, style, content)
+
+        return visit(value)
+
+    def _render_macro(self, context: Context, style: Style, content: Markup) -> Markup:
+        if (module := self._style_modules.get(context)) is None:
+            template = context.environment.get_template(STYLES_TEMPLATE)
+            module = template.make_module(context.get_all())
+            self._style_modules[context] = module
+
+        macro = context.environment.getitem(module, style.macro)
+        return Markup(macro(style, caller=lambda: content))
+
+    def _default_styles(self, env: Environment) -> bool:
+        """Returns True if `STYLES_TEMPLATE` is the one that comes with hexdoc."""
+        if (result := self._uses_default_styles.get(env)) is None:
+            try:
+                assert env.loader
+                source, _, _ = env.loader.get_source(env, STYLES_TEMPLATE)
+            except TemplateNotFound:
+                result = False
+            else:
+                default = resources.files("hexdoc") / "_templates" / STYLES_TEMPLATE
+                result = source == default.read_text("utf-8")
+            self._uses_default_styles[env] = result
+        return result
@@ -32,6 +32,7 @@ from .filters import (
     hexdoc_texture,
     hexdoc_wrap,
 )
+from .format_tree import FormatTreeRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,7 @@ def create_jinja_env_with_loader(loader: BaseLoader):
         "hexdoc_localize": hexdoc_localize,
         "hexdoc_texture": hexdoc_texture,
         "hexdoc_item": hexdoc_item,
+        "hexdoc_styled": FormatTreeRenderer(),
     }
 
     return env
@@ -1,8 +1,10 @@
 __all__ = [
     "I18n",
+    "LangCatalog",
     "LocalizedItem",
     "LocalizedStr",
     "Tag",
+    "TagRegistry",
     "TagValue",
     "assets",
     "recipe",
@@ -10,4 +12,5 @@ __all__ = [
 
 from . import assets, recipe
 from .i18n import I18n, LocalizedItem, LocalizedStr
-from .tags import Tag, TagValue
+from .lang_catalog import LangCatalog
+from .tags import Tag, TagRegistry, TagValue
@@ -11,11 +11,16 @@ from minecraft_render.types.dataset.RenderClass import IRenderClass
 from minecraft_render.types.dataset.types import IResourceLoader
 from yarl import URL
 
-from hexdoc.core import ModResourceLoader, ResourceLocation
+from hexdoc.core import (
+    ModResourceLoader,
+    ResourceLocation,
+    ResourceLocationPatternSet,
+)
 from hexdoc.core.properties import (
     PNGTextureOverride,
     TextureTextureOverride,
 )
+from hexdoc.core.resource_dir import ArchivePathResourceDir, PathResourceDir
 from hexdoc.model import HexdocModel
 from hexdoc.utils import PydanticURL
 
@@ -44,20 +49,24 @@ class TextureNotFoundError(FileNotFoundError):
         super().__init__(self.message)
 
 
+def _identity(value: str) -> str:
+    # module-level so the loader's decode cache can reuse entries for it
+    return value
+
+
 class HexdocPythonResourceLoader(HexdocModel):
     loader: ModResourceLoader
 
     def loadJSON(self, resource_path: ResourcePath) -> str:
         path = self._convert_resource_path(resource_path)
-        _, json_str = self.loader.load_resource(path, decode=lambda v: v)
+        _, json_str = self.loader.load_resource(path, decode=_identity)
         return json_str
 
     def loadTexture(self, resource_path: ResourcePath) -> str:
         path = self._convert_resource_path(resource_path)
-        _, resolved_path = self.loader.find_resource(path)
-
-        with open(resolved_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+        resource_dir, resolved_path = self.loader.find_resource(path)
+        data = resource_dir.read_bytes(resolved_path)
+        return base64.b64encode(data).decode()
 
     def close(self):
         pass
@@ -81,8 +90,12 @@ class HexdocAssetLoader:
     def gaslighting_items(self):
         return Tag.GASLIGHTING_ITEMS.load(self.loader).value_ids_set
 
+    @cached_property
+    def missing_textures(self):
+        return ResourceLocationPatternSet(self.loader.props.textures.missing)
+
     def can_be_missing(self, id: ResourceLocation):
-        return any(id.match(pattern) for pattern in self.loader.props.textures.missing)
+        return id in self.missing_textures
 
     def get_override(
         self,
@@ -111,10 +124,19 @@ class HexdocAssetLoader:
             if resource_dir:
                 self.loader.export_raw(
                     path=path.relative_to(resource_dir.path),
-                    data=path.read_bytes(),
+                    data=resource_dir.read_bytes(path),
                 )
             yield texture_id, path
 
+    def _find_resource_dir(self, path: Path) -> PathResourceDir | None:
+        # prefer the innermost dir, in case resource dirs are nested
+        matches = [
+            resource_dir
+            for resource_dir in self.loader.resource_dirs
+            if path.is_relative_to(resource_dir.path)
+        ]
+        return max(matches, key=lambda d: len(d.path.parts), default=None)
+
     def load_item_models(self) -> Iterable[tuple[ResourceLocation, ModelItem]]:
         for _, item_id, data in self.loader.load_resources(
             "assets",
@@ -172,6 +194,8 @@ class HexdocAssetLoader:
                         path=path,
                         repo_root=self.loader.props.repo_root,
                         asset_url=self.asset_url,
+                        resource_dir=self._find_resource_dir(path),
+                        export_dir=self.loader.export_dir,
                     )
 
                 case PNGTexture() | AnimatedTexture() as texture:
@@ -241,13 +265,22 @@ def load_texture(
     path: Path,
     repo_root: Path,
     asset_url: URL,
+    resource_dir: PathResourceDir | None = None,
+    export_dir: Path | None = None,
 ) -> ImageTexture:
-    url = asset_url.joinpath(*path.relative_to(repo_root).parts)
-    meta_path = path.with_suffix(".png.mcmeta")
+    """Loads an image texture, using its `.png.mcmeta` file (if any) to check if it's
+    animated.
 
-    if meta_path.is_file():
+    If `resource_dir` is given, the metadata is read through it, so this also works for
+    textures in archives. Since those don't exist on the filesystem, their url points
+    at the copy in `export_dir` instead.
+    """
+    url = _texture_url(path, repo_root, asset_url, resource_dir, export_dir)
+    meta_data = _read_texture_meta(path, resource_dir)
+
+    if meta_data is not None:
         try:
-            meta = AnimationMeta.model_validate_json(meta_path.read_bytes())
+            meta = AnimationMeta.model_validate_json(meta_data)
         except ValueError as e:
             logger.debug(f"Failed to parse AnimationMeta for {id}\n{e}")
         else:
@@ -261,6 +294,31 @@ def load_texture(
     return PNGTexture(url=url, pixelated=True)
 
 
+def _texture_url(
+    path: Path,
+    repo_root: Path,
+    asset_url: URL,
+    resource_dir: PathResourceDir | None,
+    export_dir: Path | None,
+) -> URL:
+    if isinstance(resource_dir, ArchivePathResourceDir) and export_dir:
+        path = export_dir / path.relative_to(resource_dir.path)
+    return asset_url.joinpath(*path.relative_to(repo_root).parts)
+
+
+def _read_texture_meta(
+    path: Path, resource_dir: PathResourceDir | None
+) -> bytes | None:
+    meta_path = path.with_suffix(".png.mcmeta")
+
+    if resource_dir is None:
+        return meta_path.read_bytes() if meta_path.is_file() else None
+
+    if meta_path := resource_dir.find_file(meta_path.relative_to(resource_dir.path)):
+        return resource_dir.read_bytes(meta_path)
+    return None
+
+
 def load_and_render_item(
     model: ModelItem,
     loader: ModResourceLoader,
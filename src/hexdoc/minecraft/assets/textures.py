@@ -11,11 +11,11 @@ from typing import (
     TypeVar,
 )
 
-from pydantic import Field, SerializeAsAny
+from pydantic import Field, PrivateAttr, SerializeAsAny, model_validator
 from typing_extensions import override
 from yarl import URL
 
-from hexdoc.core import ResourceLocation
+from hexdoc.core import ResourceLocation, ResourceLocationPatternSet
 from hexdoc.model import (
     InlineModel,
     ValidationContextModel,
@@ -40,7 +40,7 @@ class BaseTexture(InlineModel, ABC):
         return cls.lookup(
             id,
             lookups=texture_ctx.textures,
-            allowed_missing=texture_ctx.allowed_missing_textures,
+            allowed_missing=texture_ctx.allowed_missing_patterns,
         )
 
     @classmethod
@@ -48,18 +48,23 @@ class BaseTexture(InlineModel, ABC):
         cls,
         id: ResourceLocation,
         lookups: TextureLookups[Any],
-        allowed_missing: Iterable[ResourceLocation],
+        allowed_missing: ResourceLocationPatternSet | Iterable[ResourceLocation],
     ) -> Self:
         """Returns the texture from the lookup table if it exists, or the "missing
         texture" texture if it's in `props.texture.missing`, or raises `ValueError`.
 
-        This is called frequently and does not load any files.
+        This is called frequently and does not load any files. Prefer passing a
+        prebuilt `ResourceLocationPatternSet` (eg. `TextureContext.allowed_missing_patterns`)
+        to `allowed_missing`, since other iterables are compiled on every call.
         """
         textures = cls.get_lookup(lookups)
         if id in textures:
             return textures[id]
 
-        if any(id.match(pattern) for pattern in allowed_missing):
+        if not isinstance(allowed_missing, ResourceLocationPatternSet):
+            allowed_missing = ResourceLocationPatternSet(allowed_missing)
+
+        if id in allowed_missing:
             logger.warning(f"No {cls.__name__} for {id}, using default missing texture")
             return cls.from_url(MISSING_TEXTURE_URL, pixelated=True)
 
@@ -98,3 +103,17 @@ TextureLookups = defaultdict[
 class TextureContext(ValidationContextModel):
     textures: TextureLookups[Any]
     allowed_missing_textures: set[ResourceLocation]
+
+    _allowed_missing_patterns: ResourceLocationPatternSet = PrivateAttr()
+
+    @model_validator(mode="after")
+    def _post_root(self):
+        # compiled once here, since lookup() is called for every texture in the book
+        self._allowed_missing_patterns = ResourceLocationPatternSet(
+            self.allowed_missing_textures
+        )
+        return self
+
+    @property
+    def allowed_missing_patterns(self) -> ResourceLocationPatternSet:
+        return self._allowed_missing_patterns
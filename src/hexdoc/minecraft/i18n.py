@@ -1,25 +1,63 @@
 from __future__ import annotations
 
+import copy
 import json
 import logging
-from collections import defaultdict
-from functools import total_ordering
-from typing import Any, Callable, Self
+from collections import Counter, defaultdict, deque
+from functools import total_ordering, wraps
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Concatenate,
+    Hashable,
+    Iterable,
+    Iterator,
+    ParamSpec,
+    Self,
+    TypeVar,
+)
+from weakref import WeakKeyDictionary
 
-from pydantic import ValidationInfo, model_validator
+from pydantic import BaseModel, PrivateAttr, ValidationInfo, model_validator
 from pydantic.functional_validators import ModelWrapValidatorHandler
 
 from hexdoc.core import (
     ItemStack,
+    MergeExport,
     ModResourceLoader,
+    PathResourceDir,
     ResourceLocation,
     ValueIfVersion,
 )
 from hexdoc.model import HexdocModel, ValidationContextModel
-from hexdoc.utils import decode_and_flatten_json_dict
+from hexdoc.utils import TRACE, decode_and_flatten_json_dict, write_to_path
+
+from .lang_catalog import CATALOG_SUFFIX, LangCatalog, LangCatalogError
 
 logger = logging.getLogger(__name__)
 
+_P = ParamSpec("_P")
+
+_T = TypeVar("_T")
+
+_T_LocalizedStr = TypeVar("_T_LocalizedStr", bound="LocalizedStr")
+
+_DEFAULT_I18N_CACHE = WeakKeyDictionary[
+    ModResourceLoader,
+    dict[tuple[type[Any], bool], "I18n"],
+]()
+"""loader -> (I18n subclass, enabled) -> default language"""
+
+
+def _lang_globs(lang: str):
+    return [
+        f"{lang}.json",
+        f"{lang}.json5",
+        f"{lang}.flatten.json",
+        f"{lang}.flatten.json5",
+    ]
+
 
 @total_ordering
 class LocalizedStr(HexdocModel, frozen=True):
@@ -28,6 +66,9 @@ class LocalizedStr(HexdocModel, frozen=True):
     key: str
     value: str
 
+    _source: Callable[[I18n], Self] | None = PrivateAttr(None)
+    """Repeats the I18n lookup which created this string (see `relocalize`)."""
+
     @classmethod
     def skip_i18n(cls, key: str) -> Self:
         """Returns an instance of this class with `value = key`."""
@@ -60,7 +101,27 @@ class LocalizedStr(HexdocModel, frozen=True):
 
     def map(self, fn: Callable[[str], str]) -> Self:
         """Returns a copy of this object with `new.value = fn(old.value)`."""
-        return self.model_copy(update={"value": fn(self.value)})
+        new = self.model_copy(update={"value": fn(self.value)})
+        if source := self._source:
+            new._source = lambda i18n: source(i18n).map(fn)
+        return new
+
+    def relocalize(self, i18n: I18n) -> Self:
+        """Returns this string localized in another language, by repeating the I18n
+        method call which created it.
+
+        Strings which weren't created by an I18n method (eg. `with_value`) are returned
+        unchanged.
+        """
+        if self._source is None:
+            return self
+        return self._source(i18n)
+
+    def _with_source(self, source: Callable[[I18n], Self]) -> Self:
+        # copy first, since I18n reuses instances for the same key
+        new = self.model_copy()
+        new._source = source
+        return new
 
     def __repr__(self) -> str:
         return self.value
@@ -91,36 +152,89 @@ class LocalizedItem(LocalizedStr, frozen=True):
         return cls.model_validate(i18n.localize_item(key))
 
 
+def _relocalizable(
+    method: Callable[Concatenate[I18n, _P], _T_LocalizedStr],
+) -> Callable[Concatenate[I18n, _P], _T_LocalizedStr]:
+    """Records the arguments of an I18n method on the string it returns, so it can be
+    localized again in another language with `LocalizedStr.relocalize`."""
+
+    @wraps(method)
+    def wrapper(self: I18n, *args: _P.args, **kwargs: _P.kwargs) -> _T_LocalizedStr:
+        def source(i18n: I18n):
+            return getattr(i18n, method.__name__)(*args, **kwargs)
+
+        localized = method(self, *args, **kwargs)
+
+        # most methods return a new instance, which we can just update
+        if not self._is_shared(localized):
+            localized._source = source
+            return localized
+
+        # otherwise, copy the shared instance only once for each call
+        try:
+            key = (method.__name__, args, tuple(kwargs.items()))
+            cached = self._shared_copies.get(key)
+        except TypeError:  # unhashable arguments
+            return localized._with_source(source)
+
+        if cached is None:
+            cached = self._shared_copies[key] = localized._with_source(source)
+        return cached
+
+    return wrapper
+
+
 class I18n(ValidationContextModel):
     """Handles localization of strings."""
 
-    lookup: dict[str, LocalizedStr]
+    lookup: dict[str, str]
+    """Raw values from the lang files.
+
+    `LocalizedStr` instances are only created when a key is actually used.
+    """
     lang: str
     default_i18n: I18n | None
     enabled: bool
 
+    _localized: dict[str, LocalizedStr] = PrivateAttr(default_factory=dict)
+    _owners: dict[str, I18n] | None = PrivateAttr(None)
+    _missing: Counter[str] = PrivateAttr(default_factory=Counter)
+    _shared_copies: dict[Hashable, LocalizedStr] = PrivateAttr(default_factory=dict)
+    """Copies of shared `LocalizedStr` instances made by `_relocalizable` methods."""
+
     @classmethod
     def list_all(cls, loader: ModResourceLoader):
+        """Returns the languages supported by this mod, without loading any files."""
         # don't list languages which this particular mod doesn't support
         # eg. if Hex has translations for ru_ru but an addon doesn't
         return set(
-            id.path
-            for resource_dir, id, _ in cls._load_lang_resources(loader)
-            if not resource_dir.external
+            lang_id.path
+            for _, lang_id, _ in loader.find_resources(
+                "assets",
+                namespace="*",
+                folder="lang",
+                glob=_lang_globs("*"),
+                allow_missing=True,
+                internal_only=True,
+            )
         )
 
     @classmethod
     def load_all(cls, loader: ModResourceLoader, enabled: bool):
         # lang -> (key -> value)
-        lookups = defaultdict[str, dict[str, LocalizedStr]](dict)
+        lookups = defaultdict[str, dict[str, str]](dict)
+        exported = defaultdict[str, dict[str, str]](dict)
         internal_langs = set[str]()
 
-        for resource_dir, lang_id, data in cls._load_lang_resources(loader):
-            lang = lang_id.path
-            lookups[lang] |= cls.parse_lookup(data)
+        for resource_dir, lang, data in cls._load_lang_resources(loader):
+            lookups[lang] |= data
+            if resource_dir.reexport:
+                exported[lang] |= data
             if not resource_dir.external:
                 internal_langs.add(lang)
 
+        cls._export_catalogs(loader, exported)
+
         default_lang = loader.props.default_lang
         default_lookup = lookups[default_lang]
         default_i18n = cls(
@@ -129,6 +243,7 @@ class I18n(ValidationContextModel):
             default_i18n=None,
             enabled=enabled,
         )
+        _DEFAULT_I18N_CACHE.setdefault(loader, {})[cls, enabled] = default_i18n
 
         return {default_lang: default_i18n} | {
             lang: cls(
@@ -147,25 +262,60 @@ class I18n(ValidationContextModel):
         loader: ModResourceLoader,
         enabled: bool,
         lang: str,
+        *,
+        default_i18n: I18n | None = None,
     ) -> Self:
-        lookup = dict[str, LocalizedStr]()
+        """Loads a single language, plus the default language as a fallback.
+
+        Only the files for those languages are read. The default language is cached
+        per loader (see `load_default`), so loading several languages one at a time
+        only loads the default once. Use `default_i18n` to provide it explicitly.
+        """
+        if lang == loader.props.default_lang:
+            return cls.load_default(loader, enabled)
+
+        if default_i18n is None:
+            default_i18n = cls.load_default(loader, enabled)
+
+        return cls._load_lang(loader, enabled, lang, default_i18n)
+
+    @classmethod
+    def load_default(cls, loader: ModResourceLoader, enabled: bool) -> Self:
+        """Loads the default language, or returns the instance which was already
+        loaded by `load`, `load_default`, or `load_all` for this loader."""
+        cache = _DEFAULT_I18N_CACHE.setdefault(loader, {})
+        if (i18n := cache.get((cls, enabled))) is None:
+            i18n = cls._load_lang(loader, enabled, loader.props.default_lang, None)
+            cache[cls, enabled] = i18n
+        return i18n  # pyright: ignore[reportReturnType]
+
+    @classmethod
+    def _load_lang(
+        cls,
+        loader: ModResourceLoader,
+        enabled: bool,
+        lang: str,
+        default_i18n: I18n | None,
+    ) -> Self:
+        lookup = dict[str, str]()
+        exported = dict[str, str]()
         is_internal = False
 
         for resource_dir, _, data in cls._load_lang_resources(loader, lang):
-            lookup |= cls.parse_lookup(data)
+            lookup |= data
+            if resource_dir.reexport:
+                exported |= data
             if not resource_dir.external:
                 is_internal = True
 
+        if exported:
+            cls._export_catalogs(loader, {lang: exported})
+
         if enabled and not is_internal:
             raise FileNotFoundError(
                 f"Lang {lang} exists, but {loader.props.modid} does not support it"
             )
 
-        default_lang = loader.props.default_lang
-        default_i18n = None
-        if lang != default_lang:
-            default_i18n = cls.load(loader, enabled, default_lang)
-
         return cls(
             lookup=lookup,
             lang=lang,
@@ -174,31 +324,109 @@ class I18n(ValidationContextModel):
         )
 
     @classmethod
-    def parse_lookup(cls, raw_lookup: dict[str, str]) -> dict[str, LocalizedStr]:
-        return {
-            key: LocalizedStr(key=key, value=value.replace("%%", "%"))
-            for key, value in raw_lookup.items()
-        }
+    def parse_lookup(cls, raw_lookup: dict[str, str]) -> dict[str, str]:
+        """Returns a copy of `raw_lookup` which can be used as `I18n.lookup`.
+
+        Values are converted to `LocalizedStr` lazily, in `localize`.
+        """
+        return dict(raw_lookup)
 
     @classmethod
-    def _load_lang_resources(cls, loader: ModResourceLoader, lang: str = "*"):
-        return loader.load_resources(
+    def _load_lang_resources(
+        cls,
+        loader: ModResourceLoader,
+        lang: str = "*",
+    ) -> Iterator[tuple[PathResourceDir, str, dict[str, str]]]:
+        """Yields `(resource_dir, lang, lookup)` from lowest to highest priority.
+
+        If an external resource dir contains a compiled catalog for a language (see
+        `LangCatalog`), it's used instead of that resource dir's lang files.
+        """
+        priorities = {id(d): i for i, d in enumerate(loader.resource_dirs)}
+
+        # (priority, lang) -> catalog, in the same order as load_resources
+        catalogs = cls._load_catalogs(loader, lang)
+        pending = deque(
+            (priorities[id(resource_dir)], resource_dir, catalog_lang, lookup)
+            for resource_dir, catalog_lang, lookup in reversed(catalogs)
+        )
+        skipped = {(priority, lang) for priority, _, lang, _ in pending}
+
+        found_any = bool(pending)
+        for resource_dir, lang_id, data in loader.load_resources(
             "assets",
             namespace="*",
             folder="lang",
-            glob=[
-                f"{lang}.json",
-                f"{lang}.json5",
-                f"{lang}.flatten.json",
-                f"{lang}.flatten.json5",
-            ],
+            glob=_lang_globs(lang),
+            allow_missing=True,
+            include=lambda resource_dir, lang_id: (
+                (priorities[id(resource_dir)], lang_id.path) not in skipped
+            ),
             decode=decode_and_flatten_json_dict,
-            export=cls._export,
-        )
+            export=MergeExport(cls._merge_export, json.dumps),
+        ):
+            priority = priorities[id(resource_dir)]
+            while pending and pending[0][0] > priority:
+                yield pending.popleft()[1:]
+
+            found_any = True
+            yield resource_dir, lang_id.path, data
+
+        while pending:
+            yield pending.popleft()[1:]
+
+        if not found_any:
+            raise FileNotFoundError(
+                f"No lang files found for {lang} in any resource dir"
+            )
 
     @classmethod
-    def _export(cls, new: dict[str, str], current: dict[str, str] | None):
-        return json.dumps((current or {}) | new)
+    def _load_catalogs(cls, loader: ModResourceLoader, lang: str):
+        """Returns a list of `(resource_dir, lang, lookup)` for every usable catalog,
+        from highest to lowest priority."""
+        catalogs = list[tuple[PathResourceDir, str, dict[str, str]]]()
+
+        for resource_dir in loader.resource_dirs:
+            # we need to reexport the original lang files, so we can't skip them
+            if resource_dir.internal or resource_dir.reexport:
+                continue
+
+            catalog_path = LangCatalog.path(lang)
+            for base_path in resource_dir.glob_dirs(catalog_path.parent.as_posix()):
+                for path in resource_dir.glob_files(base_path, catalog_path.name):
+                    try:
+                        lookup = LangCatalog(resource_dir.read_bytes(path)).to_dict()
+                    except LangCatalogError as e:
+                        logger.debug(f"Ignoring lang catalog {path}: {e}")
+                        continue
+
+                    logger.debug(f"Loading lang catalog {path}")
+                    catalog_lang = path.name.removesuffix(CATALOG_SUFFIX)
+                    catalogs.append((resource_dir, catalog_lang, lookup))
+
+        return catalogs
+
+    @classmethod
+    def _export_catalogs(
+        cls,
+        loader: ModResourceLoader,
+        lookups: dict[str, dict[str, str]],
+    ):
+        """Exports a compiled catalog for each language, so mods which depend on this
+        one don't need to parse our lang files again."""
+        if not loader.should_export:
+            return
+
+        for lang, lookup in lookups.items():
+            loader.export_raw(
+                LangCatalog.path(lang),
+                LangCatalog.dumps(lookup),
+                cache=True,
+            )
+
+    @classmethod
+    def _merge_export(cls, new: dict[str, str], current: dict[str, str] | None):
+        return (current or {}) | new
 
     @model_validator(mode="after")
     def _warn_if_disabled(self):
@@ -229,31 +457,133 @@ class I18n(ValidationContextModel):
         corresponding localized value.
         """
 
+        def source(i18n: I18n):
+            return i18n.localize(*keys, default=default, silent=silent)
+
+        def unlocalized(value: str):
+            localized = LocalizedStr.skip_i18n(value)
+            localized._source = source
+            return localized
+
+        def found(localized: LocalizedStr):
+            # the shared instance can only be returned if it repeats the same call
+            if keys == (localized.key,) and default is None and not silent:
+                return localized
+            return localized._with_source(source)
+
+        # first key which only exists in the default language
+        fallback: tuple[I18n, str] | None = None
+
         for key in keys:
-            if key in self.lookup:
-                return self.lookup[key]
+            owner = self._get_owner(key)
+            if owner is self:
+                localized = self._get_localized(key)
+                return found(localized) if localized else unlocalized(key)
+            if owner is not None and fallback is None:
+                fallback = owner, key
+
+        # this is a hot path for books with lots of missing translations, so just count
+        # them here and log a summary at the end (see log_missing)
+        if not silent:
+            self._missing[keys[0]] += 1
+
+        if logger.isEnabledFor(TRACE):
+            logger.log(
+                TRACE,
+                f"No translation in {self.lang} for "
+                + (f"key {keys[0]}" if len(keys) == 1 else f"keys {keys}"),
+            )
 
-        if silent or not self.enabled:
+        if default is not None:
+            return unlocalized(default)
+
+        if fallback:
+            owner, key = fallback
+            localized = owner._get_localized(key)
+            return found(localized) if localized else unlocalized(key)
+
+        if self.default_i18n:
+            # not found in either language, so count it for the default too
+            return self.default_i18n.localize(*keys, default=default, silent=silent)
+
+        return unlocalized(keys[0])
+
+    @property
+    def missing(self) -> dict[str, int]:
+        """Keys which were not found by `localize`, and how many times each one was
+        looked up. Silent lookups are not counted."""
+        return dict(self._missing)
+
+    def log_missing(self, top: int = 10):
+        """Logs a summary of the missing translations for this language."""
+        if not self._missing:
+            return
+
+        if not self.enabled:
             log_level = logging.DEBUG
         elif self.is_default:
             log_level = logging.ERROR
         else:
             log_level = logging.WARNING
 
-        logger.log(
-            log_level,
-            f"No translation in {self.lang} for "
-            + (f"key {keys[0]}" if len(keys) == 1 else f"keys {keys}"),
-        )
+        lines = [
+            f"No translation in {self.lang} for {len(self._missing)} keys"
+            + f" ({self._missing.total()} lookups). Most common:"
+        ]
+        for key, count in self._missing.most_common(top):
+            lines.append(f"  {key} ({count})")
+        if len(self._missing) > top:
+            lines.append(f"  ...and {len(self._missing) - top} more.")
 
-        if default is not None:
-            return LocalizedStr.skip_i18n(default)
+        logger.log(log_level, "\n".join(lines))
 
-        if self.default_i18n:
-            return self.default_i18n.localize(*keys, default=default, silent=silent)
+    @property
+    def fallback_keys(self) -> set[str]:
+        """Keys which are missing from this language, but exist in the default."""
+        return {key for key, owner in self._get_owners().items() if owner is not self}
+
+    def _get_owner(self, key: str) -> I18n | None:
+        """Returns the I18n whose lookup should be used for this key, if any."""
+        if self.default_i18n is None:
+            return self if key in self.lookup else None
+        return self._get_owners().get(key)
 
-        return LocalizedStr.skip_i18n(keys[0])
+    def _get_owners(self) -> dict[str, I18n]:
+        """Returns a merged view of this lookup and the default language's lookup.
 
+        This is built once, the first time a non-default language is used, so
+        `lookup` should not be modified after that.
+        """
+        if self._owners is None:
+            owners = dict[str, I18n]()
+            if self.default_i18n:
+                owners |= self.default_i18n._get_owners()
+            owners |= dict.fromkeys(self.lookup, self)
+            self._owners = owners
+        return self._owners
+
+    def _is_shared(self, localized: LocalizedStr) -> bool:
+        """Returns True if `localized` is the shared instance for its key in this
+        language or a fallback language (see `_get_localized`)."""
+        if self._localized.get(localized.key) is localized:
+            return True
+        return self.default_i18n is not None and self.default_i18n._is_shared(localized)
+
+    def _get_localized(self, key: str) -> LocalizedStr | None:
+        if (localized := self._localized.get(key)) is not None:
+            return localized
+
+        if (value := self.lookup.get(key)) is None:
+            return None
+
+        localized = LocalizedStr(key=key, value=value.replace("%%", "%"))
+        # this instance is shared by every `localize(key)` call which found this key
+        # other calls which found it (eg. with fallback keys) return a copy instead
+        localized._source = lambda i18n: i18n.localize(key)
+        self._localized[key] = localized
+        return localized
+
+    @_relocalizable
     def localize_pattern(
         self,
         op_id: ResourceLocation,
@@ -272,6 +602,7 @@ class I18n(ValidationContextModel):
             silent=silent,
         )
 
+    @_relocalizable
     def localize_item(
         self,
         item: str | ResourceLocation | ItemStack,
@@ -296,16 +627,19 @@ class I18n(ValidationContextModel):
         )
         return LocalizedItem(key=localized.key, value=localized.value)
 
+    @_relocalizable
     def localize_entity(self, entity: ResourceLocation, type: str | None = None):
         if type:
             entity = type / entity
         return self.localize(entity.i18n_key("entity"))
 
+    @_relocalizable
     def localize_key(self, key: str, silent: bool = False) -> LocalizedStr:
         if not key.startswith("key."):
             key = "key." + key
         return self.localize(key, silent=silent)
 
+    @_relocalizable
     def localize_item_tag(self, tag: ResourceLocation, silent: bool = False):
         localized = self.localize(
             f"tag.{tag.namespace}.{tag.path}",
@@ -331,6 +665,7 @@ class I18n(ValidationContextModel):
 
         return tag.path.replace("_", " ").replace("/", ", ").title()
 
+    @_relocalizable
     def localize_texture(self, texture_id: ResourceLocation, silent: bool = False):
         path = texture_id.path.removeprefix("textures/").removesuffix(".png")
         root, rest = path.split("/", 1)
@@ -345,3 +680,118 @@ class I18n(ValidationContextModel):
         name = self.localize("language.name", silent=silent)
         region = self.localize("language.region", silent=silent)
         return f"{name} ({region})"
+
+
+def report_missing_translations(
+    i18ns: Iterable[I18n],
+    json_path: Path | None = None,
+    top: int = 10,
+):
+    """Logs a summary of missing translations for each language.
+
+    If `json_path` is provided, also writes every missing key and its lookup count
+    to that file, grouped by language.
+    """
+    report = dict[str, dict[str, int]]()
+    for i18n in i18ns:
+        i18n.log_missing(top)
+        report[i18n.lang] = dict(sorted(i18n.missing.items()))
+
+    if json_path:
+        write_to_path(json_path, json.dumps(report, indent=2))
+
+
+def relocalize(value: _T, i18n: I18n) -> _T:
+    """Returns a copy of `value` where every `LocalizedStr` has been localized again
+    using `i18n` (see `LocalizedStr.relocalize`).
+
+    This is used to validate a book once, then reuse it for each language.
+
+    Recurses into Pydantic models (including private attributes), lists, tuples, and
+    dict values. Any other object with a `relocalize(i18n)` method (eg. `FormatTree`)
+    is replaced with the value returned by that method.
+
+    Models and containers are only copied if something inside them changed, so
+    unchanged objects are shared with the original. Copied models don't keep the
+    values of their cached properties.
+    """
+    return _Relocalizer(i18n).visit(value)
+
+
+class _Relocalizer:
+    def __init__(self, i18n: I18n):
+        self.i18n = i18n
+        # id(original) -> (original, copy)
+        # the original is kept so its id can't be reused during the walk
+        self._visited = dict[int, tuple[Any, Any]]()
+
+    def visit(self, value: _T) -> _T:
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+
+        if (visited := self._visited.get(id(value))) is not None:
+            return visited[1]
+
+        # if there's a cycle, reuse the original object
+        self._visited[id(value)] = (value, value)
+        new = self._visit(value)
+        self._visited[id(value)] = (value, new)
+        return new
+
+    def _visit(self, value: Any) -> Any:
+        if (method := getattr(type(value), "relocalize", None)) is not None:
+            return method(value, self.i18n)
+
+        match value:
+            case BaseModel():
+                return self._visit_model(value)
+            case list():
+                return self._visit_list(value)
+            case tuple() if type(value) is tuple:
+                items = self._visit_list(list(value))
+                return tuple(items) if items is not value else value
+            case dict():
+                return self._visit_dict(value)
+            case _:
+                return value
+
+    def _visit_model(self, model: BaseModel) -> BaseModel:
+        fields = type(model).model_fields
+        new_fields = self._changed(
+            (name, value) for name, value in model.__dict__.items() if name in fields
+        )
+        new_private = self._changed((model.__pydantic_private__ or {}).items())
+        if not new_fields and not new_private:
+            return model
+
+        new = copy.copy(model)
+        for name in new.__dict__.keys() - fields.keys():
+            del new.__dict__[name]  # cached properties
+        new.__dict__.update(new_fields)
+        if new_private and new.__pydantic_private__ is not None:
+            new.__pydantic_private__.update(new_private)
+        return new
+
+    def _visit_list(self, values: list[Any]) -> list[Any]:
+        changed = False
+        items = list[Any]()
+        for value in values:
+            items.append(new := self.visit(value))
+            changed = changed or new is not value
+        return items if changed else values
+
+    def _visit_dict(self, values: dict[Any, Any]) -> dict[Any, Any]:
+        changed = self._changed(values.items())
+        if not changed:
+            return values
+
+        new = copy.copy(values)
+        new.update(changed)
+        return new
+
+    def _changed(self, items: Iterable[tuple[Any, Any]]) -> dict[Any, Any]:
+        changed = dict[Any, Any]()
+        for key, value in items:
+            if (new := self.visit(value)) is not value:
+                changed[key] = new
+        return changed
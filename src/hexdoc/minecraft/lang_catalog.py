@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Mapping, Self
+
+CATALOG_MAGIC = b"HXLC"
+
+CATALOG_VERSION = 1
+"""Increment this if the catalog format changes."""
+
+CATALOG_SUFFIX = ".hexdoc-lang"
+
+CATALOG_DIR = Path("lang")
+"""Catalogs are stored at `{resource dir}/lang/{lang}.hexdoc-lang`."""
+
+_HEADER = struct.Struct("<4sHHI")
+"""magic, version, reserved, entry count"""
+
+_ENTRY = struct.Struct("<IIII")
+"""key offset, key length, value offset, value length (relative to the string blob)"""
+
+
+class LangCatalogError(ValueError):
+    pass
+
+
+class LangCatalog(Mapping[str, str]):
+    """Read-only lang table stored in a compact binary format, similar to gettext's
+    `.mo` files.
+
+    The format is a header, followed by a table of entries sorted by the UTF-8 bytes
+    of each key, followed by a blob containing every key and value. Lookups use a
+    binary search over the entry table, so a catalog can be used directly from a
+    memory-mapped file without decoding the whole thing.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap):
+        if len(data) < _HEADER.size:
+            raise LangCatalogError("Lang catalog is truncated")
+
+        magic, version, _, count = _HEADER.unpack_from(data)
+        if magic != CATALOG_MAGIC:
+            raise LangCatalogError(f"Invalid lang catalog magic: {magic}")
+        if version != CATALOG_VERSION:
+            raise LangCatalogError(
+                f"Unsupported lang catalog version: {version} (expected"
+                f" {CATALOG_VERSION})"
+            )
+
+        self._data = memoryview(data)
+        self._count = count
+        self._blob_start = _HEADER.size + count * _ENTRY.size
+        if len(data) < self._blob_start:
+            raise LangCatalogError("Lang catalog is truncated")
+
+    @classmethod
+    def path(cls, lang: str) -> Path:
+        """Returns the path to the catalog for `lang`, relative to a resource dir."""
+        return CATALOG_DIR / f"{lang}{CATALOG_SUFFIX}"
+
+    @classmethod
+    @contextmanager
+    def open(cls, path: Path) -> Iterator[Self]:
+        """Memory-maps the catalog at `path`."""
+        with (
+            path.open("rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            catalog = cls(data)
+            try:
+                yield catalog
+            finally:
+                catalog._data.release()
+
+    @classmethod
+    def dumps(cls, lookup: Mapping[str, str]) -> bytes:
+        """Serializes a lang table to the catalog format."""
+        items = sorted(
+            (key.encode("utf-8"), value.encode("utf-8"))
+            for key, value in lookup.items()
+        )
+
+        entries = bytearray()
+        blob = bytearray()
+        for key, value in items:
+            key_offset = len(blob)
+            blob += key
+            value_offset = len(blob)
+            blob += value
+            entries += _ENTRY.pack(key_offset, len(key), value_offset, len(value))
+
+        header = _HEADER.pack(CATALOG_MAGIC, CATALOG_VERSION, 0, len(items))
+        return header + bytes(entries) + bytes(blob)
+
+    def to_dict(self) -> dict[str, str]:
+        """Decodes the whole catalog at once."""
+        return {
+            self._string(key_offset, key_length): self._string(
+                value_offset, value_length
+            )
+            for key_offset, key_length, value_offset, value_length in self._entries()
+        }
+
+    def __getitem__(self, key: str) -> str:
+        target = key.encode("utf-8")
+
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = _ENTRY.unpack_from(
+                self._data, _HEADER.size + mid * _ENTRY.size
+            )
+            start = self._blob_start + key_offset
+            mid_key = bytes(self._data[start : start + key_length])
+            if mid_key == target:
+                return self._string(value_offset, value_length)
+            if mid_key < target:
+                low = mid + 1
+            else:
+                high = mid
+
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key_offset, key_length, *_ in self._entries():
+            yield self._string(key_offset, key_length)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entries(self) -> Iterator[tuple[int, int, int, int]]:
+        return _ENTRY.iter_unpack(self._data[_HEADER.size : self._blob_start])
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._blob_start + offset
+        return str(self._data[start : start + length], "utf-8")
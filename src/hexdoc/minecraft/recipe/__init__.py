@@ -11,6 +11,7 @@ __all__ = [
     "MinecraftItemIdIngredient",
     "MinecraftItemTagIngredient",
     "Recipe",
+    "RecipeIndex",
     "SmeltingRecipe",
     "SmithingRecipe",
     "SmithingTransformRecipe",
@@ -19,6 +20,7 @@ __all__ = [
     "StonecuttingRecipe",
 ]
 
+from .index import RecipeIndex
 from .ingredients import (
     ItemIngredient,
     ItemIngredientList,
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Any, Iterable, Iterator, TypeVar
+from weakref import WeakKeyDictionary, ref
+
+from hexdoc.core import ModResourceLoader, ResourceLocation
+from hexdoc.core.resource import BaseResourceLocation, ItemStack
+from hexdoc.core.resource_dir import PathResourceDir
+from hexdoc.model import IDModel
+from hexdoc.utils import JSONDict
+
+from ..i18n import I18n
+from ..tags import TagRegistry
+
+logger = logging.getLogger(__name__)
+
+_INGREDIENT_KEYS = ["ingredients", "ingredient", "key", "base", "addition", "template"]
+
+_RECIPE_INDEXES = WeakKeyDictionary[ModResourceLoader, "RecipeIndex"]()
+
+_T_IDModel = TypeVar("_T_IDModel", bound=IDModel)
+
+
+class RecipeIndex:
+    """Every recipe in `data/*/recipes` of the internal resource dirs, loaded once per
+    `ModResourceLoader`.
+
+    Internal recipes are decoded in bulk the first time the index is used, and are
+    indexed by result and ingredient item ids from the raw JSON. Ingredient tags are
+    expanded with `TagRegistry`. Recipes from external resource dirs aren't indexed,
+    but they're decoded on demand (once each) if requested by id.
+
+    Recipes which fail to decode are logged once and skipped, and an error is only
+    raised if that recipe is requested.
+
+    Validated models are cached by `load_model` for the I18n instance they were
+    validated with, since they contain localized item names.
+
+    Use `RecipeIndex.of(loader)` to get the shared instance for a loader.
+    """
+
+    def __init__(self, loader: ModResourceLoader):
+        # weak, since this is the value for the loader's key in a WeakKeyDictionary
+        self._loader = ref(loader)
+        self._recipes: dict[ResourceLocation, tuple[PathResourceDir, JSONDict]] | None
+        self._recipes = None
+        # recipes which were loaded by id, but aren't in the index
+        self._unindexed = dict[ResourceLocation, tuple[PathResourceDir, JSONDict]]()
+        # id -> error message
+        self._errors = dict[ResourceLocation, str]()
+        self._missing = set[ResourceLocation]()
+        self._exported = set[ResourceLocation]()
+        self._models = dict[
+            tuple[type[IDModel], ResourceLocation], tuple[Any, ref[I18n]]
+        ]()
+        self._by_result = defaultdict[ResourceLocation, set[ResourceLocation]](set)
+        self._by_ingredient = defaultdict[ResourceLocation, set[ResourceLocation]](set)
+
+    @property
+    def loader(self) -> ModResourceLoader:
+        if (loader := self._loader()) is None:
+            raise RuntimeError("ModResourceLoader has already been garbage collected")
+        return loader
+
+    @classmethod
+    def of(cls, loader: ModResourceLoader) -> RecipeIndex:
+        if (index := _RECIPE_INDEXES.get(loader)) is None:
+            index = _RECIPE_INDEXES[loader] = cls(loader)
+        return index
+
+    @property
+    def recipes(self) -> dict[ResourceLocation, tuple[PathResourceDir, JSONDict]]:
+        """The resource dir and raw data for every indexed recipe, by id.
+
+        This data is shared, so it should not be modified.
+        """
+        return self._load()
+
+    def __contains__(self, id: Any) -> bool:
+        if isinstance(id, BaseResourceLocation):
+            return id.id in self.recipes
+        return NotImplemented
+
+    def __iter__(self) -> Iterator[ResourceLocation]:
+        return iter(self.recipes)
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def load_resource(self, id: ResourceLocation) -> tuple[PathResourceDir, JSONDict]:
+        """Returns the resource dir and raw data for a recipe.
+
+        Recipes which aren't in the index (ie. from external resource dirs) are loaded
+        the first time they're requested.
+
+        Raises FileNotFoundError if the recipe does not exist, or ValueError if it
+        failed to decode.
+        """
+        id = id.id
+        recipes = self._load()
+        if (recipe := recipes.get(id) or self._unindexed.get(id)) is None:
+            recipe = self._load_unindexed(id)
+        resource_dir, data = recipe
+
+        # the bulk load doesn't export anything, so only recipes which are actually
+        # used end up in the export dir (the decoded file is already cached)
+        if resource_dir.reexport and id not in self._exported:
+            self._exported.add(id)
+            self.loader.load_resource("data", "recipes", id)
+
+        return resource_dir, data
+
+    def load_model(
+        self,
+        cls: type[_T_IDModel],
+        id: ResourceLocation,
+        context: dict[str, Any],
+    ) -> _T_IDModel:
+        """Returns the validated `cls` model for a recipe.
+
+        Models are cached per id, and reused as long as the context has the same I18n
+        instance as the one they were validated with.
+        """
+        id = id.id
+        i18n = I18n.of(context)
+        key = (cls, id)
+
+        if (cached := self._models.get(key)) is not None:
+            model, i18n_ref = cached
+            if i18n_ref() is i18n:
+                return model
+
+        resource_dir, data = self.load_resource(id)
+        model = cls.load(resource_dir, id, data, context)
+        self._models[key] = (model, ref(i18n))
+        return model
+
+    def by_result(self, item: BaseResourceLocation) -> list[ResourceLocation]:
+        """Returns the ids of all indexed recipes which produce `item`, sorted by id."""
+        self._load()
+        return _sorted_ids(self._by_result.get(item.id, ()))
+
+    def by_ingredient(self, item: BaseResourceLocation) -> list[ResourceLocation]:
+        """Returns the ids of all indexed recipes which use `item` as an ingredient,
+        either directly or through a tag, sorted by id."""
+        self._load()
+        return _sorted_ids(self._by_ingredient.get(item.id, ()))
+
+    def _load(self) -> dict[ResourceLocation, tuple[PathResourceDir, JSONDict]]:
+        if self._recipes is not None:
+            return self._recipes
+
+        # only internal recipes are indexed, since external mods (or Minecraft itself)
+        # can have thousands of recipes that the book never uses
+        # the same id may be in several resource dirs, but only the highest priority
+        # file (the one returned by load_resource) needs to be decoded
+        ids = dict.fromkeys(
+            id
+            for _, id, _ in self.loader.find_resources(
+                "data",
+                namespace="*",
+                folder="recipes",
+                allow_missing=True,
+                internal_only=True,
+            )
+        )
+
+        # decode each file separately, so one broken recipe doesn't stop every other
+        # recipe from loading
+        recipes = dict[ResourceLocation, tuple[PathResourceDir, JSONDict]]()
+        for id in ids:
+            if (recipe := self._decode(id)) is not None:
+                recipes[id] = recipe
+
+        tags = TagRegistry.of(self.loader)
+        for id, (_, data) in recipes.items():
+            try:
+                for item_id in _result_ids(data):
+                    self._by_result[item_id].add(id)
+                for item_id in _ingredient_ids(data, tags):
+                    self._by_ingredient[item_id].add(id)
+            except ValueError as e:
+                logger.debug(f"Failed to index recipe {id}: {e}")
+
+        logger.debug(f"Loaded {len(recipes)} recipes ({len(self._errors)} failed)")
+        self._recipes = recipes
+        return recipes
+
+    def _load_unindexed(self, id: ResourceLocation):
+        if id not in self._missing and id not in self._errors:
+            if (recipe := self._decode(id)) is not None:
+                self._unindexed[id] = recipe
+                return recipe
+
+        # raise a new error each time, rather than reusing the original exception
+        # (and its traceback) for every request
+        if id in self._missing:
+            raise FileNotFoundError(f"Recipe not found: {id}")
+        raise ValueError(f"Failed to load recipe {id}: {self._errors[id]}")
+
+    def _decode(self, id: ResourceLocation):
+        try:
+            return self.loader.load_resource("data", "recipes", id, export=False)
+        except FileNotFoundError:
+            self._missing.add(id)
+        except Exception as e:
+            logger.warning(f"Failed to load recipe {id}: {e}")
+            self._errors[id] = str(e)
+
+
+def _sorted_ids(ids: Iterable[ResourceLocation]) -> list[ResourceLocation]:
+    return sorted(ids, key=str)
+
+
+def _result_ids(data: JSONDict) -> Iterator[ResourceLocation]:
+    match data.get("result"):
+        case str(result):
+            yield ItemStack.from_str(result).id
+        case {"item": str(result)} | {"id": str(result)}:
+            yield ItemStack.from_str(result).id
+        case _:
+            pass
+
+
+def _ingredient_ids(data: JSONDict, tags: TagRegistry) -> Iterator[ResourceLocation]:
+    for key in _INGREDIENT_KEYS:
+        match data.get(key):
+            case dict(value) if key == "key":
+                for ingredient in value.values():
+                    yield from _item_ids(ingredient, tags)
+            case None:
+                pass
+            case value:
+                yield from _item_ids(value, tags)
+
+
+def _item_ids(value: Any, tags: TagRegistry) -> Iterator[ResourceLocation]:
+    match value:
+        case [*ingredients]:
+            for ingredient in ingredients:
+                yield from _item_ids(ingredient, tags)
+        case {"item": str(item)} | str(item):
+            yield ItemStack.from_str(item).id
+        case {"tag": str(tag_id)}:
+            if tag := tags.get("items", ResourceLocation.from_str(tag_id)):
+                for item_id in tag.value_ids:
+                    if not item_id.is_tag:
+                        yield item_id
+        case _:
+            pass
@@ -14,7 +14,7 @@ from hexdoc.model import HexdocModel, NoValue, TypeTaggedUnion
 from hexdoc.utils import listify
 
 from ..assets import ItemWithTexture, TagWithTexture
-from ..tags import Tag
+from ..tags import TagRegistry
 
 
 class ItemIngredient(TypeTaggedUnion):
@@ -51,23 +51,25 @@ def _validate_flatten_nested_tags(
     ingredients: list[ItemIngredient],
     info: ValidationInfo,
 ) -> Iterator[ItemIngredient]:
-    loader = ModResourceLoader.of(info)
+    tags = TagRegistry.of(ModResourceLoader.of(info))
     for ingredient in ingredients:
         yield ingredient
 
         if isinstance(ingredient, MinecraftItemTagIngredient):
-            yield from _items_in_tag(ingredient.tag.id, info, loader)
+            yield from _items_in_tag(ingredient.tag.id, info, tags, set())
 
 
 def _items_in_tag(
     tag_id: ResourceLocation,
     info: ValidationInfo,
-    loader: ModResourceLoader,
+    tags: TagRegistry,
+    visited: set[ResourceLocation],
 ) -> Iterator[ItemIngredient]:
-    try:
-        tag = Tag.load("items", tag_id, loader)
-    except FileNotFoundError:
+    # nested tags are already flattened by the registry, so this only recurses for
+    # values that aren't valid items (eg. missing tags)
+    if tag_id.id in visited or not (tag := tags.get("items", tag_id)):
         return
+    visited.add(tag_id.id)
 
     for id in tag.value_ids:
         try:
@@ -76,7 +78,7 @@ def _items_in_tag(
                 context=info.context,
             )
         except ValidationError:
-            yield from _items_in_tag(id, info, loader)
+            yield from _items_in_tag(id, info, tags, visited)
 
 
 ItemIngredientList = Annotated[
@@ -1,4 +1,4 @@
-from typing import Iterator
+from typing import Any, Iterator, Self
 
 from pydantic import Field
 
@@ -11,6 +11,7 @@ from hexdoc.core.compat import AtLeast_1_20, Before_1_20
 from hexdoc.model import ResourceModel, TypeTaggedUnion
 
 from ..assets import ItemWithTexture
+from .index import RecipeIndex
 from .ingredients import ItemIngredient, ItemIngredientList, ItemResult
 
 
@@ -26,9 +27,14 @@ class Recipe(TypeTaggedUnion, ResourceModel):
         default_factory=lambda: ValueIfVersion(">=1.20", True, None)()
     )
 
+    @classmethod
+    def load_id(cls, id: ResourceLocation, context: dict[str, Any]) -> Self:
+        loader = ModResourceLoader.of(context)
+        return RecipeIndex.of(loader).load_model(cls, id, context)
+
     @classmethod
     def load_resource(cls, id: ResourceLocation, loader: ModResourceLoader):
-        return loader.load_resource("data", "recipes", id)
+        return RecipeIndex.of(loader).load_resource(id)
 
 
 class CraftingRecipe(Recipe):
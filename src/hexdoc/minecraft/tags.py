@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import functools
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any, ClassVar, Iterator, Self
+from functools import cached_property
+from typing import Any, Callable, ClassVar, Iterator, Self
+from weakref import WeakKeyDictionary, ref
 
 from pydantic import Field
 
-from hexdoc.core import ModResourceLoader, ResourceLocation
+from hexdoc.core import MergeExport, ModResourceLoader, ResourceLocation
 from hexdoc.core.resource import BaseResourceLocation
 from hexdoc.model import HexdocModel
 from hexdoc.utils import PydanticOrderedSet, decode_json_dict
@@ -59,27 +63,19 @@ class Tag(HexdocModel):
         registry: str,
         id: ResourceLocation,
         loader: ModResourceLoader,
-    ) -> Self:
-        values = PydanticOrderedSet[TagValue]()
-        replace = False
-
-        for _, _, tag in loader.load_resources(
-            "data",
-            folder=f"tags/{registry}",
-            id=id,
-            decode=lambda raw_data: Tag._convert(
-                registry=registry,
-                raw_data=raw_data,
-            ),
-            # TODO: i have no idea why pyright doesn't like this.
-            export=cls._export,  # pyright: ignore[reportGeneralTypeIssues]
-        ):
-            if tag.replace:
-                values.clear()
-            for value in tag._load_values(loader):
-                values.add(value)
-
-        return cls(registry=registry, values=values, replace=replace)
+    ) -> Tag:
+        """Loads a tag and all of the tags it references.
+
+        Results are cached per loader (see `TagRegistry`), so the returned tag should
+        not be modified.
+        """
+        return TagRegistry.of(loader).load(registry, id)
+
+    @staticmethod
+    @functools.cache
+    def _decoder(registry: str) -> Callable[[str], Tag]:
+        # reuse the same function for each registry so the loader can cache it
+        return lambda raw_data: Tag._convert(registry=registry, raw_data=raw_data)
 
     @classmethod
     def _convert(cls, *, registry: str, raw_data: str) -> Self:
@@ -95,9 +91,9 @@ class Tag(HexdocModel):
                 case OptionalTagValue(id=id):
                     yield id
 
-    @property
-    def value_ids_set(self):
-        return set(self.value_ids)
+    @cached_property
+    def value_ids_set(self) -> frozenset[ResourceLocation]:
+        return frozenset(self.value_ids)
 
     def __ror__(self, other: set[ResourceLocation]):
         new = set(other)
@@ -109,26 +105,122 @@ class Tag(HexdocModel):
             return x.id in self.value_ids_set
         return NotImplemented
 
-    def _export(self, current: Self | None):
+    def _merge_export(self, current: Self | None) -> Self:
         if self.replace or current is None:
-            tag = self
-        else:
-            tag = self.model_copy(
-                update={"raw_values": current.values | self.values},
-            )
-        return tag.model_dump_json(by_alias=True)
-
-    def _load_values(self, loader: ModResourceLoader) -> Iterator[TagValue]:
-        for value in self.values:
-            match value:
-                case (
-                    (ResourceLocation() as child_id)
-                    | OptionalTagValue(id=child_id)
-                ) if child_id.is_tag:
-                    try:
-                        child = Tag.load(self.registry, child_id, loader)
-                        yield from child._load_values(loader)
-                    except FileNotFoundError:
-                        yield value
-                case _:
+            return self
+        return self.model_copy(
+            update={"raw_values": current.values | self.values},
+        )
+
+    def _dump_export(self) -> str:
+        return self.model_dump_json(by_alias=True)
+
+
+_TagKey = tuple[str, ResourceLocation]
+
+_TAG_REGISTRIES = WeakKeyDictionary[ModResourceLoader, "TagRegistry"]()
+
+
+class TagRegistry:
+    """Loads and resolves tags for a single `ModResourceLoader`.
+
+    Each tag is only loaded once, including tags that are referenced by other tags.
+    Nested references are flattened into the parent tag's values, and circular
+    references raise a `ValueError`.
+
+    Use `TagRegistry.of(loader)` to get the shared instance for a loader.
+    """
+
+    def __init__(self, loader: ModResourceLoader):
+        # weak, since this is the value for the loader's key in a WeakKeyDictionary
+        self._loader = ref(loader)
+        self._tags = dict[_TagKey, Tag | None]()
+        self._tags_containing = defaultdict[_TagKey, set[ResourceLocation]](set)
+
+    @property
+    def loader(self) -> ModResourceLoader:
+        if (loader := self._loader()) is None:
+            raise RuntimeError("ModResourceLoader has already been garbage collected")
+        return loader
+
+    @classmethod
+    def of(cls, loader: ModResourceLoader) -> TagRegistry:
+        if (tags := _TAG_REGISTRIES.get(loader)) is None:
+            tags = _TAG_REGISTRIES[loader] = cls(loader)
+        return tags
+
+    def load(self, registry: str, id: ResourceLocation) -> Tag:
+        """Returns the resolved tag, or raises FileNotFoundError if it doesn't exist."""
+        if (tag := self.get(registry, id)) is None:
+            raise FileNotFoundError(f"Tag not found: {registry}/{id}")
+        return tag
+
+    def get(self, registry: str, id: ResourceLocation) -> Tag | None:
+        """Returns the resolved tag, or None if it doesn't exist."""
+        return self._resolve(registry, id, ())
+
+    def tags_containing(
+        self,
+        registry: str,
+        id: ResourceLocation,
+    ) -> frozenset[ResourceLocation]:
+        """Returns the ids of every tag which has been loaded so far that contains `id`,
+        either directly or through a nested tag."""
+        return frozenset(self._tags_containing.get((registry, id.id), ()))
+
+    def _resolve(
+        self,
+        registry: str,
+        id: ResourceLocation,
+        stack: tuple[_TagKey, ...],
+    ) -> Tag | None:
+        key = (registry, id.id)
+        if key in self._tags:
+            return self._tags[key]
+
+        if key in stack:
+            cycle = " -> ".join(f"#{tag_id}" for _, tag_id in stack + (key,))
+            raise ValueError(f"Circular tag reference in {registry}: {cycle}")
+        stack += (key,)
+
+        values = PydanticOrderedSet[TagValue]()
+        try:
+            for _, _, tag in self.loader.load_resources(
+                "data",
+                folder=f"tags/{registry}",
+                id=id,
+                decode=Tag._decoder(registry),
+                export=MergeExport(Tag._merge_export, Tag._dump_export),
+            ):
+                if tag.replace:
+                    values.clear()
+                for value in tag.values:
+                    values.update(self._resolve_value(registry, value, stack))
+        except FileNotFoundError:
+            self._tags[key] = None
+            return None
+
+        resolved = Tag(registry=registry, values=values)
+        for value_id in resolved.value_ids_set:
+            self._tags_containing[registry, value_id.id].add(key[1])
+
+        self._tags[key] = resolved
+        return resolved
+
+    def _resolve_value(
+        self,
+        registry: str,
+        value: TagValue,
+        stack: tuple[_TagKey, ...],
+    ) -> Iterator[TagValue]:
+        match value:
+            case (
+                (ResourceLocation() as child_id)
+                | OptionalTagValue(id=child_id)
+            ) if child_id.is_tag:
+                if child := self._resolve(registry, child_id, stack):
+                    yield from child.values
+                else:
                     yield value
+            case _:
+                yield value
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from contextvars import ContextVar
 from typing import Any, ClassVar, Generator, Self, Unpack
 
 import more_itertools
@@ -25,7 +26,9 @@ from .base import HexdocModel
 
 TagValue = str | NoValueType
 
-_RESOLVED = "__resolved"
+_resolving = ContextVar[Any]("_resolving", default=None)
+"""The dict currently being validated by `_resolve_from_dict`, so that the nested call
+for the matching subtype knows not to resolve it again."""
 
 # sentinel value to check if we already loaded the tagged union subtypes hook
 _is_loaded = False
@@ -54,6 +57,7 @@ class InternallyTaggedUnion(HexdocModel):
     # per-class
     __all_subtypes: ClassVar[set[type[Self]]]
     __concrete_subtypes: ClassVar[defaultdict[TagValue, set[type[Self]]]]
+    __candidates: ClassVar[dict[TagValue, tuple[type[Self], ...]]]
 
     def __init_subclass__(
         cls,
@@ -81,12 +85,14 @@ class InternallyTaggedUnion(HexdocModel):
         # per-class data and lookups
         cls.__all_subtypes = set()
         cls.__concrete_subtypes = defaultdict(set)
+        cls.__candidates = {}
 
         # add to all the parents
         for supertype in cls._supertypes():
             supertype.__all_subtypes.add(cls)
             if cls._tag_value is not None:
                 supertype.__concrete_subtypes[cls._tag_value].add(cls)
+                supertype.__candidates.pop(cls._tag_value, None)
 
     @classmethod
     def _tag_key_or_raise(cls) -> str:
@@ -94,6 +100,18 @@ class InternallyTaggedUnion(HexdocModel):
             raise NotImplementedError
         return cls._tag_key
 
+    @classmethod
+    def _tag_candidates(cls, tag_value: TagValue) -> tuple[type[Self], ...] | None:
+        """Returns the concrete subtypes for a tag value, in a consistent order."""
+        if (candidates := cls.__candidates.get(tag_value)) is None:
+            if (tag_types := cls.__concrete_subtypes.get(tag_value)) is None:
+                return None
+            candidates = tuple(
+                sorted(tag_types, key=lambda t: (t.__module__, t.__qualname__))
+            )
+            cls.__candidates[tag_value] = candidates
+        return candidates
+
     @classmethod
     def _supertypes(cls) -> Generator[type[InternallyTaggedUnion], None, None]:
         tag_key = cls._tag_key_or_raise()
@@ -130,17 +148,16 @@ class InternallyTaggedUnion(HexdocModel):
         match value:
             case InternallyTaggedUnion() if isinstance(value, cls):
                 return value
-            case dict() if _RESOLVED not in value:
+            case dict() if value is not _resolving.get():
                 data: dict[str, Any] = value
-                data[_RESOLVED] = True
             case _:
                 return handler(value)
 
         # tag value, eg. "minecraft:crafting_shaped"
         tag_value = data.get(tag_key, NoValue)
 
-        # list of matching types, eg. [ShapedCraftingRecipe, ModConditionalShapedCraftingRecipe]
-        tag_types = cls.__concrete_subtypes.get(tag_value)
+        # matching types, eg. (ShapedCraftingRecipe, ModConditionalShapedCraftingRecipe)
+        tag_types = cls._tag_candidates(tag_value)
         if tag_types is None:
             raise TypeError(f"Unhandled tag: {tag_key}={tag_value} for {cls}: {data}")
 
@@ -148,29 +165,36 @@ class InternallyTaggedUnion(HexdocModel):
         exceptions: list[InitErrorDetails] = []
         matches: dict[type[Self], Self] = {}
 
-        for inner_type in tag_types:
-            try:
-                matches[inner_type] = inner_type.model_validate(
-                    data, context=info.context
-                )
-            except Exception as e:
-                exceptions.append(
-                    InitErrorDetails(
-                        type=PydanticCustomError(
-                            "TaggedUnionMatchError",
-                            "{exception_class}: {exception}",
-                            {
-                                "exception_class": e.__class__.__name__,
-                                "exception": str(e),
-                            },
-                        ),
-                        loc=(
-                            cls.__name__,
-                            inner_type.__name__,
-                        ),
-                        input=data,
+        token = _resolving.set(data)
+        try:
+            for inner_type in tag_types:
+                try:
+                    result = inner_type.model_validate(data, context=info.context)
+                except Exception as e:
+                    exceptions.append(
+                        InitErrorDetails(
+                            type=PydanticCustomError(
+                                "TaggedUnionMatchError",
+                                "{exception_class}: {exception}",
+                                {
+                                    "exception_class": e.__class__.__name__,
+                                    "exception": str(e),
+                                },
+                            ),
+                            loc=(
+                                cls.__name__,
+                                inner_type.__name__,
+                            ),
+                            input=data,
+                        )
                     )
-                )
+                else:
+                    # most tags only have one type, so don't bother checking the rest
+                    if len(tag_types) == 1:
+                        return result
+                    matches[inner_type] = result
+        finally:
+            _resolving.reset(token)
 
         # ensure we only matched one
         match len(matches):
@@ -202,8 +226,6 @@ class InternallyTaggedUnion(HexdocModel):
         )
 
         if exceptions:
-            if _RESOLVED in data:
-                data.pop(_RESOLVED)  # avoid interfering with other types
             exceptions.insert(
                 0,
                 InitErrorDetails(
@@ -220,12 +242,10 @@ class InternallyTaggedUnion(HexdocModel):
 
     @model_validator(mode="before")
     def _pop_temporary_keys(cls, value: dict[Any, Any] | Any):
-        if isinstance(value, dict) and _RESOLVED in value:
-            # copy because this validator may be called multiple times
-            # eg. two types with the same key
-            value = value.copy()
-            value.pop(_RESOLVED)
-            assert value.pop(cls._tag_key, NoValue) == cls._tag_value
+        if isinstance(value, dict):
+            # don't modify the input, since it may be validated by other types
+            assert value.get(cls._tag_key, NoValue) == cls._tag_value
+            value = {k: v for k, v in value.items() if k != cls._tag_key}
         return value
 
 
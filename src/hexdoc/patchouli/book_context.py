@@ -1,6 +1,8 @@
+from functools import cached_property
+
 from yarl import URL
 
-from hexdoc.core import ResourceDir, ResourceLocation
+from hexdoc.core import ResourceDir, ResourceLocation, ResourceLocationPatternSet
 from hexdoc.data import HexdocMetadata
 from hexdoc.model import ValidationContextModel
 from hexdoc.patchouli.text import BookLinkBases
@@ -13,6 +15,10 @@ class BookContext(ValidationContextModel):
     spoilered_advancements: set[ResourceLocation]
     all_metadata: dict[str, HexdocMetadata]
 
+    @cached_property
+    def spoilered_advancement_patterns(self):
+        return ResourceLocationPatternSet(self.spoilered_advancements)
+
     def get_link_base(self, resource_dir: ResourceDir) -> URL:
         modid = resource_dir.modid
         if modid is None or modid == self.modid:
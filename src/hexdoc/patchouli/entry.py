@@ -101,10 +101,7 @@ class Entry(IDModel, Sortable):
             return self
         book_ctx = BookContext.of(info)
 
-        self.is_spoiler = any(
-            self.advancement.match(spoiler)
-            for spoiler in book_ctx.spoilered_advancements
-        )
+        self.is_spoiler = self.advancement in book_ctx.spoilered_advancement_patterns
         return self
 
 
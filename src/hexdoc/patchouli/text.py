@@ -3,9 +3,21 @@
 from __future__ import annotations
 
 import re
+from collections import OrderedDict
 from enum import Enum, auto
 from fnmatch import fnmatch
-from typing import Literal, Self, final
+from functools import cached_property, lru_cache, partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Self,
+    final,
+)
 
 from jinja2 import pass_context
 from jinja2.runtime import Context
@@ -67,6 +79,17 @@ BookLinkBases = dict[tuple[ResourceLocation, str | None], PydanticURL]
 class FormattingContext(ValidationContextModel):
     book_id: ResourceLocation
     macros: dict[str, str]
+    eager: bool = True
+    """If True (the default), FormatTrees are parsed during validation, so any errors
+    in the formatting codes (eg. invalid links) are raised immediately.
+
+    Set this to False to only parse them when they're first used. This is faster if
+    most text is never rendered, but errors won't be raised until then.
+    """
+
+    @cached_property
+    def macro_expander(self) -> MacroExpander:
+        return MacroExpander.compile(self.macros)
 
 
 class BookLink(HexdocModel):
@@ -165,6 +188,11 @@ class Style(HexdocModel, frozen=True):
         is_0_black: bool,
         link_overrides: dict[str, str],
     ) -> Style | _CloseTag | str:
+        """Parses the contents of a single style tag, eg. `l:foo` for `$(l:foo)`.
+
+        `FormatTree.format` uses a faster table-driven parser, which must return the
+        same results as this method.
+        """
         # direct text replacements
         if style_str in _REPLACEMENTS:
             return _REPLACEMENTS[style_str]
@@ -323,6 +351,269 @@ class _CloseTag(HexdocModel, frozen=True):
 
 STYLE_REGEX = re.compile(r"\$\(([^)]*)\)")
 
+_BASE_STYLE = CommandStyle.model_construct(type=SpecialStyleType.base)
+
+_PARAGRAPH_STYLE = ParagraphStyle.model_construct(
+    subtype=ParagraphStyleSubtype.paragraph
+)
+
+
+def _build_style_table(is_0_black: bool) -> dict[str, Style | _CloseTag | str]:
+    """Returns every style which can be looked up directly by its string.
+
+    Entries are added from lowest to highest priority (ie. the reverse of the order
+    in `Style.parse`), so that later entries win if there's any overlap.
+    """
+    table: dict[str, Style | _CloseTag | str] = {}
+
+    for style_type in FunctionStyleType:
+        table[f"/{style_type.value}"] = _CloseTag.model_construct(type=style_type)
+    table[f"/{SpecialStyleType.link.value}"] = _CloseTag.model_construct(
+        type=SpecialStyleType.link
+    )
+    table[""] = _CloseTag.model_construct(type=SpecialStyleType.base)
+
+    for key, value in _COLORS.items():
+        table[key] = _color_style(value)
+    if not is_0_black:
+        table["0"] = _CloseTag.model_construct(type=SpecialStyleType.color)
+
+    for style_type in CommandStyleType:
+        table[style_type.value] = CommandStyle.model_construct(type=style_type)
+
+    table["br2"] = _PARAGRAPH_STYLE
+    table["li"] = ParagraphStyle.model_construct(
+        subtype=ParagraphStyleSubtype.list_item
+    )
+
+    table |= _REPLACEMENTS
+    return table
+
+
+@lru_cache(maxsize=256)
+def _color_style(value: str) -> FunctionStyle:
+    return FunctionStyle.model_construct(type=SpecialStyleType.color, value=value)
+
+
+def _function_style(style_type: FunctionStyleType, value: str) -> FunctionStyle:
+    return FunctionStyle.model_construct(type=style_type, value=value)
+
+
+def _trusted_tree(style: Style, children: list[FormatTree | str]) -> FormatTree:
+    """Creates a FormatTree without validating it. Only use this for trees built by
+    the parser, where we already know the types are correct."""
+    tree = object.__new__(FormatTree)
+    tree.style = style
+    tree.children = children
+    tree.raw = None
+    return tree
+
+
+_STYLE_TABLES = {
+    is_0_black: _build_style_table(is_0_black) for is_0_black in [False, True]
+}
+
+# private use characters, which shouldn't appear in lang files
+_KEY_START = "\ue000"
+_KEY_END = "\ue001"
+_KEY_PLACEHOLDER_REGEX = re.compile(f"{_KEY_START}(.*?){_KEY_END}")
+
+
+def _resolve_keys(tree: FormatTree, i18n: I18n) -> FormatTree:
+    """Returns a copy of a tree from `_FormatParser` where each keybind placeholder has
+    been localized with `i18n`. Subtrees without any placeholders are shared."""
+
+    def replace(match: re.Match[str]):
+        return str(i18n.localize_key(match[1]))
+
+    def visit(node: FormatTree) -> FormatTree:
+        children = list[FormatTree | str]()
+        changed = False
+        for child in node.children:
+            if isinstance(child, str):
+                new_child = _KEY_PLACEHOLDER_REGEX.sub(replace, child)
+            else:
+                new_child = visit(child)
+            changed = changed or new_child is not child
+            children.append(new_child)
+
+        if not changed:
+            return node
+        new_node = _trusted_tree(node.style, children)
+        new_node.raw = node.raw
+        return new_node
+
+    return visit(tree)
+
+
+class _FormatParser:
+    """Converts a string with Patchouli formatting codes into a FormatTree.
+
+    This scans the string once, building the tree as it goes. Most styles are looked
+    up in a prebuilt table of shared instances; the rest are dispatched by function
+    name. Macros must be expanded before calling `parse`.
+
+    Keybinds (`$(k:...)`) depend on the language, so they're replaced with placeholders
+    which must be resolved with `_resolve_keys`.
+    """
+
+    def __init__(
+        self,
+        book_id: ResourceLocation,
+        is_0_black: bool,
+        link_overrides: dict[str, str],
+    ):
+        self._table = _STYLE_TABLES[is_0_black]
+        self.has_keys = False
+        self._functions: dict[str, Callable[[str], Style | str]] = {
+            "k": self._key_placeholder,
+            SpecialStyleType.link.value: lambda value: LinkStyle.from_str(
+                value, book_id, link_overrides
+            ),
+        }
+        for style_type in FunctionStyleType:
+            self._functions[style_type.value] = partial(_function_style, style_type)
+
+    def parse(self, string: str) -> FormatTree:
+        root = _trusted_tree(_BASE_STYLE, [])
+        style_stack = [root, _trusted_tree(_PARAGRAPH_STYLE, [])]
+
+        # text since the previous style, and the style it belongs to
+        text_parts: list[str] = []
+        style: Style | _CloseTag | None = None
+
+        pos = 0
+        while (start := string.find("$(", pos)) >= 0 and (
+            end := string.find(")", start + 2)
+        ) >= 0:
+            text_parts.append(string[pos:start])
+            pos = end + 1
+
+            match self._parse_style(string[start + 2 : end]):
+                case str(replacement):
+                    text_parts.append(replacement)
+                case next_style:
+                    self._push(style_stack, style, "".join(text_parts))
+                    style = next_style
+                    text_parts.clear()
+
+        text_parts.append(string[pos:])
+        self._push(style_stack, style, "".join(text_parts))
+
+        while len(style_stack) >= 2:
+            last_node = style_stack.pop()
+            style_stack[-1].children.append(last_node)
+
+        return root
+
+    def _key_placeholder(self, value: str) -> str:
+        self.has_keys = True
+        return f"{_KEY_START}{value}{_KEY_END}"
+
+    def _parse_style(self, style_str: str) -> Style | _CloseTag | str:
+        if (style := self._table.get(style_str)) is not None:
+            return style
+
+        # hex colors (#rgb and #rrggbb)
+        if style_str.startswith("#") and len(style_str) in (4, 7):
+            return _color_style(style_str[1:])
+
+        # functions
+        name, sep, value = style_str.partition(":")
+        if sep and (function := self._functions.get(name)):
+            return function(value)
+
+        raise ValueError(f"Unhandled style: {style_str}")
+
+    def _push(
+        self,
+        style_stack: list[FormatTree],
+        style: Style | _CloseTag | None,
+        text: str,
+    ):
+        # text before the first style
+        if style is None:
+            style_stack[-1].children.append(text)
+            return
+
+        tmp_stylestack: list[Style] = []
+        if style.type == SpecialStyleType.base:
+            while style_stack[-1].style.type != SpecialStyleType.paragraph:
+                last_node = style_stack.pop()
+                style_stack[-1].children.append(last_node)
+        elif any(tree.style.type == style.type for tree in style_stack):
+            while len(style_stack) >= 2:
+                last_node = style_stack.pop()
+                style_stack[-1].children.append(last_node)
+                if last_node.style.type == style.type:
+                    break
+                tmp_stylestack.append(last_node.style)
+
+        for sty in tmp_stylestack:
+            style_stack.append(_trusted_tree(sty, []))
+
+        if isinstance(style, _CloseTag):
+            if text:
+                style_stack[-1].children.append(text)
+        else:
+            style_stack.append(_trusted_tree(style, [text] if text else []))
+
+
+FORMAT_CACHE_SIZE = 4096
+"""Maximum number of trees to keep in the cache for `FormatTree.format`."""
+
+
+class FormatTreeCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _FormatTreeCache:
+    """Least-recently-used cache of formatted trees.
+
+    Each entry also records whether the tree contains keybind placeholders, which need
+    to be localized for each caller (see `_resolve_keys`).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._trees = OrderedDict[Hashable, "tuple[FormatTree, bool]"]()
+
+    def get(self, key: Hashable) -> tuple[FormatTree, bool] | None:
+        if (entry := self._trees.get(key)) is None:
+            self.misses += 1
+            return None
+
+        self._trees.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, entry: tuple[FormatTree, bool]):
+        self._trees[key] = entry
+        self._trees.move_to_end(key)
+        if len(self._trees) > self.maxsize:
+            self._trees.popitem(last=False)
+
+    def info(self) -> FormatTreeCacheInfo:
+        return FormatTreeCacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._trees),
+        )
+
+    def clear(self):
+        self._trees.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_FORMAT_CACHE = _FormatTreeCache(FORMAT_CACHE_SIZE)
+
 
 @final
 @dataclass(config=DEFAULT_CONFIG)
@@ -342,73 +633,133 @@ class FormatTree:
         is_0_black: bool,
         pm: PluginManager,
         link_overrides: dict[str, str],
+        macro_expander: MacroExpander | None = None,
     ) -> Self:
-        for macro, replace in macros.items():
-            if macro in replace:
-                raise RuntimeError(
-                    f"Recursive macro: replacement `{replace}` is matched by key `{macro}`"
-                )
+        """Parses a string containing Patchouli formatting codes.
+
+        Results are cached (see `cache_info`), so the returned tree may be shared with
+        other callers and must not be modified. The cache doesn't depend on `i18n`, so
+        the same string is only parsed once for every language; keybinds (`$(k:...)`)
+        are localized after the lookup.
+
+        If provided, `macro_expander` must be compiled from `macros`.
+        """
+        if macro_expander is None:
+            macro_expander = MacroExpander.compile(macros)
+
+        key = (
+            string,
+            book_id,
+            macro_expander,
+            is_0_black,
+            tuple(link_overrides.items()),
+            pm,
+        )
+        if (entry := _FORMAT_CACHE.get(key)) is None:
+            entry = cls._format(
+                string,
+                book_id=book_id,
+                i18n=i18n,
+                macros=macros,
+                is_0_black=is_0_black,
+                pm=pm,
+                link_overrides=link_overrides,
+                macro_expander=macro_expander,
+            )
+            _FORMAT_CACHE.put(key, entry)
+
+        tree, has_keys = entry
+        if has_keys:
+            return _resolve_keys(tree, i18n)  # pyright: ignore[reportReturnType]
+        return tree
 
-        working_string = resolve_macros(string, macros)
+    @classmethod
+    def lazy(
+        cls,
+        string: str,
+        *,
+        book_id: ResourceLocation,
+        i18n: I18n,
+        macros: dict[str, str],
+        is_0_black: bool,
+        pm: PluginManager,
+        link_overrides: dict[str, str],
+        macro_expander: MacroExpander | None = None,
+    ) -> Self:
+        """Like `format`, but the string isn't parsed until the first time `style` or
+        `children` is accessed.
+
+        This means that errors in the formatting codes won't be raised until then.
+        """
+        tree = object.__new__(cls)
+        tree.raw = string
+        tree.__dict__["_pending"] = partial(
+            cls.format,
+            string,
+            book_id=book_id,
+            i18n=i18n,
+            macros=macros,
+            is_0_black=is_0_black,
+            pm=pm,
+            link_overrides=link_overrides,
+            macro_expander=macro_expander,
+        )
+        return tree
 
-        # lex out parsed styles
-        text_nodes: list[str] = []
-        styles: list[Style | _CloseTag] = []
-        text_since_prev_style: list[str] = []
-        last_end = 0
+    @property
+    def is_parsed(self) -> bool:
+        return "_pending" not in self.__dict__
+
+    def relocalize(self, i18n: I18n) -> FormatTree:
+        """Returns a new tree, parsed from the same lang key in another language.
+
+        Only trees created by validating a model field can be relocalized. Other trees
+        are returned unchanged.
+        """
+        if (source := self.__dict__.get("_source")) is None:
+            return self
+        return source(i18n)
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # only called if the attribute doesn't exist, ie. for a lazy tree's fields
+            if name in ("style", "children") and "_pending" in self.__dict__:
+                tree = self.__dict__["_pending"]()
+                self.style = tree.style
+                self.children = tree.children
+                del self.__dict__["_pending"]
+                return self.__dict__[name]
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
 
-        for match in re.finditer(STYLE_REGEX, working_string):
-            # get the text between the previous match and here
-            leading_text = working_string[last_end : match.start()]
-            text_since_prev_style.append(leading_text)
-            last_end = match.end()
+    @classmethod
+    def cache_info(cls) -> FormatTreeCacheInfo:
+        """Returns hits, misses, and size for the cache used by `format`."""
+        return _FORMAT_CACHE.info()
 
-            match Style.parse(match[1], book_id, i18n, is_0_black, link_overrides):
-                case str(replacement):
-                    # str means "use this instead of the original value"
-                    text_since_prev_style.append(replacement)
-                case Style() | _CloseTag() as style:
-                    # add this style and collect the text since the previous one
-                    styles.append(style)
-                    text_nodes.append("".join(text_since_prev_style))
-                    text_since_prev_style.clear()
-
-        text_nodes.append("".join(text_since_prev_style) + working_string[last_end:])
-        first_node = text_nodes.pop(0)
-
-        # parse
-        style_stack = [
-            FormatTree(CommandStyle(type=SpecialStyleType.base), []),
-            FormatTree(ParagraphStyle.paragraph(), [first_node]),
-        ]
-        for style, text in zip(styles, text_nodes):
-            tmp_stylestack: list[Style] = []
-            if style.type == SpecialStyleType.base:
-                while style_stack[-1].style.type != SpecialStyleType.paragraph:
-                    last_node = style_stack.pop()
-                    style_stack[-1].children.append(last_node)
-            elif any(tree.style.type == style.type for tree in style_stack):
-                while len(style_stack) >= 2:
-                    last_node = style_stack.pop()
-                    style_stack[-1].children.append(last_node)
-                    if last_node.style.type == style.type:
-                        break
-                    tmp_stylestack.append(last_node.style)
-
-            for sty in tmp_stylestack:
-                style_stack.append(FormatTree(sty, []))
-
-            if isinstance(style, _CloseTag):
-                if text:
-                    style_stack[-1].children.append(text)
-            else:
-                style_stack.append(FormatTree(style, [text] if text else []))
+    @classmethod
+    def cache_clear(cls):
+        _FORMAT_CACHE.clear()
 
-        while len(style_stack) >= 2:
-            last_node = style_stack.pop()
-            style_stack[-1].children.append(last_node)
+    @classmethod
+    def _format(
+        cls,
+        string: str,
+        *,
+        book_id: ResourceLocation,
+        i18n: I18n,
+        macros: dict[str, str],
+        is_0_black: bool,
+        pm: PluginManager,
+        link_overrides: dict[str, str],
+        macro_expander: MacroExpander,
+    ) -> tuple[Self, bool]:
+        working_string = macro_expander.expand(string)
 
-        unvalidated_tree = style_stack[0]
+        parser = _FormatParser(book_id, is_0_black, link_overrides)
+        unvalidated_tree = parser.parse(working_string)
         unvalidated_tree.raw = string
 
         validated_tree = pm.validate_format_tree(
@@ -421,7 +772,7 @@ class FormatTree:
         )
         assert isinstance(validated_tree, cls)
 
-        return validated_tree
+        return validated_tree, parser.has_keys
 
     @model_validator(mode="wrap")
     @classmethod
@@ -442,22 +793,146 @@ class FormatTree:
         if isinstance(value, str):
             value = i18n.localize(value)
 
-        return cls.format(
-            value.value,
+        return cls._from_localized(
+            value,
+            i18n,
+            eager=context.eager,
             book_id=context.book_id,
-            i18n=i18n,
             macros=context.macros,
             is_0_black=props.is_0_black,
             pm=pm,
             link_overrides=props.link_overrides,
+            macro_expander=context.macro_expander,
+        )
+
+    @classmethod
+    def _from_localized(
+        cls,
+        value: LocalizedStr,
+        i18n: I18n,
+        *,
+        eager: bool,
+        book_id: ResourceLocation,
+        macros: dict[str, str],
+        is_0_black: bool,
+        pm: PluginManager,
+        link_overrides: dict[str, str],
+        macro_expander: MacroExpander,
+    ) -> Self:
+        tree = (cls.format if eager else cls.lazy)(
+            value.value,
+            book_id=book_id,
+            i18n=i18n,
+            macros=macros,
+            is_0_black=is_0_black,
+            pm=pm,
+            link_overrides=link_overrides,
+            macro_expander=macro_expander,
+        )
+        if eager:
+            # format returns shared trees, so copy it before adding _source
+            parsed = tree
+            tree = _trusted_tree(parsed.style, parsed.children)
+            tree.raw = parsed.raw
+
+        tree.__dict__["_source"] = lambda new_i18n: cls._from_localized(
+            value.relocalize(new_i18n),
+            new_i18n,
+            eager=eager,
+            book_id=book_id,
+            macros=macros,
+            is_0_black=is_0_black,
+            pm=pm,
+            link_overrides=link_overrides,
+            macro_expander=macro_expander,
         )
+        return tree  # pyright: ignore[reportReturnType]
 
 
 def resolve_macros(string: str, macros: dict[str, str]) -> str:
-    # this could use ahocorasick, but it works fine for now
-    old_string = None
-    while old_string != string:
-        old_string = string
+    return MacroExpander.compile(macros).expand(string)
+
+
+_MAX_EXPANSIONS = 100
+
+
+class MacroExpander:
+    """Replaces macros in a string, repeating until no macros are left.
+
+    Macros are applied with `str.replace` in dict order, so overlapping macros (eg.
+    `/$` and `$(2br)`) behave the same as in Patchouli. All of the macro keys are also
+    combined into one regex, which is used to skip strings without any macros in a
+    single scan.
+
+    Recursive macros are detected when compiling, instead of on every call.
+    """
+
+    def __init__(self, macros: Mapping[str, str]):
         for macro, replace in macros.items():
-            string = string.replace(macro, replace)
-    return string
+            if macro in replace:
+                raise RuntimeError(
+                    f"Recursive macro: replacement `{replace}` is matched by key `{macro}`"
+                )
+
+        self.macros = dict(macros)
+        self._items = tuple(self.macros.items())
+        # expansion depends on the order of the macros, so equality does too
+        self._hash = hash(self._items)
+
+        self._regex = (
+            re.compile("|".join(re.escape(m) for m in self.macros))
+            if self.macros
+            else None
+        )
+
+        checked = set[str]()
+        for macro in self.macros:
+            self._check_recursion(macro, (), checked)
+
+    @classmethod
+    def compile(cls, macros: Mapping[str, str]) -> MacroExpander:
+        """Returns a cached MacroExpander for these macros."""
+        return _compile_macros(tuple(macros.items()))
+
+    def expand(self, string: str) -> str:
+        if self._regex is None or not self._regex.search(string):
+            return string
+
+        for _ in range(_MAX_EXPANSIONS):
+            old_string = string
+            for macro, replace in self._items:
+                if macro in string:
+                    string = string.replace(macro, replace)
+            if string == old_string:
+                return string
+
+        raise RuntimeError(f"Recursive macro expansion: {string}")
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MacroExpander):
+            return self._items == other._items
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def _check_recursion(self, macro: str, stack: tuple[str, ...], checked: set[str]):
+        if macro in stack:
+            raise RuntimeError(
+                "Recursive macro: " + " -> ".join(f"`{m}`" for m in stack + (macro,))
+            )
+        if macro in checked:
+            return
+
+        stack += (macro,)
+        replace = self.macros[macro]
+        for other in self.macros:
+            if other in replace:
+                self._check_recursion(other, stack, checked)
+
+        checked.add(macro)
+
+
+@lru_cache(maxsize=32)
+def _compile_macros(macros: tuple[tuple[str, str], ...]) -> MacroExpander:
+    return MacroExpander(dict(macros))
@@ -37,3 +37,13 @@ class BookPlugin(ABC, Generic[_Book]):
         context: ContextSource,
     ) -> _Book:
         """"""
+
+    def localize_book(self, book: _Book, *, context: ContextSource) -> _Book | None:
+        """Given a book returned by `validate_book`, returns a copy of it localized
+        using the I18n in `context`, or `None` if this isn't supported.
+
+        This allows loading the language-independent parts of the book only once, then
+        reusing them for every other language. If this returns `None`, `validate_book`
+        is called again for each language instead.
+        """
+        return None
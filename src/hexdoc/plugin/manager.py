@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib
+import logging
 from dataclasses import dataclass
 from importlib.resources import Package
 from pathlib import Path
@@ -37,6 +38,8 @@ from .mod_plugin import ModPlugin, ModPluginWithBook, RawRenderedTemplates
 from .specs import HEXDOC_PROJECT_NAME, PluginSpec
 from .types import HookReturns
 
+logger = logging.getLogger(__name__)
+
 _T = TypeVar("_T")
 
 _P = ParamSpec("_P")
@@ -186,6 +189,22 @@ class PluginManager(ValidationContext):
                     )
                 )
 
+    def can_localize_book(self) -> bool:
+        """Returns `False` if any mod plugin doesn't support `BookPlugin.localize_book`
+        (see `ModPlugin.supports_localize_book`)."""
+        unsupported = [
+            modid
+            for modid, plugin in self.mod_plugins.items()
+            if not plugin.supports_localize_book
+        ]
+        if unsupported:
+            logger.info(
+                "Validating the book separately for each language, because these"
+                + f" plugins don't support localize_book: {', '.join(unsupported)}"
+            )
+            return False
+        return True
+
     def validate_format_tree(
         self,
         tree: FormatTree,
@@ -95,6 +95,21 @@ class ModPlugin(ABC):
         """
         return None
 
+    @property
+    def supports_localize_book(self) -> bool:
+        """Whether every book model added by this plugin can be localized again with
+        `relocalize` (see `BookPlugin.localize_book`).
+
+        This is `False` by default, since models can contain localized text which
+        `relocalize` can't find, eg. plain `str` fields or values which were computed
+        from a `LocalizedStr`. Return `True` if you've checked that your plugin's models
+        only store localized text in `LocalizedStr` or `FormatTree` fields.
+
+        Unless every plugin returns `True`, `hexdoc build` validates the book separately
+        for each language instead of localizing the default language's book.
+        """
+        return False
+
     def resource_dirs(self) -> HookReturn[Package]:
         """The module(s) that contain your plugin's Minecraft resources to be rendered.
 
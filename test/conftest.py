@@ -1,8 +1,10 @@
+from contextlib import ExitStack
 from fnmatch import fnmatch
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, Protocol, Sequence, cast
 
 import pytest
+from hexdoc.core import ModResourceLoader, PathResourceDir
 from hexdoc.core.properties import Properties
 from hexdoc.plugin import PluginManager
 from pytest import MonkeyPatch
@@ -31,6 +33,19 @@ class FilePathSnapshotExtension(SingleFileSnapshotExtension):
         return path.read_text(self._text_encoding)
 
 
+class LoaderFactory(Protocol):
+    def __call__(
+        self,
+        resource_dirs: Sequence[PathResourceDir] = (),
+        *,
+        props: Properties | None = None,
+        export_dir: Path | None = None,
+        stack: ExitStack | None = None,
+        **kwargs: Any,
+    ) -> ModResourceLoader:
+        ...
+
+
 # fixtures
 
 
@@ -49,6 +64,30 @@ def empty_pm():
     return PluginManager(branch="main", props=cast(Properties, None), load=False)
 
 
+@pytest.fixture
+def make_loader() -> LoaderFactory:
+    """Creates a `ModResourceLoader` without loading any plugins, with empty props and
+    no export dir by default."""
+
+    def make_loader(
+        resource_dirs: Sequence[PathResourceDir] = (),
+        *,
+        props: Properties | None = None,
+        export_dir: Path | None = None,
+        stack: ExitStack | None = None,
+        **kwargs: Any,
+    ) -> ModResourceLoader:
+        return ModResourceLoader(
+            props=props or Properties.model_construct(),
+            export_dir=export_dir,
+            resource_dirs=list(resource_dirs),
+            _stack=stack or ExitStack(),
+            **kwargs,
+        )
+
+    return make_loader
+
+
 @pytest.fixture(scope="session")
 def monkeysession():
     with MonkeyPatch.context() as mp:
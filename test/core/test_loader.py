@@ -1,13 +1,31 @@
+import gc
+import importlib
 import json
+import logging
+import zipfile
 from contextlib import ExitStack
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Callable
 
-from hexdoc.core.loader import BookFolder, ModResourceLoader
+import pytest
+from hexdoc.core.decode_cache import DecodedResourceCache
+from hexdoc.core.export_manifest import ExportManifest
+from hexdoc.core.loader import BookFolder, MergeExport, ModResourceLoader
 from hexdoc.core.properties import Properties
 from hexdoc.core.resource import ResourceLocation
-from hexdoc.core.resource_dir import PathResourceDir
-from hexdoc.utils.deserialize.json import JSONDict
+from hexdoc.core.resource_dir import (
+    ArchiveResourceDir,
+    PatchouliBooksResourceDir,
+    PathResourceDir,
+    PluginResourceDir,
+    TraversableResourceDir,
+)
+from hexdoc.plugin import PluginManager
+from hexdoc.utils.deserialize.json import JSONDict, decode_json_dict
+
+from ..conftest import LoaderFactory
+from ..tree import write_file_tree
 
 
 def patchi_book(
@@ -46,7 +64,7 @@ def load_book_assets(
     return sorted(assets, key=key)
 
 
-def test_multi_book(tmp_path: Path):
+def test_multi_book(tmp_path: Path, make_loader: LoaderFactory):
     resources = tmp_path / "resources"
 
     resource_dirs = [
@@ -76,11 +94,10 @@ def test_multi_book(tmp_path: Path):
     )
 
     with ExitStack() as stack:
-        loader = ModResourceLoader(
+        loader = make_loader(
+            resource_dirs,
             props=props,
-            export_dir=None,
-            resource_dirs=resource_dirs,
-            _stack=stack,
+            stack=stack,
         )
 
         assert load_book_assets(loader, hexcasting_id, "categories", key=sortkey) == [
@@ -95,3 +112,511 @@ def test_multi_book(tmp_path: Path):
             {"id": str(hexcasting_id)},
             {"id": str(hexgloop_id)},
         ]
+
+
+def test_index_matches_filesystem(tmp_path: Path, make_loader: LoaderFactory):
+    high = tmp_path / "high"
+    low = tmp_path / "low"
+
+    write_file_tree(
+        high,
+        {"assets/a": {"lang/en_us.json": {}, "textures/item/x.png": "{}"}},
+    )
+    write_file_tree(
+        low,
+        {"assets": {"a/lang/en_us.json": {}, "b/lang/en_us.flatten.json5": "{}"}},
+    )
+
+    def find_all(index: bool):
+        resource_dirs = [
+            PathResourceDir.model_construct(path=high, index=index),
+            PathResourceDir.model_construct(path=low, index=index),
+        ]
+        loader = make_loader(
+            resource_dirs,
+        )
+        return (
+            [
+                (dir_.path, id, path)
+                for dir_, id, path in loader.find_resources(
+                    "assets",
+                    namespace="*",
+                    folder="lang",
+                    glob=["*.json", "*.flatten.json5"],
+                )
+            ],
+            sorted(
+                id
+                for _, id, _ in loader.find_resources(
+                    "assets",
+                    namespace="*",
+                    folder="",
+                    glob="**/*.png",
+                )
+            ),
+            loader.find_resource(Path("assets/a/lang/en_us.json"))[1],
+        )
+
+    indexed = find_all(index=True)
+    unindexed = find_all(index=False)
+
+    # the filesystem doesn't guarantee an order within each resource dir
+    assert sorted(map(str, indexed[0])) == sorted(map(str, unindexed[0]))
+    assert indexed[1:] == unindexed[1:]
+    assert [dir_ for dir_, _, _ in indexed[0]] == [low, low, high]
+    assert indexed[1] == [ResourceLocation("a", "textures/item/x.png")]
+    assert indexed[2] == high / "assets/a/lang/en_us.json"
+
+
+def test_index_opt_out(tmp_path: Path):
+    resource_dirs = [
+        PathResourceDir.model_construct(path=tmp_path / "indexed"),
+        PathResourceDir.model_construct(path=tmp_path / "live", index=False),
+    ]
+    for resource_dir in resource_dirs:
+        resource_dir.path.mkdir()
+        resource_dir.build_index()
+
+    for resource_dir in resource_dirs:
+        (resource_dir.path / "new.json").write_text("{}")
+
+    assert [d.find_file(Path("new.json")) is not None for d in resource_dirs] == [
+        False,
+        True,
+    ]
+
+
+def test_archive_resource_dir(tmp_path: Path, make_loader: LoaderFactory):
+    archive_path = tmp_path / "mod.jar"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("assets/mod/lang/en_us.json", '{"key": "value"}')
+        archive.writestr("data/mod/tags/items/foo.json", '{"values": []}')
+        archive.writestr("data/mod/tags/items/sub/bar.json", '{"values": []}')
+
+    archive_dir = ArchiveResourceDir.model_construct(
+        archive=archive_path,
+        required=True,
+        external=True,
+        reexport=False,
+    )
+
+    with ExitStack() as stack:
+        resource_dirs = list(stack.enter_context(archive_dir.load(None)))  # type: ignore
+        loader = make_loader(
+            resource_dirs,
+            stack=stack,
+        )
+
+        _, value = loader.load_resource(Path("assets/mod/lang/en_us.json"))
+        assert value == {"key": "value"}
+
+        with pytest.raises(FileNotFoundError):
+            loader.load_resource(Path("assets/mod/lang/missing.json"))
+
+        ids = [
+            str(id)
+            for _, id, _ in loader.find_resources(
+                "data",
+                namespace="*",
+                folder="tags/items",
+            )
+        ]
+        assert ids == ["mod:foo", "mod:sub/bar"]
+
+
+def test_patchouli_books_resource_dir(tmp_path: Path, make_loader: LoaderFactory):
+    books_path = tmp_path / "patchouli_books"
+    write_file_tree(books_path, {"book/en_us/entries/entry.json": {"name": "entry"}})
+
+    books_dir = PatchouliBooksResourceDir.model_construct(
+        patchouli_books=books_path,
+        external=False,
+        reexport=True,
+    )
+
+    with ExitStack() as stack:
+        resource_dirs = list(stack.enter_context(books_dir.load(None)))  # type: ignore
+        loader = make_loader(
+            resource_dirs,
+            stack=stack,
+        )
+
+        for type in ["assets", "data"]:
+            found = list(
+                loader.load_resources(
+                    type,
+                    namespace="patchouli",
+                    folder="patchouli_books/book/en_us/entries",
+                )
+            )
+            assert [(str(id), value) for _, id, value in found] == [
+                ("patchouli:entry", {"name": "entry"})
+            ]
+
+            resource_dir, _, _ = found[0]
+            _, _, path = next(
+                loader.find_resources(type, namespace="patchouli", folder="")
+            )
+            assert path.relative_to(resource_dir.path) == Path(
+                f"{type}/patchouli/patchouli_books/book/en_us/entries/entry.json"
+            )
+
+    # nothing should be copied into the original directory
+    assert [p.name for p in tmp_path.rglob("*")] == [
+        "patchouli_books",
+        "book",
+        "en_us",
+        "entries",
+        "entry.json",
+    ]
+
+
+def test_zipped_plugin_resource_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_loader: LoaderFactory
+):
+    archive_path = tmp_path / "plugin.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("zipped_resources/__init__.py", "")
+        archive.writestr(
+            "zipped_resources/assets/mod/lang/en_us.json",
+            '{"key": "value"}',
+        )
+
+    monkeypatch.syspath_prepend(str(archive_path))
+    module = importlib.import_module("zipped_resources")
+    pm = SimpleNamespace(load_resources=lambda modid: [module])
+
+    plugin_dir = PluginResourceDir.model_construct(
+        modid="mod",
+        external=True,
+        reexport=False,
+    )
+
+    with ExitStack() as stack:
+        resource_dirs = list(stack.enter_context(plugin_dir.load(pm)))  # type: ignore
+        assert [type(d) for d in resource_dirs] == [TraversableResourceDir]
+        assert resource_dirs[0].modid == "mod"
+
+        loader = make_loader(
+            resource_dirs,
+            stack=stack,
+        )
+
+        found = [
+            (str(id), value)
+            for _, id, value in loader.load_resources(
+                "assets",
+                namespace="*",
+                folder="lang",
+            )
+        ]
+        assert found == [("mod:en_us", {"key": "value"})]
+
+
+def test_namespace_plugin_resource_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_loader: LoaderFactory
+):
+    for name in ["a", "b"]:
+        write_file_tree(
+            tmp_path / name,
+            {f"namespace_resources/assets/mod/lang/{name}.json": {"key": name}},
+        )
+        monkeypatch.syspath_prepend(str(tmp_path / name))
+
+    module = importlib.import_module("namespace_resources")
+    pm = SimpleNamespace(load_resources=lambda modid: [module])
+
+    plugin_dir = PluginResourceDir.model_construct(
+        modid="mod",
+        external=True,
+        reexport=False,
+    )
+
+    with ExitStack() as stack:
+        resource_dirs = list(stack.enter_context(plugin_dir.load(pm)))  # type: ignore
+        assert [type(d) for d in resource_dirs] == [TraversableResourceDir]
+
+        # the virtual path must not depend on the Traversable's repr
+        assert "MultiplexedPath" not in str(resource_dirs[0].path)
+
+        loader = make_loader(
+            resource_dirs,
+            stack=stack,
+        )
+
+        found = sorted(
+            (str(id), value)
+            for _, id, value in loader.load_resources(
+                "assets",
+                namespace="*",
+                folder="lang",
+            )
+        )
+        assert found == [("mod:a", {"key": "a"}), ("mod:b", {"key": "b"})]
+
+
+def test_decode_cache(tmp_path: Path, make_loader: LoaderFactory):
+    path = tmp_path / "assets/a/lang/en_us.json"
+    write_file_tree(tmp_path, {"assets/a/lang/en_us.json": {"key": "value"}})
+
+    resource_dirs = [PathResourceDir.model_construct(path=tmp_path)]
+    loader = make_loader(
+        resource_dirs,
+    )
+
+    _, first = loader.load_resource(Path("assets/a/lang/en_us.json"))
+    first["key"] = "modified"
+    _, second = loader.load_resource(Path("assets/a/lang/en_us.json"))
+
+    assert second == {"key": "value"}
+    assert loader.decode_cache_info().hits == 1
+
+    path.write_text('{"key": "changed"}')
+    _, third = loader.load_resource(Path("assets/a/lang/en_us.json"))
+
+    assert third == {"key": "changed"}
+    assert loader.decode_cache_info().misses == 2
+
+
+def test_persistent_decode_cache(tmp_path: Path):
+    cache_path = tmp_path / "cache.marshal"
+    data = '{"key": /* comment */ "value"}'
+
+    first = DecodedResourceCache.load(cache_path)
+    assert first.decode(data, decode_json_dict) == {"key": "value"}
+    assert (first.hits, first.misses) == (0, 1)
+    first.save()
+
+    second = DecodedResourceCache.load(cache_path)
+    assert second.decode(data, decode_json_dict) == {"key": "value"}
+    assert (second.hits, second.misses) == (1, 0)
+
+    # non-JSON decoders are never cached
+    assert second.decode(data, str.upper) == data.upper()
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_persistent_decode_cache_eviction(tmp_path: Path):
+    cache_path = tmp_path / "cache.marshal"
+
+    cache = DecodedResourceCache.load(cache_path, max_size=100)
+    for i in range(10):
+        cache.decode(f'{{"key": "{"x" * 20}{i}"}}', decode_json_dict)
+    cache.save()
+
+    cache = DecodedResourceCache.load(cache_path)
+    cache.decode(f'{{"key": "{"x" * 20}9"}}', decode_json_dict)
+    cache.decode(f'{{"key": "{"x" * 20}0"}}', decode_json_dict)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_parallel_load_resources(tmp_path: Path, make_loader: LoaderFactory):
+    resource_dirs = [
+        PathResourceDir.model_construct(path=tmp_path / f"resources_{i}")
+        for i in range(3)
+    ]
+    for i, resource_dir in enumerate(resource_dirs):
+        write_file_tree(
+            resource_dir.path,
+            {f"data/a/things/{j:02}.json": {"dir": i, "file": j} for j in range(20)},
+        )
+
+    def load_all(max_workers: int):
+        export_dir = tmp_path / f"export_{max_workers}"
+        loader = make_loader(
+            resource_dirs,
+            export_dir=export_dir,
+            max_workers=max_workers,
+        )
+        with loader:
+            values = [
+                (dir_.path, id, value)
+                for dir_, id, value in loader.load_resources(
+                    "data",
+                    namespace="a",
+                    folder="things",
+                )
+            ]
+        exported = (export_dir / "data/a/things/00.json").read_text()
+        return values, exported
+
+    sequential = load_all(max_workers=1)
+
+    assert load_all(max_workers=4) == sequential
+    assert sequential[0][0][2] == {"dir": 2, "file": 0}
+    assert json.loads(sequential[1]) == {"dir": 0, "file": 0}
+
+
+def test_exports_are_merged_and_written_once(
+    tmp_path: Path, make_loader: LoaderFactory
+):
+    export_dir = tmp_path / "export"
+    out_path = export_dir / "assets/a/lang/en_us.json"
+
+    def merge(new: JSONDict, current: JSONDict | None):
+        return json.dumps((current or {}) | new)
+
+    def export_all():
+        loader = make_loader(
+            export_dir=export_dir,
+        )
+        with loader:
+            for i in range(3):
+                loader.export(
+                    Path("assets/a/lang/en_us.json"),
+                    data=json.dumps({f"key{i}": "value"}),
+                    value={f"key{i}": "value"},
+                    export=merge,
+                )
+            mtime = out_path.stat().st_mtime_ns if out_path.exists() else None
+        return mtime
+
+    assert export_all() is None
+    assert json.loads(out_path.read_text()) == {
+        "key0": "value",
+        "key1": "value",
+        "key2": "value",
+    }
+
+    # unchanged files aren't rewritten
+    mtime = out_path.stat().st_mtime_ns
+    assert export_all() == mtime
+    assert out_path.stat().st_mtime_ns == mtime
+
+
+def test_export_manifest(tmp_path: Path, make_loader: LoaderFactory):
+    export_dir = tmp_path / "export"
+    manifest_path = tmp_path / "manifest.json"
+
+    def export_all(files: dict[str, str]):
+        manifest = ExportManifest.load(manifest_path, export_dir)
+        loader = make_loader(
+            export_dir=export_dir,
+            export_manifest=manifest or ExportManifest.empty(manifest_path, export_dir),
+        )
+        with loader:
+            for path, data in files.items():
+                loader.export(Path(path), data)
+        return loader.export_manifest
+
+    export_all({"a/unchanged.json": "{}", "b/stale.json": "{}"})
+    unchanged_mtime = (export_dir / "a/unchanged.json").stat().st_mtime_ns
+
+    second = export_all({"a/unchanged.json": "{}", "a/new.json": "{}"})
+
+    assert second and set(second.previous) == {"a/unchanged.json", "a/new.json"}
+    assert (export_dir / "a/unchanged.json").stat().st_mtime_ns == unchanged_mtime
+    assert (export_dir / "a/new.json").is_file()
+    assert not (export_dir / "b").exists()
+
+
+def test_unclosed_loader_warns(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture, make_loader: LoaderFactory
+):
+    loader = make_loader(
+        export_dir=tmp_path / "export",
+    )
+    loader.export(Path("a.json"), "{}")
+
+    with caplog.at_level(logging.WARNING):
+        del loader
+        gc.collect()
+
+    assert "Discarding 1 exported files" in caplog.text
+    assert not (tmp_path / "export/a.json").exists()
+
+
+def test_merged_exports_drop_removed_values(tmp_path: Path, make_loader: LoaderFactory):
+    export_dir = tmp_path / "export"
+    manifest_path = tmp_path / "manifest.json"
+    path = Path("assets/a/lang/en_us.json")
+
+    def merge(new: JSONDict, current: JSONDict | None):
+        return json.dumps((current or {}) | new)
+
+    def build(lookup: dict[str, str]):
+        manifest = ExportManifest.load(manifest_path, export_dir)
+        with make_loader(
+            export_dir=export_dir,
+            export_manifest=manifest or ExportManifest.empty(manifest_path, export_dir),
+        ) as loader:
+            loader.export(path, json.dumps(lookup), lookup, export=merge)
+        return json.loads((export_dir / path).read_text())
+
+    assert build({"a": "1", "removed": "x"}) == {"a": "1", "removed": "x"}
+    assert build({"a": "2"}) == {"a": "2"}
+
+
+def test_merge_after_flush_keeps_flushed_values(
+    tmp_path: Path, make_loader: LoaderFactory
+):
+    export_dir = tmp_path / "export"
+    path = Path("assets/a/lang/en_us.json")
+
+    def merge(new: JSONDict, current: JSONDict | None):
+        return json.dumps((current or {}) | new)
+
+    with make_loader(
+        export_dir=export_dir,
+    ) as loader:
+        loader.export(path, '{"a": "1"}', {"a": "1"}, export=merge)
+        loader.flush_exports()
+        loader.export(path, '{"b": "2"}', {"b": "2"}, export=merge)
+
+    assert json.loads((export_dir / path).read_text()) == {"a": "1", "b": "2"}
+
+
+def test_merge_export_keeps_decoded_value(tmp_path: Path, make_loader: LoaderFactory):
+    export_dir = tmp_path / "export"
+    path = Path("assets/a/lang/en_us.json")
+    dumped = list[JSONDict]()
+
+    def decode(data: str) -> JSONDict:
+        raise AssertionError(f"Unexpected decode: {data}")
+
+    def dump(value: JSONDict):
+        dumped.append(value)
+        return json.dumps(value)
+
+    export = MergeExport[JSONDict](lambda new, current: (current or {}) | new, dump)
+
+    with make_loader(
+        export_dir=export_dir,
+    ) as loader:
+        for i in range(3):
+            value = {f"key{i}": "value"}
+            loader.export(path, json.dumps(value), value, decode=decode, export=export)
+
+    assert dumped == [{"key0": "value", "key1": "value", "key2": "value"}]
+    assert json.loads((export_dir / path).read_text()) == dumped[0]
+
+
+def test_export_raw_is_queued(tmp_path: Path, make_loader: LoaderFactory):
+    export_dir = tmp_path / "export"
+    path = Path("assets/a/textures/a.png")
+
+    with make_loader(
+        export_dir=export_dir,
+    ) as loader:
+        loader.export_raw(path, b"first")
+        assert not (export_dir / path).exists()
+
+        # the last export to a path wins, regardless of which method queued it
+        loader.export(path, "second")
+        loader.export_raw(path, b"third")
+
+    assert (export_dir / path).read_bytes() == b"third"
+
+
+def test_clean_and_load_all_passes_max_workers(tmp_path: Path):
+    write_file_tree(tmp_path, {"data/a/things/thing.json": {"value": 1}})
+    props = Properties.model_construct(
+        resource_dirs=[PathResourceDir.model_construct(path=tmp_path)],
+        export_dir=None,
+    )
+    pm = PluginManager("main", props=props)
+
+    with ModResourceLoader.clean_and_load_all(props, pm, max_workers=4) as loader:
+        assert loader.max_workers == 4
+        assert list(loader.load_resources("data", namespace="a", folder="things"))
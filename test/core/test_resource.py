@@ -1,5 +1,11 @@
 import pytest
-from hexdoc.core.resource import AssumeTag, ItemStack, ResLoc, ResourceLocation
+from hexdoc.core.resource import (
+    AssumeTag,
+    ItemStack,
+    ResLoc,
+    ResourceLocation,
+    ResourceLocationPatternSet,
+)
 from pydantic import TypeAdapter
 
 resource_locations: list[tuple[str, ResourceLocation, str]] = [
@@ -84,3 +90,66 @@ def test_assume_is_tag(type: type[ResourceLocation], value: str, want_is_tag: bo
     got = ta.validate_python(value)
 
     assert got.is_tag == want_is_tag
+
+
+pattern_ids = [
+    "minecraft:stone",
+    "minecraft:stone_bricks",
+    "hexcasting:amethyst_dust",
+    "hexcasting:focus",
+    "hexcasting:foo/bar",
+    "#minecraft:logs",
+]
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    [
+        [],
+        ["minecraft:stone"],
+        ["hexcasting:*"],
+        ["minecraft:stone*", "hexcasting:foo/*"],
+        ["hexcasting:*dust", "minecraft:*tone"],
+        ["#minecraft:logs", "minecraft:logs"],
+    ],
+)
+def test_pattern_set_matches_fnmatch(patterns: list[str]):
+    pattern_set = ResourceLocationPatternSet(ResLoc.from_str(p) for p in patterns)
+
+    for raw_id in pattern_ids:
+        id = ResLoc.from_str(raw_id)
+        expected = any(id.match(ResLoc.from_str(p)) for p in patterns)
+        assert (id in pattern_set) == expected, raw_id
+        assert (id in pattern_set) == expected, raw_id  # memoized
+
+
+@pytest.mark.parametrize("raw", ["stone", "hexcasting:amethyst_dust", "#c:gems"])
+def test_from_str_is_interned(raw: str):
+    assert ResourceLocation.from_str(raw) is ResourceLocation.from_str(raw)
+    assert ResourceLocation.from_str(raw) is ResourceLocation.model_validate(raw)
+
+
+def test_itemstack_from_str_is_interned():
+    raw = "minecraft:stone#64{display:{}}"
+    assert ItemStack.from_str(raw) is ItemStack.from_str(raw)
+    assert ItemStack.from_str("stone") != ResourceLocation.from_str("stone")
+
+
+@pytest.mark.parametrize(
+    ["id", "path"],
+    [
+        (ResLoc("hexcasting", "thehexbook"), "items/focus"),
+        (ResLoc("hexcasting", "thehexbook"), "Upper/Case/"),
+        (ResourceLocation.from_str("#c:gems"), "dusts"),
+    ],
+)
+def test_with_path_matches_constructor(id: ResourceLocation, path: str):
+    want = ResourceLocation(id.namespace, path)
+
+    got = id.with_path(path)
+
+    assert got == want
+    assert hash(got) == hash(want)
+    assert repr(got) == repr(want)
+    assert id / path == ResourceLocation(id.namespace, f"{id.path}/{path}")
+    assert id + path == ResourceLocation(id.namespace, id.path + path)
@@ -80,3 +80,29 @@ def test_update_template_args(pm: PluginManager, render_template: RenderTemplate
     assert render_template([]) == "old_value"
     pm.inner.register(Hooks)
     assert render_template([]) == "new_value"
+
+
+def test_can_localize_book(pm: PluginManager):
+    class _ModPlugin(ModPlugin):
+        @property
+        def modid(self):
+            return "modplugin"
+
+        @property
+        def full_version(self):
+            return ""
+
+        @property
+        def plugin_version(self):
+            return ""
+
+    class _Plugin(ModPluginImpl):
+        @staticmethod
+        @hookimpl
+        def hexdoc_mod_plugin(branch: str) -> ModPlugin:
+            return _ModPlugin(branch="")
+
+    # hexdoc's own plugin opts in, but other plugins don't by default
+    assert pm.can_localize_book()
+    pm.register(_Plugin)
+    assert not pm.can_localize_book()
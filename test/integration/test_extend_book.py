@@ -234,3 +234,37 @@ def test_child_child_ids(child_book: tuple[Book, dict[str, Any]]):
     _, context = child_book
 
     assert want_id == Properties.of(context).book_id
+
+
+def test_localize_book(pm: PluginManager, parent_book: tuple[Book, dict[str, Any]]):
+    book, context = parent_book
+    book_plugin = pm.book_plugin("patchouli")
+    default_i18n = I18n.of(context)
+
+    i18n = I18n(
+        lookup={
+            "parent.book": "父书",
+            "parent.entry": "父条目",
+            "parent.landing_text": "父着陆文本",
+        },
+        lang="zh_cn",
+        default_i18n=default_i18n,
+        enabled=default_i18n.enabled,
+    )
+    localized_context = context | {}
+    i18n.add_to_context(localized_context, overwrite=True)
+
+    localized = book_plugin.localize_book(book, context=localized_context)
+
+    assert isinstance(localized, Book)
+    assert localized.name == "父书"
+    assert localized.landing_text.raw == "父着陆文本"
+
+    category = localized.categories[ResourceLocation("parent", "parent_category")]
+    entry = category.entries[ResourceLocation("parent", "parent_entry")]
+    assert category.name == "parent category"
+    assert entry.name == "父条目"
+
+    # the original book is unchanged
+    assert book.name == "parent book"
+    assert book.landing_text.raw == "parent landing text"
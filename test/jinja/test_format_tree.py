@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from hexdoc.core import ResourceLocation
+from hexdoc.jinja import FormatTreeRenderer
+from hexdoc.jinja.render import create_jinja_env_with_loader
+from hexdoc.minecraft import I18n
+from hexdoc.patchouli.text import DEFAULT_MACROS, FormatTree, Style
+from jinja2 import ChoiceLoader, DictLoader, PackageLoader
+from markupsafe import Markup
+from yarl import URL
+
+BOOK_ID = ResourceLocation("hexcasting", "thehexbook")
+
+MACRO_TEMPLATE = """\
+{%- import "macros/formatting.html.jinja" as fmt with context -%}
+{{- fmt.styled_macro(value) -}}
+"""
+
+STYLED_TEMPLATE = """\
+{%- import "macros/formatting.html.jinja" as fmt with context -%}
+{{- fmt.styled(value) -}}
+"""
+
+FILTER_TEMPLATE = "{{- value|hexdoc_styled -}}"
+
+
+class MockPluginManager:
+    def validate_format_tree(self, tree: FormatTree, *_: Any, **__: Any):
+        return tree
+
+
+def _format(string: str) -> FormatTree:
+    return FormatTree.format(
+        string,
+        book_id=BOOK_ID,
+        i18n=I18n(lookup={}, lang="en_us", default_i18n=None, enabled=True),
+        macros=DEFAULT_MACROS,
+        is_0_black=False,
+        pm=MockPluginManager(),  # pyright: ignore[reportArgumentType]
+        link_overrides={},
+    )
+
+
+def _render_args(value: FormatTree | str | None) -> dict[str, Any]:
+    return {
+        "value": value,
+        "link_bases": {
+            (BOOK_ID.with_path("items/focus"), None): URL("https://example.com/book"),
+        },
+        "_": lambda key: Markup(f"{key}: {{}}"),
+    }
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        "",
+        'plain <text> & "quotes"\nsecond line\n',
+        Markup("<b>already safe</b>"),
+        "$(k)obf$(l)bold$(m)strike$(n)under$(o)italic$()",
+        "a$(br)b$(br2)c$(li)item$(li)item 2$(p)d",
+        "$(#490)color $(1)preset$(0)reset",
+        '$(t:a "tooltip" <here>)hover$(/t) $(c:/say <hi>)click$(/c)',
+        "$(l:https://example.com/?a=1&b=2)external$(/l)",
+        "$(l:items/focus)book link$(/l) and $(l:?query)query$(/l)",
+        "$(#111)A$(l:https://example.com)B$(#222)C$(#111)D$(/l)E$()",
+    ],
+)
+def test_filter_matches_macro(value: str | None):
+    env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    if value and not isinstance(value, Markup):
+        value = _format(value)
+    args = _render_args(value)
+
+    want = env.from_string(MACRO_TEMPLATE).render(args)
+    got = env.from_string(FILTER_TEMPLATE).render(args)
+
+    assert got == want
+
+
+def test_custom_renderer():
+    env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    FormatTreeRenderer.of(env).renderers["command_bold"] = (
+        lambda context, style, content: Markup("<b>") + content + Markup("</b>")
+    )
+
+    got = env.from_string(FILTER_TEMPLATE).render(_render_args(_format("$(l)A")))
+
+    assert got == "<p><b>A</b></p>"
+
+
+def test_overridden_styles_template():
+    overrides = DictLoader(
+        {
+            "macros/styles.html.jinja": """\
+{% macro paragraph_paragraph(style) -%}
+  <div>{{ caller() }}</div>
+{%- endmacro %}
+{% macro special_base(style) -%}
+  {{ caller() }}
+{%- endmacro %}
+{% macro command_bold(style) -%}
+  <b>{{ caller() }}</b>
+{%- endmacro %}
+""",
+        }
+    )
+    env = create_jinja_env_with_loader(
+        ChoiceLoader([overrides, PackageLoader("hexdoc", "_templates")])
+    )
+    args = _render_args(_format("$(l)A < B"))
+
+    got = env.from_string(FILTER_TEMPLATE).render(args)
+
+    assert got == env.from_string(MACRO_TEMPLATE).render(args)
+    assert got == "<div><b>A &lt; B</b></div>"
+
+
+def test_unknown_style_uses_macro():
+    class MockStyle(Style, frozen=True):
+        @property
+        def macro(self) -> str:
+            return "command_missing"
+
+    env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    tree = _format("A")
+    tree = FormatTree(tree.style, [FormatTree(MockStyle(type=tree.style.type), ["A"])])
+
+    with pytest.raises(Exception, match="command_missing"):
+        env.from_string(FILTER_TEMPLATE).render(_render_args(tree))
+
+
+def test_styled_macro_uses_filter():
+    env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    FormatTreeRenderer.of(env).renderers["command_bold"] = (
+        lambda context, style, content: Markup("<b>") + content + Markup("</b>")
+    )
+
+    got = env.from_string(STYLED_TEMPLATE).render(_render_args(_format("$(l)A")))
+
+    assert got == "<p><b>A</b></p>"
+
+
+def test_overridden_styled_macro():
+    overrides = DictLoader(
+        {
+            "macros/formatting.html.jinja": """\
+{% macro styled(value) -%}
+  custom
+{%- endmacro %}
+""",
+        }
+    )
+    env = create_jinja_env_with_loader(
+        ChoiceLoader([overrides, PackageLoader("hexdoc", "_templates")])
+    )
+    template = env.get_template("pages/patchouli/text.html.jinja")
+
+    got = template.render(
+        _render_args(None) | {"page": SimpleNamespace(anchor=None, text=_format("A"))}
+    )
+
+    assert "custom" in got
+    assert "<p>A</p>" not in got
@@ -0,0 +1,90 @@
+import json
+import zipfile
+from contextlib import ExitStack
+from pathlib import Path
+
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties
+from hexdoc.core.resource_dir import ArchiveResourceDir
+from hexdoc.minecraft.assets import AnimatedTexture
+from hexdoc.minecraft.assets.load_assets import (
+    HexdocPythonResourceLoader,
+    load_texture,
+)
+from minecraft_render import ResourcePath
+from pytest import MonkeyPatch
+from yarl import URL
+
+from ...conftest import LoaderFactory
+from ...tree import write_file_tree
+
+
+def test_load_json_is_cached(
+    tmp_path: Path, monkeypatch: MonkeyPatch, make_loader: LoaderFactory
+):
+    path = tmp_path / "assets/mod/models/item/foo.json"
+    write_file_tree(
+        tmp_path,
+        {"assets/mod/models/item/foo.json": {"parent": "item/generated"}},
+    )
+
+    loader = make_loader(
+        [PathResourceDir.model_construct(path=tmp_path)],
+    )
+    resource_loader = HexdocPythonResourceLoader(loader=loader)
+    # avoid calling into JS to convert the path
+    monkeypatch.setattr(
+        HexdocPythonResourceLoader,
+        "_convert_resource_path",
+        lambda self, resource_path: Path("assets/mod/models/item/foo.json"),
+    )
+    resource_path = ResourcePath(
+        namespace="mod",
+        objectType="models",
+        identifier="item/foo",
+        suffix=".json",
+    )
+
+    for _ in range(2):
+        assert resource_loader.loadJSON(resource_path) == path.read_text()
+
+    assert loader.decode_cache_info().hits == 1
+
+
+def test_load_animated_texture_from_archive(tmp_path: Path, make_loader: LoaderFactory):
+    meta = {"animation": {"interpolate": False, "frametime": 2, "frames": [0, 1]}}
+
+    archive_path = tmp_path / "mod.jar"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("assets/mod/textures/item/foo.png", b"")
+        archive.writestr("assets/mod/textures/item/foo.png.mcmeta", json.dumps(meta))
+
+    archive_dir = ArchiveResourceDir.model_construct(
+        archive=archive_path,
+        required=True,
+        external=False,
+        reexport=True,
+    )
+
+    with ExitStack() as stack:
+        resource_dirs = list(stack.enter_context(archive_dir.load(None)))  # type: ignore
+        loader = make_loader(
+            resource_dirs,
+            stack=stack,
+        )
+
+        [(resource_dir, texture_id, path)] = loader.find_resources(
+            "assets",
+            namespace="*",
+            folder="textures",
+            glob="**/*.png",
+        )
+        texture = load_texture(
+            "textures" / texture_id,
+            path=path,
+            repo_root=tmp_path,
+            asset_url=URL("https://example.com"),
+            resource_dir=resource_dir,
+        )
+
+    assert isinstance(texture, AnimatedTexture)
+    assert texture.meta.animation.frametime == 2
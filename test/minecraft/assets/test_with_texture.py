@@ -4,7 +4,11 @@ from typing import Any
 import pytest
 from hexdoc.core import Properties
 from hexdoc.core.resource import ResourceLocation
-from hexdoc.minecraft.assets.textures import TextureContext
+from hexdoc.minecraft.assets.textures import (
+    MISSING_TEXTURE_URL,
+    PNGTexture,
+    TextureContext,
+)
 from hexdoc.minecraft.assets.with_texture import ItemWithTexture, TagWithTexture
 from hexdoc.minecraft.i18n import I18n
 from hexdoc.plugin import PluginManager
@@ -73,3 +77,14 @@ def test_item_tag_union(
     result = ta.validate_python(data, context=context)
 
     assert isinstance(result, want_type)
+
+
+def test_allowed_missing_patterns_are_built_once(context: Any):
+    texture_ctx = TextureContext.of(context)
+    patterns = texture_ctx.allowed_missing_patterns
+
+    texture = PNGTexture.load_id(ResourceLocation("minecraft", "missing"), context)
+
+    assert texture.url == MISSING_TEXTURE_URL
+    assert texture_ctx.allowed_missing_patterns is patterns
+    assert ResourceLocation("minecraft", "missing") in patterns
@@ -0,0 +1,223 @@
+import gc
+import json
+import weakref
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties, ResourceLocation
+from hexdoc.minecraft import I18n
+from hexdoc.minecraft.recipe import Recipe, RecipeIndex
+from hexdoc.model import DEFAULT_CONFIG, IDModel
+
+
+def _write_data(root: Path, folder: str, id: str, data: dict[str, Any]):
+    namespace, path = id.split(":")
+    file_path = root / "data" / namespace / folder / f"{path}.json"
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(json.dumps(data), "utf-8")
+
+
+@pytest.fixture
+def loader(tmp_path: Path):
+    _write_data(tmp_path, "tags/items", "mod:planks", {"values": ["mod:oak_planks"]})
+    _write_data(
+        tmp_path,
+        "recipes",
+        "mod:stick",
+        {
+            "type": "minecraft:crafting_shaped",
+            "key": {"#": {"tag": "mod:planks"}},
+            "pattern": ["#", "#"],
+            "result": {"item": "mod:stick", "count": 4},
+        },
+    )
+    _write_data(
+        tmp_path,
+        "recipes",
+        "mod:torch",
+        {
+            "type": "minecraft:crafting_shapeless",
+            "ingredients": [{"item": "mod:stick"}, [{"item": "mod:coal"}]],
+            "result": {"item": "mod:torch"},
+        },
+    )
+    _write_data(
+        tmp_path,
+        "recipes",
+        "mod:charcoal",
+        {
+            "type": "minecraft:smelting",
+            "ingredient": {"tag": "mod:planks"},
+            "result": "mod:coal",
+            "experience": 0.1,
+        },
+    )
+
+    return _make_loader(tmp_path)
+
+
+def _make_loader(tmp_path: Path, *external_paths: Path):
+    return ModResourceLoader(
+        props=Properties.model_construct(default_lang="en_us"),
+        export_dir=None,
+        resource_dirs=[
+            *(
+                PathResourceDir.model_construct(
+                    path=path, external=True, reexport=False
+                )
+                for path in external_paths
+            ),
+            PathResourceDir.model_construct(
+                path=tmp_path, external=False, reexport=True
+            ),
+        ],
+        _stack=ExitStack(),
+    )
+
+
+class _RecipeType(IDModel):
+    model_config = DEFAULT_CONFIG | {"extra": "ignore"}
+
+    type: ResourceLocation
+
+
+def _i18n_context():
+    context = dict[str, Any]()
+    I18n(lookup={}, lang="en_us", default_i18n=None, enabled=True).add_to_context(
+        context
+    )
+    return context
+
+
+def _id(value: str):
+    return ResourceLocation.from_str(value)
+
+
+def test_lookup_by_id(loader: ModResourceLoader):
+    index = RecipeIndex.of(loader)
+
+    assert len(index) == 3
+    assert _id("mod:torch") in index
+    assert _id("mod:missing") not in index
+
+    _, data = Recipe.load_resource(_id("mod:torch"), loader)
+    assert data["type"] == "minecraft:crafting_shapeless"
+
+    with pytest.raises(FileNotFoundError):
+        Recipe.load_resource(_id("mod:missing"), loader)
+
+    assert RecipeIndex.of(loader) is index
+
+
+@pytest.mark.parametrize(
+    ["item", "want"],
+    [
+        ["mod:stick", ["mod:stick"]],
+        ["mod:coal", ["mod:charcoal"]],
+        ["mod:oak_planks", []],
+    ],
+)
+def test_by_result(loader: ModResourceLoader, item: str, want: list[str]):
+    got = RecipeIndex.of(loader).by_result(_id(item))
+
+    assert got == [_id(v) for v in want]
+
+
+@pytest.mark.parametrize(
+    ["item", "want"],
+    [
+        ["mod:oak_planks", ["mod:charcoal", "mod:stick"]],
+        ["mod:stick", ["mod:torch"]],
+        ["mod:coal", ["mod:torch"]],
+        ["mod:torch", []],
+    ],
+)
+def test_by_ingredient(loader: ModResourceLoader, item: str, want: list[str]):
+    got = RecipeIndex.of(loader).by_ingredient(_id(item))
+
+    assert got == [_id(v) for v in want]
+
+
+def test_broken_recipe(tmp_path: Path, loader: ModResourceLoader):
+    broken_path = tmp_path / "data/mod/recipes/broken.json"
+    broken_path.write_text('{"type": "minecraft:crafting_shaped",', "utf-8")
+
+    index = RecipeIndex.of(loader)
+
+    assert index.by_result(_id("mod:torch")) == [_id("mod:torch")]
+    _, data = Recipe.load_resource(_id("mod:torch"), loader)
+    assert data["type"] == "minecraft:crafting_shapeless"
+
+    with pytest.raises(ValueError, match="Failed to load recipe mod:broken") as first:
+        Recipe.load_resource(_id("mod:broken"), loader)
+    with pytest.raises(ValueError) as second:
+        Recipe.load_resource(_id("mod:broken"), loader)
+
+    # a new error is raised for each request
+    assert first.value is not second.value
+
+
+def test_external_recipes_are_loaded_on_demand(
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    internal_path = tmp_path / "internal"
+    external_path = tmp_path / "external"
+    _write_data(
+        internal_path,
+        "recipes",
+        "mod:torch",
+        {"type": "minecraft:crafting_shapeless", "result": {"item": "mod:torch"}},
+    )
+    _write_data(
+        external_path,
+        "recipes",
+        "other:lamp",
+        {"type": "minecraft:crafting_shapeless", "result": {"item": "other:lamp"}},
+    )
+    broken_path = external_path / "data/other/recipes/broken.json"
+    broken_path.write_text("{", "utf-8")
+
+    loader = _make_loader(internal_path, external_path)
+    index = RecipeIndex.of(loader)
+
+    assert list(index) == [_id("mod:torch")]
+    assert index.by_result(_id("other:lamp")) == []
+    assert "other:broken" not in caplog.text
+
+    resource_dir, data = index.load_resource(_id("other:lamp"))
+    assert resource_dir.external
+    assert data["result"] == {"item": "other:lamp"}
+
+    with pytest.raises(ValueError):
+        index.load_resource(_id("other:broken"))
+    with pytest.raises(ValueError):
+        index.load_resource(_id("other:broken"))
+    assert caplog.text.count("Failed to load recipe other:broken") == 1
+
+
+def test_load_model_is_cached_per_i18n(loader: ModResourceLoader):
+    index = RecipeIndex.of(loader)
+    context = _i18n_context()
+
+    model = index.load_model(_RecipeType, _id("mod:torch"), context)
+
+    assert model.type == _id("minecraft:crafting_shapeless")
+    assert index.load_model(_RecipeType, _id("mod:torch"), context) is model
+    assert index.load_model(_RecipeType, _id("mod:torch"), _i18n_context()) is not (
+        model
+    )
+
+
+def test_index_does_not_keep_loader_alive(tmp_path: Path, loader: ModResourceLoader):
+    # the fixture keeps its loader alive, so make another one for the same files
+    loader = _make_loader(tmp_path)
+    RecipeIndex.of(loader).by_result(_id("mod:torch"))
+
+    loader_ref = weakref.ref(loader)
+    del loader
+    gc.collect()
+
+    assert loader_ref() is None
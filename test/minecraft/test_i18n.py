@@ -1,11 +1,20 @@
+import json
+import logging
+from contextlib import ExitStack
+from pathlib import Path
 from typing import Any
 
 import pytest
-from hexdoc.core import ResourceLocation
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties, ResourceLocation
 from hexdoc.minecraft import I18n, LocalizedStr
+from hexdoc.minecraft.i18n import relocalize, report_missing_translations
+from hexdoc.model import HexdocModel
 from hexdoc.patchouli.page.abstract_pages import PageWithTitle
 from hexdoc.plugin import PluginManager
 
+from ..conftest import LoaderFactory
+from ..tree import write_file_tree
+
 
 @pytest.mark.parametrize(
     ["namespace", "path", "want"],
@@ -37,7 +46,7 @@ def test_disabled_i18n(pm: PluginManager):
     pm.add_to_context(context)
 
     I18n(
-        lookup={"key": LocalizedStr(key="key", value="value")},
+        lookup={"key": "value"},
         lang="en_us",
         default_i18n=None,
         enabled=False,
@@ -55,3 +64,213 @@ def test_disabled_i18n(pm: PluginManager):
     )
 
     assert str(page.title) == "key"
+
+
+def test_localize_is_lazy():
+    i18n = I18n(
+        lookup={"a": "100%% A", "b": "B"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+
+    first = i18n.localize("a")
+
+    assert first.key == "a"
+    assert first.value == "100% A"
+    assert i18n.localize("a") is first
+    assert i18n.lookup == {"a": "100%% A", "b": "B"}
+
+    # calls with other arguments return a copy, since they relocalize differently
+    fallback = i18n.localize("missing", "a")
+    assert fallback == first
+    assert fallback is not first
+    assert i18n.localize("a") is first
+
+
+def test_fallback_to_default_lang():
+    default_i18n = I18n(
+        lookup={"a": "default A", "b": "default B"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    i18n = I18n(
+        lookup={"b": "B", "c": "C"},
+        lang="zh_cn",
+        default_i18n=default_i18n,
+        enabled=True,
+    )
+
+    assert i18n.localize("a").value == "default A"
+    assert i18n.localize("b").value == "B"
+    assert i18n.localize("a", "c").value == "C"
+    assert i18n.localize("a", default="fallback").value == "fallback"
+    assert i18n.localize("missing").value == "missing"
+    assert i18n.fallback_keys == {"a"}
+
+
+def test_load_single_lang(tmp_path: Path, make_loader: LoaderFactory):
+    write_file_tree(
+        tmp_path / "assets/mod/lang",
+        {
+            f"{lang}.json": {"mod.a": value}
+            for lang, value in [("en_us", "A"), ("zh_cn", "甲"), ("ru_ru", "А")]
+        },
+    )
+
+    loader = make_loader(
+        [PathResourceDir.model_construct(path=tmp_path, external=False, reexport=True)],
+        props=Properties.model_construct(default_lang="en_us"),
+    )
+
+    assert I18n.list_all(loader) == {"en_us", "zh_cn", "ru_ru"}
+    assert loader.decode_cache_info().misses == 0
+
+    zh_cn = I18n.load(loader, enabled=True, lang="zh_cn")
+    ru_ru = I18n.load(loader, enabled=True, lang="ru_ru")
+
+    assert zh_cn.localize("mod.a").value == "甲"
+    assert ru_ru.localize("mod.a").value == "А"
+    assert zh_cn.default_i18n is ru_ru.default_i18n
+    assert zh_cn.default_i18n is I18n.load(loader, enabled=True, lang="en_us")
+
+    # each file was only loaded once
+    assert loader.decode_cache_info().misses == 3
+    assert loader.decode_cache_info().hits == 0
+
+
+def test_missing_translations(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    default_i18n = I18n(
+        lookup={"a": "A"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    i18n = I18n(
+        lookup={},
+        lang="zh_cn",
+        default_i18n=default_i18n,
+        enabled=True,
+    )
+
+    for _ in range(3):
+        i18n.localize("a")
+    i18n.localize("b")
+    i18n.localize("c", silent=True)
+
+    assert i18n.missing == {"a": 3, "b": 1}
+    assert default_i18n.missing == {"b": 1}
+
+    json_path = tmp_path / "missing.json"
+    with caplog.at_level(logging.WARNING):
+        report_missing_translations([default_i18n, i18n], json_path)
+
+    assert [(r.levelno, r.getMessage().splitlines()[0]) for r in caplog.records] == [
+        (logging.ERROR, "No translation in en_us for 1 keys (1 lookups). Most common:"),
+        (
+            logging.WARNING,
+            "No translation in zh_cn for 2 keys (4 lookups). Most common:",
+        ),
+    ]
+    assert json.loads(json_path.read_text()) == {
+        "en_us": {"b": 1},
+        "zh_cn": {"a": 3, "b": 1},
+    }
+
+
+def test_relocalize():
+    default_i18n = I18n(
+        lookup={"a": "default A", "b": "default B", "tag.mod.ores": "Ores"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    i18n = I18n(
+        lookup={"a": "Ay", "tag.mod.ores": "矿石"},
+        lang="zh_cn",
+        default_i18n=default_i18n,
+        enabled=True,
+    )
+
+    class Child(HexdocModel):
+        name: LocalizedStr
+        names: list[LocalizedStr]
+
+    class Parent(HexdocModel):
+        children: dict[str, Child]
+        unchanged: list[int]
+
+    shared = Child(
+        name=default_i18n.localize("a"),
+        names=[
+            default_i18n.localize("missing", "b"),
+            default_i18n.localize_item_tag(ResourceLocation("mod", "ores")),
+            default_i18n.localize("a").map(str.upper),
+            LocalizedStr.with_value("literal"),
+        ],
+    )
+    parent = Parent(children={"x": shared, "y": shared}, unchanged=[1])
+
+    localized = relocalize(parent, i18n)
+
+    child = localized.children["x"]
+    assert child is localized.children["y"]
+    assert child.name == "Ay"
+    assert child.names == ["default B", "Tag: 矿石", "AY", "literal"]
+    assert localized.unchanged is parent.unchanged
+    assert shared.name == "default A"
+    # strings are relocalized by repeating the whole call, including fallback keys
+    assert i18n.missing == {"missing": 1}
+
+
+def test_relocalize_keeps_call_arguments():
+    default_i18n = I18n(
+        lookup={"b": "default B"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    i18n = I18n(
+        lookup={"a": "Ay", "b": "Bee"},
+        lang="zh_cn",
+        default_i18n=default_i18n,
+        enabled=True,
+    )
+
+    fallback = default_i18n.localize("a", "b")
+    silent = default_i18n.localize("b", silent=True)
+    default = default_i18n.localize("c", default="C")
+
+    assert fallback == "default B"
+    assert fallback.relocalize(i18n) == "Ay"
+    assert silent.relocalize(i18n) == "Bee"
+    assert default.relocalize(i18n) == "C"
+    assert i18n.missing == {"c": 1}
+    # the shared instance for "b" still relocalizes using only that key
+    assert default_i18n.localize("b").relocalize(i18n) == "Bee"
+
+
+def test_relocalizable_copies_shared_instances_once():
+    default_i18n = I18n(
+        lookup={"key.jump": "Jump"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    i18n = I18n(
+        lookup={"key.jump": "Saltar"},
+        lang="es_es",
+        default_i18n=default_i18n,
+        enabled=True,
+    )
+
+    key = default_i18n.localize_key("jump")
+
+    # localize_key returns the shared instance for "key.jump", so it's copied, but
+    # only once per call
+    assert key is not default_i18n.localize("key.jump")
+    assert default_i18n.localize_key("jump") is key
+    assert default_i18n.localize_key("key.jump") is not key
+    assert key.relocalize(i18n) == "Saltar"
+    assert default_i18n.localize("key.jump").relocalize(i18n) == "Saltar"
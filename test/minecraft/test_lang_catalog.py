@@ -0,0 +1,114 @@
+import json
+from contextlib import ExitStack
+from pathlib import Path
+
+import pytest
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties
+from hexdoc.minecraft import I18n
+from hexdoc.minecraft.lang_catalog import LangCatalog, LangCatalogError
+
+LOOKUP = {
+    "a": "A",
+    "b.c": "100%% B",
+    "é": "unicode ✓",
+    "empty": "",
+}
+
+
+def test_round_trip():
+    catalog = LangCatalog(LangCatalog.dumps(LOOKUP))
+
+    assert len(catalog) == len(LOOKUP)
+    assert catalog.to_dict() == LOOKUP
+    assert dict(catalog) == LOOKUP
+    for key, value in LOOKUP.items():
+        assert catalog[key] == value
+    assert "missing" not in catalog
+
+
+def test_mmap(tmp_path: Path):
+    path = tmp_path / "en_us.hexdoc-lang"
+    path.write_bytes(LangCatalog.dumps(LOOKUP))
+
+    with LangCatalog.open(path) as catalog:
+        assert catalog["é"] == "unicode ✓"
+        assert catalog.to_dict() == LOOKUP
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"nope" + LangCatalog.dumps(LOOKUP)[4:],
+        LangCatalog.dumps(LOOKUP)[:4] + b"\xff\xff" + LangCatalog.dumps(LOOKUP)[6:],
+        LangCatalog.dumps(LOOKUP)[:20],
+    ],
+)
+def test_invalid(data: bytes):
+    with pytest.raises(LangCatalogError):
+        LangCatalog(data)
+
+
+def _write_lang(resources: Path, namespace: str, lang: str, data: dict[str, str]):
+    path = resources / "assets" / namespace / "lang" / f"{lang}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
+def _loader(
+    tmp_path: Path, resource_dirs: list[PathResourceDir], export_dir: Path | None
+):
+    props = Properties.model_construct(default_lang="en_us")
+    props.__dict__["repo_root"] = tmp_path  # cached_property
+    return ModResourceLoader(
+        props=props,
+        export_dir=export_dir,
+        resource_dirs=resource_dirs,
+        _stack=ExitStack(),
+    )
+
+
+def test_exported_catalog_is_preferred(tmp_path: Path):
+    resources = tmp_path / "resources"
+    export_dir = tmp_path / "export"
+    _write_lang(resources, "mod", "en_us", {"mod.a": "A"})
+    _write_lang(resources, "mod", "zh_cn", {"mod.a": "甲"})
+
+    with _loader(
+        tmp_path,
+        [
+            PathResourceDir.model_construct(
+                path=resources, external=False, reexport=True
+            )
+        ],
+        export_dir,
+    ) as loader:
+        I18n.load_all(loader, enabled=True)
+
+    catalog_path = LangCatalog.path("zh_cn")
+    assert (export_dir / catalog_path).is_file()
+    assert (tmp_path / ".hexdoc" / catalog_path).is_file()
+
+    # prove that the catalog is used instead of the exported lang files
+    _write_lang(export_dir, "mod", "zh_cn", {"mod.a": "wrong"})
+
+    addon_resources = tmp_path / "addon"
+    _write_lang(addon_resources, "addon", "en_us", {"addon.b": "B"})
+    _write_lang(addon_resources, "addon", "zh_cn", {"addon.b": "乙"})
+
+    with _loader(
+        tmp_path,
+        [
+            PathResourceDir.model_construct(
+                path=addon_resources, external=False, reexport=True
+            ),
+            PathResourceDir.model_construct(
+                path=export_dir, external=True, reexport=False
+            ),
+        ],
+        None,
+    ) as loader:
+        i18n = I18n.load_all(loader, enabled=True)
+
+    assert i18n["zh_cn"].lookup == {"mod.a": "甲", "addon.b": "乙"}
+    assert i18n["en_us"].lookup == {"mod.a": "A", "addon.b": "B"}
@@ -0,0 +1,93 @@
+import gc
+import json
+import weakref
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties, ResourceLocation
+from hexdoc.minecraft import Tag, TagRegistry
+
+
+def _write_tag(root: Path, registry: str, id: str, data: dict[str, Any]):
+    namespace, path = id.split(":")
+    tag_path = root / "data" / namespace / "tags" / registry / f"{path}.json"
+    tag_path.parent.mkdir(parents=True, exist_ok=True)
+    tag_path.write_text(json.dumps(data), "utf-8")
+
+
+def _make_loader(tmp_path: Path):
+    return ModResourceLoader(
+        props=Properties.model_construct(default_lang="en_us"),
+        export_dir=None,
+        resource_dirs=[
+            PathResourceDir.model_construct(
+                path=tmp_path, external=False, reexport=True
+            )
+        ],
+        _stack=ExitStack(),
+    )
+
+
+@pytest.fixture
+def loader(tmp_path: Path):
+    return _make_loader(tmp_path)
+
+
+def _id(value: str):
+    return ResourceLocation.from_str(value)
+
+
+def test_nested_tags(tmp_path: Path, loader: ModResourceLoader):
+    _write_tag(tmp_path, "items", "mod:outer", {"values": ["mod:a", "#mod:inner"]})
+    _write_tag(tmp_path, "items", "mod:inner", {"values": ["mod:b", "#mod:missing"]})
+
+    tags = TagRegistry.of(loader)
+    outer = tags.load("items", _id("mod:outer"))
+
+    assert outer.value_ids_set == {_id("mod:a"), _id("mod:b"), _id("#mod:missing")}
+    assert _id("mod:b") in outer
+    assert tags.tags_containing("items", _id("mod:b")) == {
+        _id("mod:outer"),
+        _id("mod:inner"),
+    }
+    assert tags.tags_containing("items", _id("mod:a")) == {_id("mod:outer")}
+
+
+def test_tags_are_loaded_once(tmp_path: Path, loader: ModResourceLoader):
+    _write_tag(tmp_path, "items", "mod:tag", {"values": ["mod:a"]})
+
+    first = Tag.load("items", _id("mod:tag"), loader)
+    second = TagRegistry.of(loader).load("items", _id("#mod:tag"))
+
+    assert first is second
+    assert TagRegistry.of(loader) is TagRegistry.of(loader)
+
+
+def test_missing_tag(loader: ModResourceLoader):
+    tags = TagRegistry.of(loader)
+
+    assert tags.get("items", _id("mod:missing")) is None
+    with pytest.raises(FileNotFoundError):
+        tags.load("items", _id("mod:missing"))
+
+
+def test_circular_tags(tmp_path: Path, loader: ModResourceLoader):
+    _write_tag(tmp_path, "items", "mod:a", {"values": ["#mod:b"]})
+    _write_tag(tmp_path, "items", "mod:b", {"values": ["#mod:a"]})
+
+    with pytest.raises(ValueError, match="Circular tag reference"):
+        TagRegistry.of(loader).load("items", _id("mod:a"))
+
+
+def test_registry_does_not_keep_loader_alive(tmp_path: Path):
+    _write_tag(tmp_path, "items", "mod:tag", {"values": ["mod:a"]})
+    loader = _make_loader(tmp_path)
+    TagRegistry.of(loader).load("items", _id("mod:tag"))
+
+    loader_ref = weakref.ref(loader)
+    del loader
+    gc.collect()
+
+    assert loader_ref() is None
@@ -5,6 +5,7 @@ from hexdoc.core.properties import Properties
 from hexdoc.model import HexdocModel, HexdocTypeAdapter, TypeTaggedUnion
 from hexdoc.plugin import PluginManager
 from hexdoc.utils.singletons import NoValue
+from pydantic import ValidationError
 
 
 class _TaggedUnion(TypeTaggedUnion, type=NoValue):
@@ -50,3 +51,93 @@ def test_union_with_other_type(
     result = ta.validate_python(data, context=context)
 
     assert isinstance(result, want_type)
+
+
+class _Base(TypeTaggedUnion, type=None):
+    pass
+
+
+class _Single(_Base, type="test:single"):
+    value: int
+
+
+class _MultiInt(_Base, type="test:multi"):
+    int_value: int
+
+
+class _MultiStr(_Base, type="test:multi"):
+    str_value: str
+
+
+class _Ambiguous(_Base, type="test:ambiguous"):
+    value: int = 0
+
+
+class _AmbiguousToo(_Base, type="test:ambiguous"):
+    other: int = 0
+
+
+@pytest.mark.parametrize(
+    ["data", "want_type"],
+    [
+        [{"type": "test:single", "value": 1}, _Single],
+        [{"type": "test:multi", "int_value": 1}, _MultiInt],
+        [{"type": "test:multi", "str_value": "a"}, _MultiStr],
+    ],
+)
+def test_resolve_does_not_modify_input(
+    data: dict[str, Any],
+    want_type: type[_Base],
+    context: Any,
+):
+    original = data.copy()
+
+    result = _Base.model_validate(data, context=context)
+
+    assert isinstance(result, want_type)
+    assert data == original
+
+
+@pytest.mark.parametrize(
+    ["data", "error", "match"],
+    [
+        [{"type": "test:single", "value": "a"}, ValidationError, "No match found"],
+        [{"type": "test:multi"}, ValidationError, "No match found"],
+        [{"type": "test:ambiguous"}, RuntimeError, "Ambiguous union match"],
+    ],
+)
+def test_resolve_errors(
+    data: dict[str, Any],
+    error: type[Exception],
+    match: str,
+    context: Any,
+):
+    original = data.copy()
+
+    with pytest.raises(error, match=match):
+        _Base.model_validate(data, context=context)
+
+    assert data == original
+
+
+def test_resolve_nested(context: Any):
+    class _Nested(_Base, type="test:nested"):
+        children: list[_Base]
+
+    data = {
+        "type": "test:nested",
+        "children": [
+            {"type": "test:single", "value": 1},
+            {
+                "type": "test:nested",
+                "children": [{"type": "test:multi", "str_value": ""}],
+            },
+        ],
+    }
+
+    result = _Base.model_validate(data, context=context)
+
+    assert isinstance(result, _Nested)
+    assert isinstance(result.children[0], _Single)
+    assert isinstance(result.children[1], _Nested)
+    assert isinstance(result.children[1].children[0], _MultiStr)
@@ -0,0 +1,179 @@
+import json
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hexdoc.cli.utils.load import copy_context, init_context
+from hexdoc.core import ModResourceLoader, PathResourceDir, Properties, ResourceLocation
+from hexdoc.core.properties import TexturesProps
+from hexdoc.minecraft import I18n
+from hexdoc.minecraft.assets import TextureContext
+from hexdoc.patchouli import Book, BookContext
+from hexdoc.plugin import PluginManager
+
+BOOK_ID = ResourceLocation("mod", "book")
+
+
+def _write_json(path: Path, data: dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), "utf-8")
+
+
+@pytest.fixture
+def loader(tmp_path: Path):
+    book_dir = tmp_path / "assets/mod/patchouli_books/book/en_us"
+    _write_json(
+        tmp_path / "data/mod/patchouli_books/book/book.json",
+        {
+            "name": "book.name",
+            "landing_text": "book.landing_text",
+            "use_resource_pack": True,
+            "i18n": True,
+        },
+    )
+    _write_json(
+        book_dir / "categories/basics.json",
+        {
+            "name": "category.basics",
+            "description": "category.basics.desc",
+            "icon": "minecraft:stone",
+        },
+    )
+    for name in ["apple", "banana"]:
+        _write_json(
+            book_dir / f"entries/basics/{name}.json",
+            {
+                "name": f"entry.{name}",
+                "category": "mod:basics",
+                "icon": "minecraft:stone",
+                "pages": [{"type": "patchouli:text", "text": f"entry.{name}.text"}],
+            },
+        )
+    _write_json(
+        tmp_path / "data/hexdoc/tags/advancements/spoilered.json",
+        {"values": []},
+    )
+    _write_json(
+        tmp_path / "assets/mod/lang/en_us.json",
+        {
+            "book.name": "Book",
+            "book.landing_text": "$(bold)Welcome$()",
+            "category.basics": "Basics",
+            "category.basics.desc": "About $(l:basics/apple)apples$(/l)",
+            "entry.apple": "Apple",
+            "entry.apple.text": "An apple",
+            "entry.banana": "Banana",
+            "entry.banana.text": "A banana",
+        },
+    )
+    # entry names are sorted differently in this language
+    _write_json(
+        tmp_path / "assets/mod/lang/xx_xx.json",
+        {
+            "book.name": "Libro",
+            "category.basics.desc": "Sobre $(l:basics/apple)manzanas$(/l)",
+            "entry.apple": "Zmanzana",
+            "entry.banana.text": "Un plátano",
+        },
+    )
+
+    props = Properties.model_construct(
+        modid="mod",
+        book_id=BOOK_ID,
+        default_lang="en_us",
+        textures=TexturesProps(missing={ResourceLocation("*", "*")}),
+    )
+    with ExitStack() as stack:
+        yield ModResourceLoader(
+            props=props,
+            export_dir=None,
+            resource_dirs=[
+                PathResourceDir.model_construct(
+                    path=tmp_path, external=False, reexport=False
+                )
+            ],
+            _stack=stack,
+        )
+
+
+def test_localize_book_matches_validate_book(loader: ModResourceLoader):
+    pm = PluginManager("main", props=loader.props)
+    book_plugin = pm.book_plugin("patchouli")
+    book_id, book_data = book_plugin.load_book_data(BOOK_ID, loader)
+    all_i18n = I18n.load_all(loader, enabled=True)
+
+    def validate(i18n: I18n):
+        context = init_context(
+            book_id=book_id,
+            book_data=book_data,
+            pm=pm,
+            loader=loader,
+            i18n=i18n,
+            all_metadata={},
+        )
+        return context, book_plugin.validate_book(book_data, context=context)
+
+    default_context, default_book = validate(all_i18n["en_us"])
+    want_context, want = validate(all_i18n["xx_xx"])
+
+    context = copy_context(default_context, all_i18n["xx_xx"])
+    got = book_plugin.localize_book(default_book, context=context)
+
+    assert isinstance(got, Book)
+    assert got.model_dump(mode="json") == want.model_dump(mode="json")
+    assert [
+        category.model_dump(mode="json") for category in got.categories.values()
+    ] == [category.model_dump(mode="json") for category in want.categories.values()]
+    assert list(got.categories[ResourceLocation("mod", "basics")].entries) == [
+        ResourceLocation("mod", "basics/banana"),
+        ResourceLocation("mod", "basics/apple"),
+    ]
+
+    # the default language's book and context are unchanged
+    assert default_book.name == "Book"
+    assert list(default_book.categories[ResourceLocation("mod", "basics")].entries) == [
+        ResourceLocation("mod", "basics/apple"),
+        ResourceLocation("mod", "basics/banana"),
+    ]
+    for context_type in [BookContext, TextureContext]:
+        assert context_type.of(context) is not context_type.of(default_context)
+        assert (
+            context_type.of(context).model_dump()
+            == context_type.of(want_context).model_dump()
+        )
+    assert BookContext.of(context).link_bases is not (
+        BookContext.of(default_context).link_bases
+    )
+
+
+def test_localize_book_does_not_modify_original(
+    loader: ModResourceLoader,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    pm = PluginManager("main", props=loader.props)
+    book_plugin = pm.book_plugin("patchouli")
+    book_id, book_data = book_plugin.load_book_data(BOOK_ID, loader)
+    i18n = I18n.load_all(loader, enabled=True)["en_us"]
+    context = init_context(
+        book_id=book_id,
+        book_data=book_data,
+        pm=pm,
+        loader=loader,
+        i18n=i18n,
+        all_metadata={},
+    )
+    book = book_plugin.validate_book(book_data, context=context)
+    categories = book.categories
+    category = categories[ResourceLocation("mod", "basics")]
+    entries = category.entries
+
+    # simulate a book with no localized text, which relocalize returns unchanged
+    monkeypatch.setattr("hexdoc._hooks.relocalize", lambda value, i18n: value)
+    got = book_plugin.localize_book(book, context=context)
+
+    assert got is not book
+    assert got.model_dump(mode="json") == book.model_dump(mode="json")
+    assert book.categories is categories
+    assert categories[ResourceLocation("mod", "basics")] is category
+    assert category.entries is entries
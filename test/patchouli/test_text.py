@@ -1,22 +1,32 @@
 # pyright: reportPrivateUsage=false
 from argparse import Namespace
-from typing import Any, cast
+from typing import Any, Protocol, cast
 
 import pytest
+from hexdoc.core import Properties
 from hexdoc.core.resource import ResourceLocation
 from hexdoc.minecraft import I18n
 from hexdoc.patchouli.text import (
     DEFAULT_MACROS,
+    STYLE_REGEX,
     BookLink,
     CommandStyle,
+    FormattingContext,
     FormatTree,
     FunctionStyle,
     LinkStyle,
+    MacroExpander,
     ParagraphStyle,
     SpecialStyleType,
+    Style,
+    _CloseTag,
+    _FormatParser,
+    _resolve_keys,
+    resolve_macros,
 )
 from hexdoc.plugin import PluginManager
 from jinja2 import Environment, PackageLoader
+from pydantic import TypeAdapter, ValidationError
 
 
 class MockPluginManager:
@@ -270,3 +280,369 @@ def test_wildcard_link_override_not_matching():
     href = style.href({"link_bases": {}})
 
     assert href == "https://example.ca"
+
+
+def _resolve_macros_naive(string: str, macros: dict[str, str]) -> str:
+    old_string = None
+    while old_string != string:
+        old_string = string
+        for macro, replace in macros.items():
+            string = string.replace(macro, replace)
+    return string
+
+
+@pytest.mark.parametrize(
+    "test_str",
+    [
+        "",
+        "no macros here",
+        "$(bold)A$(reset) $(italics)B$(clear)$(p)C<br>D/$",
+        "$(list)first$(list2)second$(li)third",
+        "$(thing)Thing$(0) and $(item)item$(nocolor)",
+        "$(obf)$(strike)$(2br)$(custom)",
+        "$(nested)!",
+        "<br>$(clear)/$(clear)",
+        "/$(2br)x",
+    ],
+)
+def test_macros_match_naive_replace(test_str: str):
+    macros = DEFAULT_MACROS | {
+        "$(custom)": "$(thing)custom/$",
+        "$(nested)": "$(custom)$(bold)",
+    }
+
+    assert resolve_macros(test_str, macros) == _resolve_macros_naive(test_str, macros)
+
+
+@pytest.mark.parametrize(
+    ["test_str", "want"],
+    [
+        ["<br>$(clear)/$(clear)", "$(br)$()$()()"],
+        ["/$(2br)x", "$()(br2)x"],
+    ],
+)
+def test_overlapping_macros_use_dict_order(test_str: str, want: str):
+    assert resolve_macros(test_str, DEFAULT_MACROS) == want
+
+
+def test_macro_order_affects_equality():
+    forward = MacroExpander({"/$": "$()", "$(2br)": "$(br2)"})
+    backward = MacroExpander({"$(2br)": "$(br2)", "/$": "$()"})
+
+    assert forward.expand("/$(2br)x") != backward.expand("/$(2br)x")
+    assert forward != backward
+    assert forward == MacroExpander({"/$": "$()", "$(2br)": "$(br2)"})
+    assert hash(forward) == hash(MacroExpander(dict(forward.macros)))
+
+
+@pytest.mark.parametrize(
+    "macros",
+    [
+        {"$(a)": "$(a)$(a)"},
+        {"$(a)": "$(b)", "$(b)": "$(a)"},
+        {"$(a)": "$(b)", "$(b)": "$(c)", "$(c)": "x$(a)"},
+    ],
+)
+def test_recursive_macros(macros: dict[str, str]):
+    with pytest.raises(RuntimeError, match="Recursive macro"):
+        MacroExpander(macros)
+
+
+def test_format_is_cached():
+    pm = cast(PluginManager, MockPluginManager())
+    en_us = cast(I18n, Namespace(keys={}, lang="en_us"))
+    zh_cn = cast(I18n, Namespace(keys={}, lang="zh_cn"))
+
+    def format(string: str, i18n: I18n = en_us):
+        return FormatTree.format(
+            string,
+            book_id=ResourceLocation("hexcasting", "thehexbook"),
+            i18n=i18n,
+            macros=DEFAULT_MACROS,
+            is_0_black=False,
+            pm=pm,
+            link_overrides={},
+        )
+
+    FormatTree.cache_clear()
+    first = format("$(bold)cached$()")
+
+    assert format("$(bold)cached$()") is first
+    # the tree doesn't depend on the language, so it's shared
+    assert format("$(bold)cached$()", zh_cn) is first
+    assert FormatTree.cache_info()[:2] == (2, 1)
+
+
+def test_format_cache_localizes_keys():
+    pm = cast(PluginManager, MockPluginManager())
+
+    def format(i18n: I18n):
+        return FormatTree.format(
+            "$(bold)Press $(k:jump)$()",
+            book_id=ResourceLocation("hexcasting", "thehexbook"),
+            i18n=i18n,
+            macros=DEFAULT_MACROS,
+            is_0_black=False,
+            pm=pm,
+            link_overrides={},
+        )
+
+    en_us = I18n(
+        lookup={"key.jump": "Space"},
+        lang="en_us",
+        default_i18n=None,
+        enabled=True,
+    )
+    es_es = I18n(
+        lookup={"key.jump": "Espacio"},
+        lang="es_es",
+        default_i18n=en_us,
+        enabled=True,
+    )
+
+    FormatTree.cache_clear()
+    first = format(en_us)
+    second = format(es_es)
+
+    assert str(first) != str(second)
+    assert "Press Space" in repr(first)
+    assert "Press Espacio" in repr(second)
+    assert FormatTree.cache_info()[:2] == (1, 1)
+
+
+def _format_reference(
+    string: str,
+    book_id: ResourceLocation,
+    i18n: I18n,
+    is_0_black: bool,
+    link_overrides: dict[str, str],
+) -> FormatTree:
+    """The original regex-based parser, used to check `_FormatParser`."""
+    text_nodes: list[str] = []
+    styles: list[Style | _CloseTag] = []
+    text_since_prev_style: list[str] = []
+    last_end = 0
+
+    for match in STYLE_REGEX.finditer(string):
+        text_since_prev_style.append(string[last_end : match.start()])
+        last_end = match.end()
+
+        match Style.parse(match[1], book_id, i18n, is_0_black, link_overrides):
+            case str(replacement):
+                text_since_prev_style.append(replacement)
+            case Style() | _CloseTag() as style:
+                styles.append(style)
+                text_nodes.append("".join(text_since_prev_style))
+                text_since_prev_style.clear()
+
+    text_nodes.append("".join(text_since_prev_style) + string[last_end:])
+    first_node = text_nodes.pop(0)
+
+    style_stack = [
+        FormatTree(CommandStyle(type=SpecialStyleType.base), []),
+        FormatTree(ParagraphStyle.paragraph(), [first_node]),
+    ]
+    for style, text in zip(styles, text_nodes):
+        tmp_stylestack: list[Style] = []
+        if style.type == SpecialStyleType.base:
+            while style_stack[-1].style.type != SpecialStyleType.paragraph:
+                last_node = style_stack.pop()
+                style_stack[-1].children.append(last_node)
+        elif any(tree.style.type == style.type for tree in style_stack):
+            while len(style_stack) >= 2:
+                last_node = style_stack.pop()
+                style_stack[-1].children.append(last_node)
+                if last_node.style.type == style.type:
+                    break
+                tmp_stylestack.append(last_node.style)
+
+        for sty in tmp_stylestack:
+            style_stack.append(FormatTree(sty, []))
+
+        if isinstance(style, _CloseTag):
+            if text:
+                style_stack[-1].children.append(text)
+        else:
+            style_stack.append(FormatTree(style, [text] if text else []))
+
+    while len(style_stack) >= 2:
+        last_node = style_stack.pop()
+        style_stack[-1].children.append(last_node)
+
+    return style_stack[0]
+
+
+@pytest.mark.parametrize("is_0_black", [False, True])
+@pytest.mark.parametrize(
+    "test_str",
+    [
+        "",
+        "plain text",
+        "$(l:http://google.com)A$(/l)",
+        "$(#111)A$(l:http://google.com)B$(/l)C$()",
+        "$(#111)A$(l:http://google.com)B$(#222)C$(#111)D$(/l)E$()",
+        "Write the given iota to my $(l:patterns/readwrite#hexcasting:write/local)$(#490)local$().$(br)The $(l:patterns/readwrite#hexcasting:write/local)$(#490)local$() is a lot like a $(l:items/focus)$(#b0b)Focus$(). It's cleared when I stop casting a Hex, starts with $(l:casting/influences)$(#490)Null$() in it, and is preserved between casts of $(l:patterns/meta#hexcasting:for_each)$(#fc77be)Thoth's Gambit$(). ",
+        "$(k)$(l)$(m)$(n)$(o)all$()$(br2)next$(li)item$(li)item 2",
+        "$(0)$(1)$(2)$(a)$(f)colors$(0)reset",
+        "$(t:tooltip)hover$(/t) $(c:/say hi)click$(/c) $(t:a:b)colon",
+        "$(k:key.jump) $(playername) $(br)$(#abc)$(#a:b)",
+        "$(l)bold$(l:https://example.com)link$(/l)still bold$(o)italic$(l)bold again",
+        "$(l:?query)query$(/l)$(l:hexcasting:items/focus#anchor)ns$(/l)",
+        "$(o)italic $(unclosed",
+        "$(o)$(/l)$(/t)$(/c)$()$()",
+        "$(li)$(br2)$(li)$(o)a$(br2)b",
+    ],
+)
+def test_parser_matches_reference(test_str: str, is_0_black: bool):
+    book_id = ResourceLocation("hexcasting", "thehexbook")
+    i18n = I18n(lookup={}, lang="en_us", default_i18n=None, enabled=True)
+    link_overrides = {"casting/*": "https://example.com"}
+
+    want = _format_reference(test_str, book_id, i18n, is_0_black, link_overrides)
+    tree = _FormatParser(book_id, is_0_black, link_overrides).parse(test_str)
+    got = _resolve_keys(tree, i18n)
+
+    assert got == want
+    assert repr(got) == repr(want)
+
+
+@pytest.mark.parametrize("style_str", ["bogus", "/bogus", "/l:foo", "#12345", "x:y"])
+def test_parser_unhandled_style(style_str: str):
+    book_id = ResourceLocation("hexcasting", "thehexbook")
+    i18n = I18n(lookup={}, lang="en_us", default_i18n=None, enabled=True)
+
+    with pytest.raises(ValueError, match="Unhandled style"):
+        Style.parse(style_str, book_id, i18n, False, {})
+    with pytest.raises(ValueError, match="Unhandled style"):
+        _FormatParser(book_id, False, {}).parse(f"$({style_str})")
+
+
+class CountingPluginManager(MockPluginManager):
+    def __init__(self):
+        self.calls = 0
+
+    def validate_format_tree(self, tree: FormatTree, *_: Any, **__: Any):
+        self.calls += 1
+        return tree
+
+
+def test_lazy_format():
+    FormatTree.cache_clear()
+    pm = CountingPluginManager()
+    kwargs = dict[str, Any](
+        book_id=ResourceLocation("hexcasting", "thehexbook"),
+        i18n=cast(I18n, Namespace(keys={})),
+        macros=DEFAULT_MACROS,
+        is_0_black=False,
+        pm=pm,
+        link_overrides={},
+    )
+
+    tree = FormatTree.lazy("$(bold)lazy$()", **kwargs)
+
+    assert not tree.is_parsed
+    assert tree.raw == "$(bold)lazy$()"
+    assert pm.calls == 0
+
+    assert tree == FormatTree.format("$(bold)lazy$()", **kwargs)
+    assert tree.is_parsed
+    assert pm.calls == 1
+
+
+def test_lazy_format_error():
+    lazy = FormatTree.lazy(
+        "$(bogus)",
+        book_id=ResourceLocation("hexcasting", "thehexbook"),
+        i18n=cast(I18n, Namespace(keys={})),
+        macros=DEFAULT_MACROS,
+        is_0_black=False,
+        pm=cast(PluginManager, MockPluginManager()),
+        link_overrides={},
+    )
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Unhandled style"):
+            lazy.children
+
+
+def _i18n(lookup: dict[str, str], lang: str = "en_us", default: I18n | None = None):
+    return I18n(lookup=lookup, lang=lang, default_i18n=default, enabled=True)
+
+
+class FormatContextFactory(Protocol):
+    def __call__(self, i18n: I18n, *, eager: bool = True) -> dict[str, Any]:
+        ...
+
+
+@pytest.fixture
+def make_format_context(empty_pm: PluginManager) -> FormatContextFactory:
+    """Creates a validation context for FormatTree fields using `empty_pm`."""
+
+    def make_format_context(i18n: I18n, *, eager: bool = True):
+        context = dict[str, Any]()
+        for item in [
+            empty_pm,
+            Properties.model_construct(is_0_black=False, link_overrides={}),
+            i18n,
+            FormattingContext(
+                book_id=ResourceLocation("hexcasting", "thehexbook"),
+                macros=DEFAULT_MACROS,
+                eager=eager,
+            ),
+        ]:
+            item.add_to_context(context)
+        return context
+
+    return make_format_context
+
+
+@pytest.mark.parametrize("eager", [False, True])
+def test_validate_eager(
+    eager: bool,
+    empty_pm: PluginManager,
+    make_format_context: FormatContextFactory,
+):
+    pm = CountingPluginManager()
+    empty_pm.validate_format_tree = pm.validate_format_tree
+    context = make_format_context(_i18n({"key": "$(bold)value"}), eager=eager)
+
+    tree = TypeAdapter(FormatTree).validate_python("key", context=context)
+
+    assert tree.is_parsed == eager
+    assert tree.raw == "$(bold)value"
+    assert tree.style == CommandStyle(type=SpecialStyleType.base)
+    assert pm.calls == 1
+
+
+def test_validate_bad_link_fails_by_default(make_format_context: FormatContextFactory):
+    context = make_format_context(_i18n({"key": "$(l:not a:valid id)link$(/l)"}))
+
+    with pytest.raises(ValidationError, match="Invalid ResourceLocation"):
+        TypeAdapter(FormatTree).validate_python("key", context=context)
+
+
+@pytest.mark.parametrize("eager", [False, True])
+def test_relocalize(
+    eager: bool,
+    empty_pm: PluginManager,
+    make_format_context: FormatContextFactory,
+):
+    empty_pm.validate_format_tree = MockPluginManager().validate_format_tree
+
+    default_i18n = _i18n({"key": "$(bold)value", "other": "other"})
+    i18n = _i18n({"key": "$(italic)translated"}, "zh_cn", default_i18n)
+    context = make_format_context(default_i18n, eager=eager)
+
+    ta = TypeAdapter(FormatTree)
+    tree = ta.validate_python("key", context=context)
+    fallback = ta.validate_python("other", context=context)
+
+    localized = tree.relocalize(i18n)
+
+    i18n.add_to_context(context, overwrite=True)
+    assert localized == ta.validate_python("key", context=context)
+    assert localized.raw == "$(italic)translated"
+    assert tree.raw == "$(bold)value"
+    assert fallback.relocalize(i18n).raw == "other"
+    assert i18n.missing == {"other": 1}
+    assert fallback.relocalize(i18n).relocalize(default_i18n) == fallback